@@ -1,9 +1,11 @@
 import os
 import sys
+import time
 import uuid
+import socket
 import traceback
-from datetime import datetime
-from flask import Flask, request, jsonify
+from datetime import datetime, timezone
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 
 # プロジェクトルートをPythonパスに追加
@@ -15,9 +17,17 @@ from utils import (
     rate_limiter, rate_limit_decorator,
     auth_manager, api_key_manager, require_api_key
 )
+from utils.history_store import history_store
+from utils.result_cache import result_cache, normalize_target
 from scraper import (
     FollowChecker, LikeChecker, RepostChecker, CommentChecker,
-    ScrapingError, LoginRequiredError, ElementNotFoundError, RateLimitError
+    ScrapingError, LoginRequiredError, ElementNotFoundError, RateLimitError, CapacityExceededError,
+    RequestAbortedError, DeadlineExceededError, ClientDisconnectedError,
+    fair_scheduler, circuit_breaker, CircuitOpenError, hedged_executor, concurrency_limiter, pipelined_executor,
+    resource_blocker, follower_index_store,
+    session_keeper, engagement_ledger,
+    campaign_registry, CampaignError, CampaignNotFoundError,
+    watch_manager, WatchError
 )
 
 # Flaskアプリケーションの作成
@@ -30,13 +40,70 @@ CORS(app, origins="*")
 # グローバル変数
 active_scrapers = {}
 
-def get_client_identifier():
+def start_background_services():
+    """バックグラウンドタスクを開始（Gunicornではワーカーごとに post_fork から呼び出す）"""
+    session_keeper.start()
+    engagement_ledger.start()
+    campaign_registry.start()
+    watch_manager.start()
+    
+    # 再起動・デプロイ直後も直近の結果をキャッシュから返せるよう履歴から復元
+    result_cache.warm(history_store)
+
+def get_client_identifier(*args, **kwargs):
     """クライアント識別子を取得"""
     api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
     if api_key:
         return f"api_key:{api_key}"
     return request.remote_addr
 
+def get_request_priority(default='interactive'):
+    """リクエストの優先度（X-Priority: bulk で自ら優先度を下げることのみ可能）"""
+    if request.headers.get('X-Priority', '').lower() == 'bulk':
+        return 'bulk'
+    return default
+
+def get_request_deadline():
+    """
+    リクエストの処理期限（time.monotonic() 基準、期限が無ければNone）
+    
+    X-Request-Deadline ヘッダーでクライアントが応答を待てる残り秒数を指定する
+    """
+    if 'request_deadline' not in g:
+        budget = Config.REQUEST_DEADLINE_DEFAULT
+        header = request.headers.get('X-Request-Deadline')
+        if header:
+            try:
+                budget = float(header)
+            except ValueError:
+                app_logger.warning(f"Invalid X-Request-Deadline header: {header}")
+        
+        g.request_deadline = None
+        if budget and budget > 0:
+            g.request_deadline = time.monotonic() + min(budget, Config.REQUEST_DEADLINE_MAX)
+    
+    return g.request_deadline
+
+def get_disconnect_check():
+    """クライアントの切断を検出する関数（サーバーが接続のソケットを公開していなければNone）"""
+    sock = request.environ.get('gunicorn.socket') or request.environ.get('werkzeug.socket')
+    if sock is None:
+        return None
+    
+    def is_disconnected():
+        try:
+            # 読み取り可能で0バイトならクライアントが接続を閉じている
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+        except ValueError:
+            # TLSソケットは覗き見できないため判定しない
+            return False
+    
+    return is_disconnected
+
 def create_response(success=True, action=None, result=None, details=None, error=None):
     """標準レスポンス形式を作成"""
     response = {
@@ -52,9 +119,94 @@ def create_response(success=True, action=None, result=None, details=None, error=
         response['details'] = details
     if error:
         response['error'] = error
+    if 'queue_wait_ms' in g:
+        response['queue_wait_ms'] = g.queue_wait_ms
     
     return response
 
+def run_check(request_id, action, target, checker_class, check, cacheable=True, priority='interactive'):
+    """
+    確認処理を実行し、結果をキャッシュと履歴に反映
+    
+    check はチェッカーのインスタンスを受け取って結果を返す関数
+    キャッシュに無い場合はスクレイピング枠の割り当てを待ってから実行する
+    """
+    target_key = normalize_target(action, target)
+    
+    if cacheable:
+        cached = result_cache.get(action, target_key)
+        if cached is not None:
+            return cached
+    
+    # X.comの障害中はブラウザを起動せず、直近の結果があればそれを返す
+    try:
+        permit = circuit_breaker.allow()
+    except CircuitOpenError:
+        stale = history_store.latest_result(action, target_key, Config.CIRCUIT_STALE_MAX_AGE) if cacheable else None
+        if stale is None:
+            raise
+        result, created_at = stale
+        return dict(result, cached_at=datetime.utcfromtimestamp(created_at).isoformat(), stale=True)
+    
+    # 処理期限がある場合、枠の割り当て待ちも期限内に収める
+    deadline = get_request_deadline()
+    timeout = Config.SCHEDULER_MAX_WAIT
+    if deadline is not None:
+        timeout = max(0, min(timeout, deadline - time.monotonic()))
+    
+    priority = get_request_priority(priority)
+    
+    try:
+        ticket = fair_scheduler.acquire(get_client_identifier(), priority, timeout=timeout)
+        g.queue_wait_ms = ticket.wait_ms
+        
+        started = time.time()
+        account = engagement_ledger.get_account() or Config.X_USERNAME or None
+        
+        # 割り当てた枠は実行側が返却する（時間がかかっている場合は空き枠で並行実行する）
+        attempt = hedged_executor.run(
+            action, ticket, checker_class, check,
+            deadline=deadline,
+            is_cancelled=get_disconnect_check(),
+            hedge=priority == 'interactive'
+        )
+        # 台帳やインデックスだけで回答した確認はブラウザの負荷を表さないため、所要時間の基準に含めない
+        if attempt.error is not None or attempt.checker.navigated:
+            concurrency_limiter.record(attempt.duration, attempt.error)
+        
+        if attempt.error is not None:
+            # 中断はX.com側の失敗ではないためサーキットブレーカーに記録しない
+            if not isinstance(attempt.error, RequestAbortedError):
+                circuit_breaker.record(permit, attempt.error)
+            history_store.record(
+                action, target_key, False,
+                error_code=type(attempt.error).__name__,
+                duration=time.time() - started,
+                stage_timings=attempt.checker.stage_timings,
+                account=account,
+                request_id=request_id
+            )
+            raise attempt.error
+        
+        result = attempt.result
+        circuit_breaker.record(permit)
+        history_store.record(
+            action, target_key, True,
+            result=result,
+            duration=time.time() - started,
+            stage_timings=attempt.checker.stage_timings,
+            account=account,
+            request_id=request_id,
+            cacheable=cacheable
+        )
+    finally:
+        circuit_breaker.release(permit)
+    
+    if cacheable:
+        result_cache.put(action, target_key, result)
+    
+    return result
+
 def handle_scraping_error(e, request_id, action):
     """スクレイピングエラーのハンドリング"""
     log_error(app_logger, request_id, e, action)
@@ -81,6 +233,52 @@ def handle_scraping_error(e, request_id, action):
             }
         ), 404
     
+    elif isinstance(e, CapacityExceededError):
+        # retry_after はキューの消化速度から算出した値
+        retry_after = e.retry_after or Config.SCHEDULER_MAX_WAIT
+        return create_response(
+            success=False,
+            action=action,
+            error={
+                'code': 'CAPACITY_EXCEEDED',
+                'message': str(e),
+                'retry_after': retry_after
+            }
+        ), 503, {'Retry-After': str(retry_after)}
+    
+    elif isinstance(e, CircuitOpenError):
+        retry_after = e.retry_after or Config.CIRCUIT_OPEN_SECONDS
+        return create_response(
+            success=False,
+            action=action,
+            error={
+                'code': 'CIRCUIT_OPEN',
+                'message': str(e),
+                'retry_after': retry_after
+            }
+        ), 503, {'Retry-After': str(retry_after)}
+    
+    elif isinstance(e, DeadlineExceededError):
+        return create_response(
+            success=False,
+            action=action,
+            error={
+                'code': 'DEADLINE_EXCEEDED',
+                'message': str(e)
+            }
+        ), 504
+    
+    elif isinstance(e, ClientDisconnectedError):
+        # 応答は届かないがログと履歴のために返す（nginxの慣例に合わせて499）
+        return create_response(
+            success=False,
+            action=action,
+            error={
+                'code': 'CLIENT_CLOSED_REQUEST',
+                'message': str(e)
+            }
+        ), 499
+    
     elif isinstance(e, RateLimitError):
         return create_response(
             success=False,
@@ -108,13 +306,16 @@ def health_check():
     """ヘルスチェックエンドポイント"""
     try:
         stats = rate_limiter.get_stats('health_check')
+        circuits = circuit_breaker.get_status()
+        degraded = any(circuit['state'] != 'closed' for circuit in circuits['circuits'].values())
         
         return jsonify(create_response(
             success=True,
             result={
-                'status': 'healthy',
+                'status': 'degraded' if degraded else 'healthy',
                 'version': '1.0.0',
-                'rate_limit_stats': stats
+                'rate_limit_stats': stats,
+                'circuit_breaker': circuits
             },
             details='API is running normally'
         ))
@@ -161,8 +362,10 @@ def check_follow():
             )), 400
         
         # フォロー確認を実行
-        with FollowChecker() as checker:
-            result = checker.check_follow_status(target_user)
+        result = run_check(
+            request_id, 'follow', target_user, FollowChecker,
+            lambda checker: checker.check_follow_status(target_user)
+        )
         
         log_request(app_logger, request_id, 'follow', target_user, start_time)
         
@@ -187,6 +390,156 @@ def check_follow():
             }
         )), 500
 
+@app.route('/api/check/follow/bulk', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def check_follow_bulk():
+    """複数ユーザーのフォロー一括確認エンドポイント"""
+    request_id = str(uuid.uuid4())
+    start_time = datetime.utcnow()
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(create_response(
+                success=False,
+                action='follow_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': 'JSON data is required'
+                }
+            )), 400
+        
+        account = data.get('account')
+        checking_users = data.get('checking_users')
+        
+        if (not account or not checking_users or not isinstance(checking_users, list)
+                or not all(isinstance(username, str) for username in checking_users)):
+            return jsonify(create_response(
+                success=False,
+                action='follow_bulk',
+                error={
+                    'code': 'MISSING_PARAMETER',
+                    'message': 'account and checking_users (list of usernames) are required'
+                }
+            )), 400
+        
+        if len(checking_users) > Config.BULK_MAX_USERS:
+            return jsonify(create_response(
+                success=False,
+                action='follow_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': f'checking_users must not exceed {Config.BULK_MAX_USERS} entries'
+                }
+            )), 400
+        
+        # アカウント名はインデックスのファイル名に使うため、枠やブラウザを確保する前に確認
+        try:
+            follower_index_store.normalize_key(account)
+        except ValueError:
+            return jsonify(create_response(
+                success=False,
+                action='follow_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': 'account must be a valid X username'
+                }
+            )), 400
+        
+        # フォロワーインデックスから一括確認を実行
+        result = run_check(
+            request_id, 'follow_bulk', account, FollowChecker,
+            lambda checker: checker.check_followers_bulk(account, checking_users),
+            cacheable=False,
+            priority='bulk'
+        )
+        
+        log_request(app_logger, request_id, 'follow_bulk', f"{account}:{len(checking_users)} users", start_time)
+        
+        return jsonify(create_response(
+            success=True,
+            action='follow_bulk',
+            result=result,
+            details=f"Follow status checked for {len(checking_users)} users"
+        ))
+    
+    except ScrapingError as e:
+        return handle_scraping_error(e, request_id, 'follow_bulk')
+    
+    except Exception as e:
+        log_error(app_logger, request_id, e, 'follow_bulk')
+        return jsonify(create_response(
+            success=False,
+            action='follow_bulk',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
+@app.route('/api/followers/sync', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def sync_followers():
+    """フォロワーインデックス更新エンドポイント"""
+    request_id = str(uuid.uuid4())
+    start_time = datetime.utcnow()
+    
+    try:
+        data = request.get_json()
+        account = data.get('account') if data else None
+        if not account:
+            return jsonify(create_response(
+                success=False,
+                action='followers_sync',
+                error={
+                    'code': 'MISSING_PARAMETER',
+                    'message': 'account is required'
+                }
+            )), 400
+        
+        # full=true の場合は一覧全体を取得し直す
+        with fair_scheduler.slot(
+            get_client_identifier(), 'bulk', timeout=Config.SCHEDULER_MAX_WAIT
+        ) as ticket:
+            g.queue_wait_ms = ticket.wait_ms
+            with FollowChecker() as checker:
+                index = checker.sync_follower_index(account, full=bool(data.get('full', False)))
+        
+        log_request(app_logger, request_id, 'followers_sync', account, start_time)
+        
+        return jsonify(create_response(
+            success=True,
+            action='followers_sync',
+            result=index.get_stats(),
+            details=f"Follower index synced for {account}"
+        ))
+    
+    except ScrapingError as e:
+        return handle_scraping_error(e, request_id, 'followers_sync')
+    
+    except ValueError as e:
+        return jsonify(create_response(
+            success=False,
+            action='followers_sync',
+            error={
+                'code': 'INVALID_REQUEST',
+                'message': str(e)
+            }
+        )), 400
+    
+    except Exception as e:
+        log_error(app_logger, request_id, e, 'followers_sync')
+        return jsonify(create_response(
+            success=False,
+            action='followers_sync',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
 @app.route('/api/check/like', methods=['POST'])
 @require_api_key
 @rate_limit_decorator(get_client_identifier)
@@ -219,8 +572,10 @@ def check_like():
             )), 400
         
         # いいね確認を実行
-        with LikeChecker() as checker:
-            result = checker.check_like_status(tweet_url)
+        result = run_check(
+            request_id, 'like', tweet_url, LikeChecker,
+            lambda checker: checker.check_like_status(tweet_url)
+        )
         
         log_request(app_logger, request_id, 'like', tweet_url, start_time)
         
@@ -277,8 +632,10 @@ def check_repost():
             )), 400
         
         # リポスト確認を実行
-        with RepostChecker() as checker:
-            result = checker.check_repost_status(tweet_url)
+        result = run_check(
+            request_id, 'repost', tweet_url, RepostChecker,
+            lambda checker: checker.check_repost_status(tweet_url)
+        )
         
         log_request(app_logger, request_id, 'repost', tweet_url, start_time)
         
@@ -303,6 +660,81 @@ def check_repost():
             }
         )), 500
 
+@app.route('/api/check/repost/bulk', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def check_repost_bulk():
+    """複数ユーザーのリポスト一括確認エンドポイント"""
+    request_id = str(uuid.uuid4())
+    start_time = datetime.utcnow()
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(create_response(
+                success=False,
+                action='repost_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': 'JSON data is required'
+                }
+            )), 400
+        
+        tweet_url = data.get('tweet_url')
+        checking_users = data.get('checking_users')
+        
+        if (not tweet_url or not checking_users or not isinstance(checking_users, list)
+                or not all(isinstance(username, str) for username in checking_users)):
+            return jsonify(create_response(
+                success=False,
+                action='repost_bulk',
+                error={
+                    'code': 'MISSING_PARAMETER',
+                    'message': 'tweet_url and checking_users (list of usernames) are required'
+                }
+            )), 400
+        
+        if len(checking_users) > Config.BULK_MAX_USERS:
+            return jsonify(create_response(
+                success=False,
+                action='repost_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': f'checking_users must not exceed {Config.BULK_MAX_USERS} entries'
+                }
+            )), 400
+        
+        # リポストしたユーザー一覧から一括確認を実行
+        result = run_check(
+            request_id, 'repost_bulk', tweet_url, RepostChecker,
+            lambda checker: checker.check_repost_status_bulk(tweet_url, checking_users),
+            cacheable=False,
+            priority='bulk'
+        )
+        
+        log_request(app_logger, request_id, 'repost_bulk', f"{tweet_url}:{len(checking_users)} users", start_time)
+        
+        return jsonify(create_response(
+            success=True,
+            action='repost_bulk',
+            result=result,
+            details=f"Repost status checked for {len(checking_users)} users"
+        ))
+    
+    except ScrapingError as e:
+        return handle_scraping_error(e, request_id, 'repost_bulk')
+    
+    except Exception as e:
+        log_error(app_logger, request_id, e, 'repost_bulk')
+        return jsonify(create_response(
+            success=False,
+            action='repost_bulk',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
 @app.route('/api/check/comment', methods=['POST'])
 @require_api_key
 @rate_limit_decorator(get_client_identifier)
@@ -336,9 +768,30 @@ def check_comment():
                 }
             )), 400
         
+        lookup_strategy = data.get('lookup_strategy')
+        if lookup_strategy is not None and lookup_strategy not in CommentChecker.LOOKUP_STRATEGIES:
+            return jsonify(create_response(
+                success=False,
+                action='comment',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': f"lookup_strategy must be one of: {', '.join(CommentChecker.LOOKUP_STRATEGIES)}"
+                }
+            )), 400
+        
         # コメント確認を実行
-        with CommentChecker() as checker:
-            result = checker.check_comment_status(tweet_url, checking_user)
+        collect_all = bool(data.get('all_comments', False))
+        # 全コメント取得時は結果が異なるためキャッシュしない
+        result = run_check(
+            request_id, 'comment', f"{tweet_url}:{checking_user}", CommentChecker,
+            lambda checker: checker.check_comment_status(
+                tweet_url,
+                checking_user,
+                collect_all=collect_all,
+                lookup_strategy=lookup_strategy
+            ),
+            cacheable=not collect_all
+        )
         
         log_request(app_logger, request_id, 'comment', f"{tweet_url}:{checking_user}", start_time)
         
@@ -363,12 +816,88 @@ def check_comment():
             }
         )), 500
 
+@app.route('/api/check/comment/bulk', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def check_comment_bulk():
+    """複数ユーザーのコメント一括確認エンドポイント"""
+    request_id = str(uuid.uuid4())
+    start_time = datetime.utcnow()
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(create_response(
+                success=False,
+                action='comment_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': 'JSON data is required'
+                }
+            )), 400
+        
+        tweet_url = data.get('tweet_url')
+        checking_users = data.get('checking_users')
+        
+        if (not tweet_url or not checking_users or not isinstance(checking_users, list)
+                or not all(isinstance(username, str) for username in checking_users)):
+            return jsonify(create_response(
+                success=False,
+                action='comment_bulk',
+                error={
+                    'code': 'MISSING_PARAMETER',
+                    'message': 'tweet_url and checking_users (list of usernames) are required'
+                }
+            )), 400
+        
+        if len(checking_users) > Config.BULK_MAX_USERS:
+            return jsonify(create_response(
+                success=False,
+                action='comment_bulk',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': f'checking_users must not exceed {Config.BULK_MAX_USERS} entries'
+                }
+            )), 400
+        
+        # 1回の返信クロールで一括確認を実行
+        result = run_check(
+            request_id, 'comment_bulk', tweet_url, CommentChecker,
+            lambda checker: checker.check_comment_status_bulk(tweet_url, checking_users),
+            cacheable=False,
+            priority='bulk'
+        )
+        
+        log_request(app_logger, request_id, 'comment_bulk', f"{tweet_url}:{len(checking_users)} users", start_time)
+        
+        return jsonify(create_response(
+            success=True,
+            action='comment_bulk',
+            result=result,
+            details=f"Comment status checked for {len(checking_users)} users"
+        ))
+    
+    except ScrapingError as e:
+        return handle_scraping_error(e, request_id, 'comment_bulk')
+    
+    except Exception as e:
+        log_error(app_logger, request_id, e, 'comment_bulk')
+        return jsonify(create_response(
+            success=False,
+            action='comment_bulk',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
 @app.route('/api/session/info', methods=['GET'])
 @require_api_key
 def get_session_info():
     """セッション情報を取得"""
     try:
         session_info = auth_manager.get_session_info()
+        session_info['keeper'] = session_keeper.get_status()
         
         return jsonify(create_response(
             success=True,
@@ -412,6 +941,480 @@ def refresh_session():
             }
         )), 500
 
+def handle_campaign_error(e, action):
+    """キャンペーン関連エラーのハンドリング"""
+    status = 404 if isinstance(e, CampaignNotFoundError) else 400
+    return jsonify(create_response(
+        success=False,
+        action=action,
+        error={
+            'code': 'CAMPAIGN_NOT_FOUND' if status == 404 else 'INVALID_REQUEST',
+            'message': str(e)
+        }
+    )), status
+
+@app.route('/api/campaigns', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def register_campaign():
+    """キャンペーン登録エンドポイント"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(create_response(
+                success=False,
+                action='campaign_register',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': 'JSON data is required'
+                }
+            )), 400
+        
+        campaign = campaign_registry.register(
+            data.get('tweet_url'),
+            account=data.get('account'),
+            actions=data.get('actions'),
+            name=data.get('name'),
+            expires_in_hours=data.get('expires_in_hours')
+        )
+        
+        return jsonify(create_response(
+            success=True,
+            action='campaign_register',
+            result=campaign_registry.to_response(campaign),
+            details=f"Campaign {campaign['id']} registered"
+        )), 201
+    
+    except CampaignError as e:
+        return handle_campaign_error(e, 'campaign_register')
+    
+    except Exception as e:
+        app_logger.error(f"Campaign registration failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            action='campaign_register',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
+@app.route('/api/campaigns', methods=['GET'])
+@require_api_key
+def list_campaigns():
+    """キャンペーン一覧取得エンドポイント"""
+    try:
+        campaigns = [campaign_registry.to_response(campaign) for campaign in campaign_registry.list_campaigns()]
+        
+        return jsonify(create_response(
+            success=True,
+            result={'campaigns': campaigns, 'count': len(campaigns)},
+            details='Campaigns retrieved successfully'
+        ))
+    
+    except Exception as e:
+        app_logger.error(f"Campaign list failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
+@app.route('/api/campaigns/<campaign_id>', methods=['GET', 'DELETE'])
+@require_api_key
+def manage_campaign(campaign_id):
+    """キャンペーン取得・削除エンドポイント"""
+    try:
+        if request.method == 'DELETE':
+            campaign_registry.delete(campaign_id)
+            return jsonify(create_response(
+                success=True,
+                action='campaign_delete',
+                details=f"Campaign {campaign_id} deleted"
+            ))
+        
+        return jsonify(create_response(
+            success=True,
+            result=campaign_registry.to_response(campaign_registry.get(campaign_id)),
+            details='Campaign retrieved successfully'
+        ))
+    
+    except CampaignError as e:
+        return handle_campaign_error(e, 'campaign')
+    
+    except Exception as e:
+        app_logger.error(f"Campaign request failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
+@app.route('/api/campaigns/<campaign_id>/verify', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def verify_campaign(campaign_id):
+    """キャンペーン参加確認エンドポイント（事前取得済みの一覧から回答）"""
+    request_id = str(uuid.uuid4())
+    start_time = datetime.utcnow()
+    started = time.time()
+    
+    try:
+        data = request.get_json()
+        users = (data.get('users') or ([data['user']] if data.get('user') else [])) if data else []
+        if not isinstance(users, list) or not users:
+            return jsonify(create_response(
+                success=False,
+                action='campaign_verify',
+                error={
+                    'code': 'MISSING_PARAMETER',
+                    'message': 'user or users is required'
+                }
+            )), 400
+        
+        if len(users) > Config.BULK_MAX_USERS:
+            return jsonify(create_response(
+                success=False,
+                action='campaign_verify',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': f"users must contain at most {Config.BULK_MAX_USERS} entries"
+                }
+            )), 400
+        
+        results, indexes = campaign_registry.verify(campaign_id, users)
+        
+        # 確認数は次回の一覧取得までの間隔の調整に使われる
+        history_store.record(
+            campaign_registry.VERIFY_ACTION, campaign_id, True,
+            result={'users': len(results)},
+            duration=time.time() - started,
+            request_id=request_id,
+            cacheable=False
+        )
+        log_request(app_logger, request_id, 'campaign_verify', f"{campaign_id}:{len(users)} users", start_time)
+        
+        return jsonify(create_response(
+            success=True,
+            action='campaign_verify',
+            result={
+                'campaign_id': campaign_id,
+                'results': results,
+                'indexes': indexes,
+                'counts': campaign_registry.to_response(campaign_registry.get(campaign_id))['counts']
+            },
+            details=f"Campaign verified for {len(results)} users"
+        ))
+    
+    except CampaignError as e:
+        return handle_campaign_error(e, 'campaign_verify')
+    
+    except Exception as e:
+        log_error(app_logger, request_id, e, 'campaign_verify')
+        return jsonify(create_response(
+            success=False,
+            action='campaign_verify',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
+def handle_watch_error(e, action):
+    """監視関連エラーのハンドリング"""
+    return jsonify(create_response(
+        success=False,
+        action=action,
+        error={
+            'code': 'INVALID_REQUEST',
+            'message': str(e)
+        }
+    )), 400
+
+@app.route('/api/watches', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def subscribe_watches():
+    """監視登録エンドポイント"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify(create_response(
+                success=False,
+                action='watch_subscribe',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': 'JSON data is required'
+                }
+            )), 400
+        
+        watches = watch_manager.subscribe(
+            get_client_identifier(),
+            data.get('watches'),
+            webhook_url=data.get('webhook_url'),
+            interval=data.get('interval')
+        )
+        
+        return jsonify(create_response(
+            success=True,
+            action='watch_subscribe',
+            result={'watches': watches, 'count': len(watches)},
+            details=f"{len(watches)} watches subscribed"
+        )), 201
+    
+    except WatchError as e:
+        return handle_watch_error(e, 'watch_subscribe')
+    
+    except Exception as e:
+        app_logger.error(f"Watch subscription failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            action='watch_subscribe',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
+@app.route('/api/watches', methods=['GET'])
+@require_api_key
+def list_watches():
+    """監視一覧取得エンドポイント"""
+    try:
+        watches = watch_manager.list_watches(get_client_identifier())
+        
+        return jsonify(create_response(
+            success=True,
+            result={'watches': watches, 'count': len(watches)},
+            details='Watches retrieved successfully'
+        ))
+    
+    except Exception as e:
+        app_logger.error(f"Watch list failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
+@app.route('/api/watches/<int:watch_id>', methods=['DELETE'])
+@require_api_key
+def unsubscribe_watch(watch_id):
+    """監視解除エンドポイント"""
+    try:
+        if not watch_manager.unsubscribe(get_client_identifier(), watch_id):
+            return jsonify(create_response(
+                success=False,
+                action='watch_unsubscribe',
+                error={
+                    'code': 'WATCH_NOT_FOUND',
+                    'message': f"Watch not found: {watch_id}"
+                }
+            )), 404
+        
+        return jsonify(create_response(
+            success=True,
+            action='watch_unsubscribe',
+            details=f"Watch {watch_id} unsubscribed"
+        ))
+    
+    except Exception as e:
+        app_logger.error(f"Watch unsubscription failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            action='watch_unsubscribe',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
+@app.route('/api/watches/changes', methods=['GET'])
+@require_api_key
+def get_watch_changes():
+    """状態変更フィード取得エンドポイント（since_id 以降の変更を古い順に返す）"""
+    try:
+        since_id = int(request.args.get('since_id', 0))
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        
+        changes = watch_manager.get_changes(get_client_identifier(), since_id=since_id, limit=limit)
+        
+        return jsonify(create_response(
+            success=True,
+            result={
+                'changes': changes,
+                'count': len(changes),
+                'next_since_id': changes[-1]['id'] if changes else since_id
+            },
+            details='Watch changes retrieved successfully'
+        ))
+    
+    except ValueError as e:
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'INVALID_REQUEST',
+                'message': str(e)
+            }
+        )), 400
+    
+    except Exception as e:
+        app_logger.error(f"Watch change feed failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
+@app.route('/api/ledger', methods=['GET'])
+@require_api_key
+def get_ledger_status():
+    """エンゲージメント台帳の状態を取得"""
+    try:
+        return jsonify(create_response(
+            success=True,
+            result=engagement_ledger.get_status(),
+            details='Ledger status retrieved successfully'
+        ))
+        
+    except Exception as e:
+        app_logger.error(f"Ledger status error: {e}")
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'LEDGER_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
+@app.route('/api/ledger/sync', methods=['POST'])
+@require_api_key
+@rate_limit_decorator(get_client_identifier)
+def sync_ledger():
+    """エンゲージメント台帳同期エンドポイント"""
+    request_id = str(uuid.uuid4())
+    start_time = datetime.utcnow()
+    
+    try:
+        if not engagement_ledger.enabled:
+            return jsonify(create_response(
+                success=False,
+                action='ledger_sync',
+                error={
+                    'code': 'LEDGER_DISABLED',
+                    'message': 'Engagement ledger is disabled (set LEDGER_ENABLED=True)'
+                }
+            )), 400
+        
+        data = request.get_json(silent=True) or {}
+        kinds = data.get('kinds') or list(engagement_ledger.KINDS)
+        if not isinstance(kinds, list) or any(kind not in engagement_ledger.KINDS for kind in kinds):
+            return jsonify(create_response(
+                success=False,
+                action='ledger_sync',
+                error={
+                    'code': 'INVALID_REQUEST',
+                    'message': f"kinds must be a list of {', '.join(engagement_ledger.KINDS)}"
+                }
+            )), 400
+        
+        # full=true の場合は一覧全体を取得し直す
+        result = engagement_ledger.sync(kinds, full=bool(data.get('full', False)))
+        if result is None:
+            return jsonify(create_response(
+                success=False,
+                action='ledger_sync',
+                error={
+                    'code': 'SYNC_IN_PROGRESS',
+                    'message': 'Ledger sync is already running in another worker',
+                    'retry_after': 60
+                }
+            )), 409
+        
+        log_request(app_logger, request_id, 'ledger_sync', ','.join(kinds), start_time)
+        
+        return jsonify(create_response(
+            success=True,
+            action='ledger_sync',
+            result=result,
+            details=f"Ledger synced: {', '.join(kinds)}"
+        ))
+    
+    except ScrapingError as e:
+        return handle_scraping_error(e, request_id, 'ledger_sync')
+    
+    except Exception as e:
+        log_error(app_logger, request_id, e, 'ledger_sync')
+        return jsonify(create_response(
+            success=False,
+            action='ledger_sync',
+            error={
+                'code': 'INTERNAL_ERROR',
+                'message': 'An unexpected error occurred'
+            }
+        )), 500
+
+@app.route('/api/history', methods=['GET'])
+@require_api_key
+def get_history():
+    """確認履歴取得エンドポイント"""
+    try:
+        action = request.args.get('action')
+        target = request.args.get('target')
+        if target and action:
+            target = normalize_target(action, target)
+        
+        # since はUTCのISO 8601形式（例: 2025-01-08T10:00:00Z）
+        since = request.args.get('since')
+        if since:
+            since = datetime.fromisoformat(since.rstrip('Z')).replace(tzinfo=timezone.utc).timestamp()
+        
+        success = request.args.get('success')
+        if success is not None:
+            success = success.lower() == 'true'
+        
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        
+        entries = history_store.query(action=action, target=target, since=since, success=success, limit=limit)
+        
+        return jsonify(create_response(
+            success=True,
+            result={
+                'entries': entries,
+                'count': len(entries),
+                'store': history_store.get_stats(),
+                'cache': result_cache.get_stats()
+            },
+            details='History retrieved successfully'
+        ))
+    
+    except ValueError as e:
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'INVALID_REQUEST',
+                'message': str(e)
+            }
+        )), 400
+    
+    except Exception as e:
+        app_logger.error(f"History retrieval failed: {e}")
+        return jsonify(create_response(
+            success=False,
+            error={
+                'code': 'HISTORY_ERROR',
+                'message': str(e)
+            }
+        )), 500
+
 @app.route('/api/stats', methods=['GET'])
 @require_api_key
 def get_stats():
@@ -419,6 +1422,11 @@ def get_stats():
     try:
         client_id = get_client_identifier()
         stats = rate_limiter.get_stats(client_id)
+        stats['scheduler'] = fair_scheduler.get_stats()
+        stats['hedging'] = hedged_executor.get_stats()
+        stats['concurrency'] = concurrency_limiter.get_status()
+        stats['pipeline'] = pipelined_executor.get_stats()
+        stats['resource_blocking'] = resource_blocker.get_stats()
         
         return jsonify(create_response(
             success=True,
@@ -472,6 +1480,7 @@ def internal_error(error):
 
 if __name__ == '__main__':
     # 開発環境での実行
+    start_background_services()
     app.run(
         host='0.0.0.0',
         port=5000,
@@ -15,8 +15,8 @@ class Config:
     MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '5'))
     
     # X.com設定
-    X_LOGIN_URL = 'https://x.com/i/flow/login'
-    X_BASE_URL = 'https://x.com'
+    X_BASE_URL = os.getenv('X_BASE_URL', 'https://x.com').rstrip('/')  # 検証用のローカルサーバーにも切り替え可能
+    X_LOGIN_URL = f"{X_BASE_URL}/i/flow/login"
     COOKIE_FILE_PATH = os.path.join(os.path.dirname(__file__), 'cookies', 'x_cookies.json')
     
     # X.com自動ログイン設定
@@ -26,12 +26,155 @@ class Config:
     AUTO_LOGIN_ENABLED = os.getenv('AUTO_LOGIN_ENABLED', 'True').lower() == 'true'
     LOGIN_RETRY_COUNT = int(os.getenv('LOGIN_RETRY_COUNT', '3'))
     LOGIN_TIMEOUT = int(os.getenv('LOGIN_TIMEOUT', '30'))
+    LOGIN_LOCK_TTL = int(os.getenv('LOGIN_LOCK_TTL', '180'))  # ログインロックの最大保持時間（秒）
+    LOGIN_WAIT_TIMEOUT = int(os.getenv('LOGIN_WAIT_TIMEOUT', '120'))  # 他ワーカーのログイン待機時間（秒）
     
     # スクレイピング設定
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '10'))
     PAGE_LOAD_TIMEOUT = int(os.getenv('PAGE_LOAD_TIMEOUT', '15'))
     RETRY_COUNT = int(os.getenv('RETRY_COUNT', '3'))
-    RETRY_DELAY = int(os.getenv('RETRY_DELAY', '2'))
+    RETRY_DELAY = int(os.getenv('RETRY_DELAY', '2'))  # 再試行の初回待機時間（秒、以降は倍々でジッター付き）
+    RETRY_MAX_DELAY = int(os.getenv('RETRY_MAX_DELAY', '30'))  # 再試行の待機時間の上限（秒）
+    RETRY_THROTTLE_DELAY = int(os.getenv('RETRY_THROTTLE_DELAY', '10'))  # X側の制限を受けた場合の初回待機時間（秒）
+    
+    # リクエストの処理期限設定（X-Request-Deadline ヘッダーで指定）
+    REQUEST_DEADLINE_DEFAULT = float(os.getenv('REQUEST_DEADLINE_DEFAULT', '0'))  # ヘッダーが無い場合の期限（秒、0で無期限）
+    REQUEST_DEADLINE_MAX = float(os.getenv('REQUEST_DEADLINE_MAX', '300'))  # 指定できる期限の上限（秒）
+    DEADLINE_RESERVE = float(os.getenv('DEADLINE_RESERVE', '3'))  # 残りがこの秒数を切ったら省略可能な待機を省く
+    
+    # 一括確認設定
+    BULK_MAX_USERS = int(os.getenv('BULK_MAX_USERS', '1000'))  # 1リクエストで確認できる最大ユーザー数
+    REPLY_INDEX_TTL = int(os.getenv('REPLY_INDEX_TTL', '600'))  # 返信インデックスの有効期間（秒）
+    REPLY_INDEX_MAX_SCROLLS = int(os.getenv('REPLY_INDEX_MAX_SCROLLS', '20'))  # 1回のクロールで新規取得するスクロール数
+    
+    # ユーザー一覧（リポストしたユーザー等）のクロール設定
+    USER_LIST_MAX_SCROLLS = int(os.getenv('USER_LIST_MAX_SCROLLS', '50'))  # 1回のクロールの最大スクロール数
+    USER_LIST_OVERLAP = int(os.getenv('USER_LIST_OVERLAP', '20'))  # 差分取得時に既知ユーザーが何件続いたら終了するか
+    REPOST_INDEX_TTL = int(os.getenv('REPOST_INDEX_TTL', '3600'))  # リポストユーザー一覧の保持期間（秒）
+    REPOST_INDEX_REFRESH = int(os.getenv('REPOST_INDEX_REFRESH', '120'))  # 最新分を再取得する間隔（秒）
+    REPOST_INDEX_WAIT = int(os.getenv('REPOST_INDEX_WAIT', '30'))  # 他ワーカーの初回クロール完了を待つ時間（秒）
+    
+    # フォロワーインデックス設定
+    INDEX_DIR = os.getenv('INDEX_DIR') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'indexes')
+    FOLLOWER_INDEX_REFRESH = int(os.getenv('FOLLOWER_INDEX_REFRESH', '900'))  # 最新分を再取得する間隔（秒）
+    FOLLOWER_INDEX_MAX_SCROLLS = int(os.getenv('FOLLOWER_INDEX_MAX_SCROLLS', '500'))  # 初回クロールの最大スクロール数
+    FOLLOWER_INDEX_WAIT = int(os.getenv('FOLLOWER_INDEX_WAIT', '30'))  # 他ワーカーの初回クロール完了を待つ時間（秒）
+    INDEX_BLOOM_BITS = int(os.getenv('INDEX_BLOOM_BITS', '0'))  # Bloomフィルターの1ユーザーあたりのビット数（0で無効）
+    
+    # エンゲージメント台帳設定（ログイン中アカウントのフォロー中・いいね・リポスト一覧を同期して確認に利用）
+    LEDGER_ENABLED = os.getenv('LEDGER_ENABLED', 'False').lower() == 'true'
+    LEDGER_ACCOUNT = os.getenv('LEDGER_ACCOUNT', '')  # ログイン中アカウントのユーザー名（空の場合は自動検出）
+    LEDGER_SYNC_INTERVAL = int(os.getenv('LEDGER_SYNC_INTERVAL', '300'))  # 差分同期の間隔（秒）
+    LEDGER_MAX_AGE = int(os.getenv('LEDGER_MAX_AGE', '900'))  # 台帳で回答する最終同期からの最大経過時間（秒）
+    LEDGER_REBUILD_INTERVAL = int(os.getenv('LEDGER_REBUILD_INTERVAL', '86400'))  # 一覧全体を取得し直す間隔（秒）
+    LEDGER_MAX_SCROLLS = int(os.getenv('LEDGER_MAX_SCROLLS', '200'))  # 全体取得時の最大スクロール数
+    
+    # 確認履歴設定（SQLite）
+    HISTORY_ENABLED = os.getenv('HISTORY_ENABLED', 'True').lower() == 'true'
+    HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'history.db')
+    HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', '100'))  # 1回の書き込みの最大件数
+    HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', '1.0'))  # まとめて書き込むまでの最大待機時間（秒）
+    HISTORY_QUEUE_SIZE = int(os.getenv('HISTORY_QUEUE_SIZE', '10000'))  # 書き込み待ちの上限（超過分は破棄）
+    HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', '30'))  # 保存期間（日、0で無期限）
+    
+    # 確認結果キャッシュ設定（0で無効）
+    RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', '0'))  # 同じ確認に結果を再利用する期間（秒）
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '10000'))
+    
+    # キャンペーン事前確認設定
+    CAMPAIGN_SCHEDULER_ENABLED = os.getenv('CAMPAIGN_SCHEDULER_ENABLED', 'True').lower() == 'true'
+    CAMPAIGN_TICK_INTERVAL = int(os.getenv('CAMPAIGN_TICK_INTERVAL', '30'))  # 取得時刻の確認間隔（秒）
+    CAMPAIGN_MIN_INTERVAL = int(os.getenv('CAMPAIGN_MIN_INTERVAL', '60'))  # 一覧を取得し直す最短間隔（秒）
+    CAMPAIGN_MAX_INTERVAL = int(os.getenv('CAMPAIGN_MAX_INTERVAL', '1800'))  # 確認が無い場合の取得間隔（秒）
+    CAMPAIGN_CHECKS_PER_REFRESH = int(os.getenv('CAMPAIGN_CHECKS_PER_REFRESH', '100'))  # 何件の確認ごとに取得し直すか
+    CAMPAIGN_DEMAND_WINDOW = int(os.getenv('CAMPAIGN_DEMAND_WINDOW', '600'))  # 確認数を数える期間（秒）
+    CAMPAIGN_REPLY_MAX_SCROLLS = int(os.getenv('CAMPAIGN_REPLY_MAX_SCROLLS', '50'))  # 返信一覧の最大スクロール数
+    CAMPAIGN_DEFAULT_TTL_HOURS = int(os.getenv('CAMPAIGN_DEFAULT_TTL_HOURS', '72'))  # 登録の有効期間（時間）
+    CAMPAIGN_MAX_TTL_HOURS = int(os.getenv('CAMPAIGN_MAX_TTL_HOURS', '720'))  # 指定できる有効期間の上限（時間）
+    
+    # 監視（定期再確認と変更通知）設定
+    WATCH_ENABLED = os.getenv('WATCH_ENABLED', 'True').lower() == 'true'
+    WATCH_DB_PATH = os.getenv('WATCH_DB_PATH') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'watches.db')
+    WATCH_TICK_INTERVAL = int(os.getenv('WATCH_TICK_INTERVAL', '60'))  # 再確認時刻の確認間隔（秒）
+    WATCH_BATCH_SIZE = int(os.getenv('WATCH_BATCH_SIZE', '200'))  # 1回にまとめて再確認する監視の最大数
+    WATCH_JOBS_PER_SLOT = int(os.getenv('WATCH_JOBS_PER_SLOT', '10'))  # スクレイピング枠を返却するまでに確認するページ数
+    WATCH_DEFAULT_INTERVAL = int(os.getenv('WATCH_DEFAULT_INTERVAL', '3600'))  # 再確認の間隔（秒）
+    WATCH_MIN_INTERVAL = int(os.getenv('WATCH_MIN_INTERVAL', '300'))  # 指定できる最短の再確認間隔（秒）
+    WATCH_MAX_PER_REQUEST = int(os.getenv('WATCH_MAX_PER_REQUEST', '500'))  # 1回の登録で指定できる監視の最大数
+    WATCH_WEBHOOK_TIMEOUT = int(os.getenv('WATCH_WEBHOOK_TIMEOUT', '10'))  # Webhook送信のタイムアウト（秒）
+    WATCH_WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WATCH_WEBHOOK_MAX_ATTEMPTS', '5'))  # 送信を諦めるまでの試行回数
+    WATCH_WEBHOOK_SECRET = os.getenv('WATCH_WEBHOOK_SECRET', '')  # 設定するとWebhookにHMAC-SHA256署名を付ける
+    WATCH_WEBHOOK_ALLOWED_HOSTS = os.getenv('WATCH_WEBHOOK_ALLOWED_HOSTS', '')  # 内部ネットワークでも送信を許可するホスト（カンマ区切り）
+    
+    # コメント検索方法（auto: 検索→スクロールの順, search: 検索のみ, scroll: スクロールのみ）
+    COMMENT_LOOKUP_STRATEGY = os.getenv('COMMENT_LOOKUP_STRATEGY', 'auto')
+    SEARCH_RESULT_TIMEOUT = int(os.getenv('SEARCH_RESULT_TIMEOUT', '8'))  # 検索結果の表示待機時間（秒）
+    
+    # ブラウザプール設定（0で無効: リクエストごとにブラウザを起動）
+    BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '0'))
+    BROWSER_POOL_WAIT = int(os.getenv('BROWSER_POOL_WAIT', '10'))  # タブ取得の待機時間（秒）
+    TAB_REUSE_MAX_AGE = int(os.getenv('TAB_REUSE_MAX_AGE', '30'))  # 表示中のページを再読み込みせずに使う期限（秒、0で無効）
+    
+    # アプリ内のルーターによるページ移動（X.comを表示中のタブでのみ、描画されなければ読み込み直す）
+    SPA_NAVIGATION_ENABLED = os.getenv('SPA_NAVIGATION_ENABLED', 'False').lower() == 'true'
+    SPA_NAVIGATION_TIMEOUT = int(os.getenv('SPA_NAVIGATION_TIMEOUT', '5'))  # 移動先の描画待機時間（秒）
+    
+    # まとめて行う確認で次のページを先読みするタブ数（1で無効、ブラウザプールとページの再利用が必要）
+    PIPELINE_DEPTH = int(os.getenv('PIPELINE_DEPTH', '2'))
+    
+    # ブラウザのプロファイル（standard: 通常, render_light: 描画の負荷を抑える）
+    BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'standard')
+    RENDER_LIGHT_WINDOW_SIZE = os.getenv('RENDER_LIGHT_WINDOW_SIZE', '800,900')  # render_light のウィンドウサイズ（幅,高さ）
+    
+    # 確認に不要なリソースのブロック設定
+    RESOURCE_BLOCKING_ENABLED = os.getenv('RESOURCE_BLOCKING_ENABLED', 'False').lower() == 'true'
+    RESOURCE_BLOCK_CATEGORIES = os.getenv('RESOURCE_BLOCK_CATEGORIES', 'media,font,tracking,xhr')  # ブロックするカテゴリ
+    RESOURCE_BLOCK_PATTERNS = os.getenv('RESOURCE_BLOCK_PATTERNS', '')  # 追加でブロックするURLパターン（カンマ区切り）
+    RESOURCE_ALLOWLISTS = os.getenv('RESOURCE_ALLOWLISTS', '')  # チェッカーごとに許可するカテゴリ・URLパターン（例: CommentChecker:media）
+    RESOURCE_BLOCK_BASELINE_RATE = float(os.getenv('RESOURCE_BLOCK_BASELINE_RATE', '0'))  # 比較用にブロックしない読み込みの割合
+    RESOURCE_STATS_WINDOW = int(os.getenv('RESOURCE_STATS_WINDOW', '200'))  # 転送量・所要時間の集計に使う直近の件数
+    
+    # スクレイピング枠の割り当て設定（ワーカーごとの同時実行数、0で無制限）
+    SCHEDULER_CONCURRENCY = int(os.getenv('SCHEDULER_CONCURRENCY', str(max(BROWSER_POOL_SIZE, 1))))
+    SCHEDULER_MAX_WAIT = int(os.getenv('SCHEDULER_MAX_WAIT', '20'))  # 枠の空き待ちの上限（秒）
+    SCHEDULER_BULK_MAX_WAIT = int(os.getenv('SCHEDULER_BULK_MAX_WAIT', '60'))  # bulk の要求を優先扱いにするまでの待ち時間（秒）
+    SCHEDULER_CLIENT_WEIGHTS = os.getenv('SCHEDULER_CLIENT_WEIGHTS', '')  # APIキーごとの重み（例: key1:4,key2:1）
+    SCHEDULER_MAX_QUEUE = int(os.getenv('SCHEDULER_MAX_QUEUE', '16'))  # 待機できる要求の最大数（超えると即座に503）
+    SCHEDULER_LATENCY_WINDOW = int(os.getenv('SCHEDULER_LATENCY_WINDOW', '50'))  # 処理時間の推定に使う直近の件数
+    SCHEDULER_INTERACTIVE_RESERVE = int(os.getenv('SCHEDULER_INTERACTIVE_RESERVE', '1'))  # バックグラウンド処理に割り当てずに残す枠の数
+    
+    # 同時実行数の自動調整設定（AIMD、有効時は SCHEDULER_CONCURRENCY を初期値として増減）
+    ADAPTIVE_CONCURRENCY_ENABLED = os.getenv('ADAPTIVE_CONCURRENCY_ENABLED', 'False').lower() == 'true'
+    CONCURRENCY_MIN = int(os.getenv('CONCURRENCY_MIN', '1'))
+    CONCURRENCY_MAX = int(os.getenv('CONCURRENCY_MAX', str(max(SCHEDULER_CONCURRENCY, 1) * 2)))
+    CONCURRENCY_LATENCY_TARGET = float(os.getenv('CONCURRENCY_LATENCY_TARGET', '15'))  # 増やす条件とする所要時間のp90（秒）
+    CONCURRENCY_BACKOFF = float(os.getenv('CONCURRENCY_BACKOFF', '0.5'))  # 減らす際の倍率
+    CONCURRENCY_COOLDOWN = float(os.getenv('CONCURRENCY_COOLDOWN', '30'))  # 減らした後に再度減らすまでの間隔（秒）
+    CONCURRENCY_MIN_FREE_MEMORY = float(os.getenv('CONCURRENCY_MIN_FREE_MEMORY', '10'))  # 利用可能メモリがこの割合（%）を下回ったら減らす
+    CONCURRENCY_HISTORY_SIZE = int(os.getenv('CONCURRENCY_HISTORY_SIZE', '100'))  # 保持する調整履歴の件数
+    
+    # ヘッジ設定（長引いている確認を空き枠で並行実行し、先に得られた結果を使う）
+    HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'False').lower() == 'true'
+    HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '90'))  # 並行実行を始める所要時間のパーセンタイル
+    HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))  # パーセンタイルの算出に必要な件数
+    HEDGE_LATENCY_WINDOW = int(os.getenv('HEDGE_LATENCY_WINDOW', '200'))  # アクションごとに記録する直近の件数
+    HEDGE_MAX_FRACTION = float(os.getenv('HEDGE_MAX_FRACTION', '0.25'))  # 並行実行に使える枠の割合
+    
+    # サーキットブレーカー設定（X.comの障害時にブラウザを起動せず即座に失敗させる）
+    CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'True').lower() == 'true'
+    CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '60'))  # 失敗を数える期間（秒）
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))  # 遷移失敗・レート制限・ログイン失敗のしきい値
+    CIRCUIT_NOT_FOUND_THRESHOLD = int(os.getenv('CIRCUIT_NOT_FOUND_THRESHOLD', '20'))  # 要素が見つからない失敗のしきい値
+    CIRCUIT_OPEN_SECONDS = int(os.getenv('CIRCUIT_OPEN_SECONDS', '60'))  # 開いてから試行を通すまでの時間（秒）
+    CIRCUIT_MAX_OPEN_SECONDS = int(os.getenv('CIRCUIT_MAX_OPEN_SECONDS', '900'))  # 試行の失敗で延長する上限（秒）
+    CIRCUIT_PROBE_TIMEOUT = int(os.getenv('CIRCUIT_PROBE_TIMEOUT', '120'))  # 試行の結果を待つ上限（秒）
+    CIRCUIT_STALE_MAX_AGE = int(os.getenv('CIRCUIT_STALE_MAX_AGE', '3600'))  # 開いている間に返す過去の結果の最大経過時間（秒、0で無効）
+    
+    # セッション維持設定（バックグラウンドでの事前更新）
+    SESSION_KEEPER_ENABLED = os.getenv('SESSION_KEEPER_ENABLED', 'True').lower() == 'true'
+    SESSION_KEEPER_INTERVAL = int(os.getenv('SESSION_KEEPER_INTERVAL', '900'))  # 確認間隔（秒）
+    SESSION_REFRESH_MARGIN = int(os.getenv('SESSION_REFRESH_MARGIN', '7200'))  # 有効期限の何秒前に更新するか
+    SESSION_PROBE_URL = f"{X_BASE_URL}/home"
     
     # ログ設定
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -46,4 +189,7 @@ class Config:
     # Redis設定（レート制限用）
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     REDIS_ENABLED = os.getenv('REDIS_ENABLED', 'False').lower() == 'true'
+    
+    # ワーカー間ロック設定（Redis無効時はファイルロックを使用）
+    LOCK_DIR = os.getenv('LOCK_DIR') or os.path.join(os.path.dirname(__file__), 'locks')
 
@@ -5,8 +5,10 @@ import multiprocessing
 
 # サーバー設定
 bind = "0.0.0.0:5000"
-workers = min(multiprocessing.cpu_count() * 2 + 1, 4)  # 最大4ワーカー
-worker_class = "sync"
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(multiprocessing.cpu_count() * 2 + 1, 4))))  # 既定は最大4ワーカー
+# スクレイピング枠の空き待ちをアプリ内の公平キューで行うため、ワーカーはスレッドで複数のリクエストを受け付ける
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
@@ -53,6 +55,10 @@ def pre_fork(server, worker):
 def post_fork(server, worker):
     """ワーカーフォーク後の処理"""
     server.log.info("Worker spawned (pid: %s)", worker.pid)
+    
+    # バックグラウンドスレッドはフォーク後のワーカー内で開始する
+    from app import start_background_services
+    start_background_services()
 
 def worker_abort(worker):
     """ワーカー異常終了時の処理"""
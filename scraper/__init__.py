@@ -2,21 +2,61 @@
 X.com スクレイピング機能パッケージ
 """
 
-from .base_scraper import BaseScraper, ScrapingError, LoginRequiredError, ElementNotFoundError, RateLimitError
+from .base_scraper import (
+    BaseScraper, ScrapingError, LoginRequiredError, NavigationError, ElementNotFoundError, RateLimitError,
+    RequestAbortedError, DeadlineExceededError, ClientDisconnectedError, CapacityExceededError
+)
 from .follow_checker import FollowChecker
 from .like_checker import LikeChecker
 from .repost_checker import RepostChecker
 from .comment_checker import CommentChecker
+from .browser_pool import browser_pool
+from .retry_policy import RetryPolicy, classify_error
+from .scheduler import fair_scheduler
+from .hedging import hedged_executor
+from .concurrency_limiter import concurrency_limiter
+from .pipeline import PipelineJob, pipelined_executor
+from .resource_blocker import resource_blocker
+from .index_store import follower_index_store
+from .circuit_breaker import circuit_breaker, CircuitOpenError
+from .session_keeper import session_keeper
+from .engagement_ledger import engagement_ledger
+from .campaign_registry import campaign_registry, CampaignError, CampaignNotFoundError
+from .watch_manager import watch_manager, WatchError
 
 __all__ = [
     'BaseScraper',
     'ScrapingError',
     'LoginRequiredError', 
+    'NavigationError',
     'ElementNotFoundError',
     'RateLimitError',
+    'RequestAbortedError',
+    'DeadlineExceededError',
+    'ClientDisconnectedError',
+    'CapacityExceededError',
     'FollowChecker',
     'LikeChecker',
     'RepostChecker',
-    'CommentChecker'
+    'CommentChecker',
+    'browser_pool',
+    'RetryPolicy',
+    'classify_error',
+    'fair_scheduler',
+    'hedged_executor',
+    'concurrency_limiter',
+    'PipelineJob',
+    'pipelined_executor',
+    'resource_blocker',
+    'follower_index_store',
+    'circuit_breaker',
+    'CircuitOpenError',
+    'session_keeper',
+    'engagement_ledger',
+    'campaign_registry',
+    'CampaignError',
+    'CampaignNotFoundError',
+    'watch_manager',
+    'WatchError'
 ]
 
@@ -1,43 +1,250 @@
+import re
 import time
 import random
 from datetime import datetime
-from DrissionPage import ChromiumPage, ChromiumOptions
+from urllib.parse import urlsplit
+from functools import wraps
+from DrissionPage import ChromiumPage
 from config.config import Config
+from scraper.browser_pool import browser_pool, build_browser_options, prepare_page
+from scraper.retry_policy import navigation_retry, login_retry
+from scraper.resource_blocker import resource_blocker
 from utils.logger import app_logger
 from utils.auth_manager import auth_manager
+from utils.login_coordinator import login_coordinator
+
+def timed_stage(name):
+    """
+    メソッドの所要時間をステージ別に記録するデコレーター（入れ子の場合は両方に計上）
+    
+    ステージの開始前にリクエストの処理期限とクライアントの接続を確認する
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            self.check_budget(name)
+            started = time.time()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.stage_timings[name] = round(self.stage_timings.get(name, 0) + time.time() - started, 3)
+        return wrapper
+    return decorator
 
 class BaseScraper:
     """ベーススクレイパークラス"""
     
+    # ブロックせずに読み込むリソースのカテゴリまたはURLパターン（resource_blocker を参照）
+    RESOURCE_ALLOWLIST = ()
+    
+    # ユーザー一覧（UserCell）から未処理のユーザー名を表示順に抽出するスクリプト
+    COLLECT_USER_CELLS_JS = """
+    const usernames = [];
+    for (const cell of document.querySelectorAll('[data-testid="UserCell"]')) {
+        if (cell.dataset.xsaSeen) continue;
+        cell.dataset.xsaSeen = '1';
+        for (const link of cell.querySelectorAll('a[href^="/"]')) {
+            const match = link.getAttribute('href').match(/^\\/([A-Za-z0-9_]{1,15})$/);
+            if (match) {
+                usernames.push(match[1]);
+                break;
+            }
+        }
+    }
+    return usernames;
+    """
+    
+    NEW_USER_CELLS_JS = """
+    return document.querySelectorAll('[data-testid="UserCell"]:not([data-xsa-seen])').length > 0;
+    """
+    
+    # arguments[0]: trueの場合はリポスト（socialContextにリポスト表示があるもの）のみ
+    COLLECT_TWEET_IDS_JS = """
+    const repostsOnly = arguments[0];
+    const ids = [];
+    for (const article of document.querySelectorAll('article[data-testid="tweet"]')) {
+        if (article.dataset.xsaSeen) continue;
+        article.dataset.xsaSeen = '1';
+        if (repostsOnly) {
+            const context = article.querySelector('[data-testid="socialContext"]');
+            if (!context || !/repost|retweet|リポスト/i.test(context.textContent)) continue;
+        }
+        const time = article.querySelector('time');
+        const link = time && time.closest('a');
+        const match = link && link.getAttribute('href').match(/\\/status\\/(\\d+)/);
+        if (match) ids.push(match[1]);
+    }
+    return ids;
+    """
+    
+    # X.comのレート制限の検出（ページ自体・表示に使うAPIの429応答・案内文のどれで検出したか、無ければnull）
+    # 投稿・一覧が表示されていないページでのみ、レート制限の案内文を確認する
+    RATE_LIMIT_JS = """
+    const navigation = performance.getEntriesByType('navigation')[0];
+    if (navigation && navigation.responseStatus === 429) return 'page';
+    for (const entry of performance.getEntriesByType('resource')) {
+        if (entry.responseStatus === 429 && /\\/i\\/api\\/|\\/\\/api\\.(x|twitter)\\.com\\//.test(entry.name)) return 'api';
+    }
+    if (document.body && !document.querySelector('article, [data-testid="cellInnerDiv"]')) {
+        const text = document.body.textContent.slice(0, 20000);
+        if (/rate limit exceeded|too many requests|レート制限/i.test(text)) return 'message';
+    }
+    return null;
+    """
+    
+    # 再利用するページの処理済みの印を消して先頭に戻すスクリプト
+    RESET_PAGE_JS = """
+    for (const element of document.querySelectorAll('[data-xsa-seen]')) {
+        delete element.dataset.xsaSeen;
+    }
+    window.scrollTo(0, 0);
+    """
+    
+    # 表示中の要素に古い印を付けてから、アプリ内のルーターでページを切り替えるスクリプト
+    # arguments[0]: 移動先のパス
+    SPA_NAVIGATE_JS = """
+    const column = document.querySelector('[data-testid="primaryColumn"]');
+    if (!column) {
+        return false;
+    }
+    for (const element of column.querySelectorAll('[data-testid="cellInnerDiv"], [data-testid="UserName"], [data-testid="emptyState"]')) {
+        element.dataset.xsaStale = '1';
+    }
+    history.pushState({}, '', arguments[0]);
+    window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));
+    return true;
+    """
+    
+    # 切り替え後のページが描画されたか（古い印の要素が消え、新しい要素が表示されている）
+    SPA_RENDERED_JS = """
+    const column = document.querySelector('[data-testid="primaryColumn"]');
+    if (!column || column.querySelector('[data-xsa-stale]')) {
+        return false;
+    }
+    return !!column.querySelector('[data-testid="cellInnerDiv"], [data-testid="UserName"], [data-testid="emptyState"]');
+    """
+    
+    NEW_TWEETS_JS = """
+    return document.querySelectorAll('article[data-testid="tweet"]:not([data-xsa-seen])').length > 0;
+    """
+    
     def __init__(self):
-        self.page = None
+        self._page = None
         self.is_logged_in = False
-        self.setup_browser()
+        self.login_pending_verification = False
+        self.credential_login_attempted = False
+        self.pooled_tab = None
+        self.preferred_url = None
+        self.blocked_patterns = None
+        self.stage_timings = {}
+        # リクエストの処理期限（time.monotonic() 基準、未設定ならNone）
+        self.deadline = None
+        # クライアントが切断していればTrueを返す関数（未設定ならNone）
+        self.is_cancelled = None
+        self.cancelled = False
+        self.aborted = False
+    
+    @property
+    def navigated(self):
+        """ページを開いたか（台帳・インデックス・キャッシュだけで回答した場合はFalse）"""
+        return 'navigate' in self.stage_timings
+    
+    def remaining_time(self):
+        """処理期限までの残り秒数（期限が無ければNone）"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+    
+    def check_budget(self, stage):
+        """
+        処理を続けてよいか確認
+        
+        Raises:
+            RequestAbortedError: cancel() で取り消された場合
+            ClientDisconnectedError: クライアントが切断している場合
+            DeadlineExceededError: 処理期限を過ぎている場合
+        """
+        if self.cancelled:
+            self.aborted = True
+            raise RequestAbortedError(f"Cancelled before {stage}")
+        
+        if self.is_cancelled is not None and self.is_cancelled():
+            self.aborted = True
+            raise ClientDisconnectedError(f"Client disconnected before {stage}")
+        
+        remaining = self.remaining_time()
+        if remaining is not None and remaining <= 0:
+            self.aborted = True
+            raise DeadlineExceededError(f"Deadline exceeded before {stage} ({-remaining:.1f}s over)")
+    
+    def cancel(self):
+        """
+        処理を取り消す（他のスレッドから呼び出し、次のステージの開始時に中断する）
+        
+        読み込み中のページは止めて、読み込み完了の待機から早く抜けるようにする
+        """
+        self.cancelled = True
+        if self._page is not None:
+            try:
+                self._page.stop_loading()
+            except Exception as e:
+                app_logger.debug(f"Failed to stop loading on cancel: {e}")
+    
+    def prefer_url(self, url):
+        """これから開くページを指定（プールに同じページを表示中のタブがあれば優先して割り当てる）"""
+        self.preferred_url = url
+    
+    def bounded_timeout(self, timeout):
+        """待機のタイムアウトを処理期限までの残り時間に収める"""
+        remaining = self.remaining_time()
+        if remaining is None:
+            return timeout
+        return max(0.5, min(timeout, remaining))
+    
+    def optional_sleep(self, seconds):
+        """
+        省略可能な待機（人間らしい間隔・描画待ちの余裕）
+        
+        処理期限までの残りが待機時間 + DEADLINE_RESERVE 秒に満たない場合は待機しない
+        """
+        if self.cancelled:
+            return
+        
+        remaining = self.remaining_time()
+        if remaining is not None and remaining < seconds + Config.DEADLINE_RESERVE:
+            app_logger.debug(f"Skipped {seconds:.1f}s delay ({remaining:.1f}s left before deadline)")
+            return
+        time.sleep(seconds)
+    
+    @property
+    def page(self):
+        """ブラウザページ（初回アクセス時に起動、キャッシュで完結する場合は起動しない）"""
+        if self._page is None:
+            self.setup_browser()
+        return self._page
     
+    @page.setter
+    def page(self, value):
+        self._page = value
+    
+    @timed_stage('browser')
     def setup_browser(self):
         """ブラウザの初期設定"""
         try:
+            # プールが有効ならウォーム済みのタブを再利用
+            self.pooled_tab = browser_pool.acquire(timeout=Config.BROWSER_POOL_WAIT, url=self.preferred_url)
+            if self.pooled_tab:
+                self.page = self.pooled_tab.page
+                self.is_logged_in = browser_pool.session_ready
+                app_logger.info("Pooled browser tab acquired")
+                return
+            
             # Chromiumオプションの設定
-            options = ChromiumOptions()
-            options.headless(True)  # ヘッドレスモード
-            options.set_argument('--no-sandbox')
-            options.set_argument('--disable-dev-shm-usage')
-            options.set_argument('--disable-gpu')
-            options.set_argument('--disable-web-security')
-            options.set_argument('--disable-features=VizDisplayCompositor')
-            options.set_argument('--window-size=1920,1080')
-            
-            # User-Agentの設定
-            user_agents = [
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            ]
-            options.set_argument(f'--user-agent={random.choice(user_agents)}')
+            options = build_browser_options()
             
             # ページオブジェクトの作成
             self.page = ChromiumPage(addr_or_opts=options)
-            self.page.set.timeouts(Config.PAGE_LOAD_TIMEOUT)
+            prepare_page(self.page)
             
             app_logger.info("Browser setup completed")
             
@@ -45,39 +252,29 @@ class BaseScraper:
             app_logger.error(f"Failed to setup browser: {e}")
             raise
     
+    @timed_stage('login')
     def login_to_x(self):
         """X.comにログイン"""
         try:
+            # プールのタブが確認済みのセッションを持っていればそのまま利用
+            if self.page is not None and self.is_logged_in:
+                return True
+            
             # 既存のCookieを読み込み
             cookies = auth_manager.load_cookies()
             
             if cookies and auth_manager.is_session_valid():
-                # Cookieを使用してログイン状態を復元
-                self.page.get(Config.X_BASE_URL)
-                
-                for cookie in cookies:
-                    self.page.set.cookies(cookie)
-                
-                # ログイン状態を確認
-                self.page.refresh()
-                time.sleep(3)
-                
-                if self._check_login_status():
+                # 最初のナビゲーション前にCDPでCookieを一括設定
+                # （ログイン状態は最初の対象ページで確認する）
+                if self._preload_cookies(cookies):
                     self.is_logged_in = True
-                    auth_manager.update_session_validity()
-                    app_logger.info("Login restored from cookies")
+                    self.login_pending_verification = True
+                    app_logger.info("Cookies preloaded, login will be verified on first page")
                     return True
             
             # 自動ログインが有効な場合は実行
-            if Config.AUTO_LOGIN_ENABLED and Config.X_USERNAME and Config.X_PASSWORD:
-                app_logger.info("Attempting automatic login")
-                if self._perform_automatic_login():
-                    self.is_logged_in = True
-                    auth_manager.update_session_validity()
-                    # 新しいCookieを保存
-                    self.save_current_cookies()
-                    app_logger.info("Automatic login successful")
-                    return True
+            if self._login_with_credentials():
+                return True
             
             # 手動ログインが必要
             app_logger.warning("Manual login required - cookies not available or expired")
@@ -87,6 +284,120 @@ class BaseScraper:
             app_logger.error(f"Login failed: {e}")
             return False
     
+    def _login_with_credentials(self):
+        """設定された認証情報で自動ログイン（ワーカー間で1回に集約）"""
+        if not (Config.AUTO_LOGIN_ENABLED and Config.X_USERNAME and Config.X_PASSWORD):
+            return False
+        
+        # 1インスタンスにつき認証情報でのログインは1回まで
+        if self.credential_login_attempted:
+            return False
+        self.credential_login_attempted = True
+        
+        app_logger.info("Attempting automatic login")
+        success, performed = login_coordinator.run(self._perform_login_and_publish)
+        if not success:
+            return False
+        
+        if performed:
+            self.is_logged_in = True
+            self.login_pending_verification = False
+            app_logger.info("Automatic login successful")
+            return True
+        
+        # 他のワーカーが取得した新しいCookieを再利用
+        cookies = auth_manager.load_cookies()
+        if cookies and self._preload_cookies(cookies):
+            self.is_logged_in = True
+            self.login_pending_verification = True
+            app_logger.info("Reusing cookies published by another worker")
+            return True
+        
+        return False
+    
+    def _perform_login_and_publish(self):
+        """自動ログインを実行し、新しいCookieを共有ストアに保存"""
+        # 他のリクエストもこのログインの結果を待っているため、このリクエストの期限では中断しない
+        deadline, is_cancelled = self.deadline, self.is_cancelled
+        self.deadline = self.is_cancelled = None
+        try:
+            if not self._perform_automatic_login():
+                return False
+            
+            auth_manager.update_session_validity()
+            return self.save_current_cookies()
+        finally:
+            self.deadline, self.is_cancelled = deadline, is_cancelled
+    
+    def _preload_cookies(self, cookies):
+        """CDPのNetwork.setCookiesでCookieを一括設定"""
+        try:
+            cdp_cookies = [self._to_cdp_cookie(cookie) for cookie in cookies]
+            cdp_cookies = [cookie for cookie in cdp_cookies if cookie]
+            if not cdp_cookies:
+                return False
+            
+            self.page.run_cdp('Network.setCookies', cookies=cdp_cookies)
+            app_logger.debug(f"Preloaded {len(cdp_cookies)} cookies via CDP")
+            return True
+            
+        except Exception as e:
+            app_logger.warning(f"Failed to preload cookies via CDP: {e}")
+            return False
+    
+    def _to_cdp_cookie(self, cookie):
+        """保存済みCookieをCDPのCookieParam形式に変換"""
+        name = cookie.get('name')
+        value = cookie.get('value')
+        if not name or value is None:
+            return None
+        
+        cdp_cookie = {
+            'name': name,
+            'value': str(value),
+            'domain': cookie.get('domain') or self._default_cookie_domain(),
+            'path': cookie.get('path') or '/',
+            'secure': bool(cookie.get('secure', urlsplit(Config.X_BASE_URL).scheme == 'https')),
+            'httpOnly': bool(cookie.get('httpOnly', False))
+        }
+        
+        expires = cookie.get('expires', cookie.get('expiry'))
+        if isinstance(expires, (int, float)) and expires > 0:
+            cdp_cookie['expires'] = expires
+        
+        same_site = cookie.get('sameSite')
+        if same_site in ('Strict', 'Lax', 'None'):
+            cdp_cookie['sameSite'] = same_site
+        
+        return cdp_cookie
+    
+    def _default_cookie_domain(self):
+        """ドメインのないCookieの設定先（X_BASE_URL のホスト、IPアドレスやlocalhost以外はサブドメインにも送る）"""
+        host = urlsplit(Config.X_BASE_URL).hostname or 'x.com'
+        if '.' not in host or re.fullmatch(r'[\d.]+', host):
+            return host
+        return f".{host}"
+    
+    def _verify_preloaded_login(self, url):
+        """事前設定したCookieによるログイン状態を最初の対象ページで確認"""
+        self.login_pending_verification = False
+        
+        if self._check_login_status():
+            auth_manager.update_session_validity()
+            app_logger.info("Login restored from cookies")
+            return True
+        
+        app_logger.warning("Preloaded cookies were rejected by X.com")
+        self.is_logged_in = False
+        browser_pool.session_ready = False
+        
+        # 自動ログイン後に対象ページへ再度移動
+        if self._login_with_credentials():
+            return self.navigate_to_url(url)
+        
+        auth_manager.invalidate_session()
+        return False
+    
     def _check_login_status(self):
         """ログイン状態をチェック"""
         try:
@@ -117,151 +428,141 @@ class BaseScraper:
             self.wait_for_page_load()
             time.sleep(3)
             
-            # ログインフォームの検出と入力
-            for attempt in range(Config.LOGIN_RETRY_COUNT):
-                try:
-                    app_logger.info(f"Login attempt {attempt + 1}/{Config.LOGIN_RETRY_COUNT}")
-                    
-                    # ユーザー名/メール入力フィールドを検索
-                    username_selectors = [
-                        'input[name="text"]',
-                        'input[autocomplete="username"]',
-                        'input[data-testid="ocfEnterTextTextInput"]',
-                        'input[placeholder*="phone" i]',
-                        'input[placeholder*="email" i]',
-                        'input[placeholder*="username" i]'
-                    ]
-                    
-                    username_field = None
-                    for selector in username_selectors:
-                        try:
-                            field = self.page.ele(selector, timeout=5)
-                            if field and field.is_enabled():
-                                username_field = field
-                                break
-                        except:
-                            continue
-                    
-                    if not username_field:
-                        app_logger.error("Username field not found")
-                        time.sleep(5)
-                        continue
-                    
-                    # ユーザー名またはメールアドレスを入力
-                    login_identifier = Config.X_EMAIL if Config.X_EMAIL else Config.X_USERNAME
-                    username_field.clear()
-                    username_field.input(login_identifier)
-                    app_logger.info(f"Entered username/email: {login_identifier[:3]}***")
-                    
-                    time.sleep(2)
-                    
-                    # 次へボタンをクリック
-                    next_button_selectors = [
-                        'div[role="button"]:has-text("Next")',
-                        'div[role="button"]:has-text("次へ")',
-                        'button:has-text("Next")',
-                        'button:has-text("次へ")',
-                        '[data-testid="ocfEnterTextNextButton"]'
-                    ]
-                    
-                    next_button = None
-                    for selector in next_button_selectors:
-                        try:
-                            button = self.page.ele(selector, timeout=3)
-                            if button and button.is_enabled():
-                                next_button = button
-                                break
-                        except:
-                            continue
-                    
-                    if next_button:
-                        next_button.click()
-                        time.sleep(3)
-                    
-                    # パスワード入力フィールドを検索
-                    password_selectors = [
-                        'input[name="password"]',
-                        'input[type="password"]',
-                        'input[autocomplete="current-password"]',
-                        'input[data-testid="ocfEnterTextTextInput"]'
-                    ]
-                    
-                    password_field = None
-                    for selector in password_selectors:
-                        try:
-                            field = self.page.ele(selector, timeout=10)
-                            if field and field.is_enabled():
-                                password_field = field
-                                break
-                        except:
-                            continue
-                    
-                    if not password_field:
-                        app_logger.error("Password field not found")
-                        time.sleep(5)
-                        continue
-                    
-                    # パスワードを入力
-                    password_field.clear()
-                    password_field.input(Config.X_PASSWORD)
-                    app_logger.info("Password entered")
-                    
-                    time.sleep(2)
-                    
-                    # ログインボタンをクリック
-                    login_button_selectors = [
-                        'div[role="button"]:has-text("Log in")',
-                        'div[role="button"]:has-text("ログイン")',
-                        'button:has-text("Log in")',
-                        'button:has-text("ログイン")',
-                        '[data-testid="LoginForm_Login_Button"]'
-                    ]
-                    
-                    login_button = None
-                    for selector in login_button_selectors:
-                        try:
-                            button = self.page.ele(selector, timeout=3)
-                            if button and button.is_enabled():
-                                login_button = button
-                                break
-                        except:
-                            continue
-                    
-                    if not login_button:
-                        app_logger.error("Login button not found")
-                        time.sleep(5)
-                        continue
-                    
-                    login_button.click()
-                    app_logger.info("Login button clicked")
-                    
-                    # ログイン完了を待機
-                    time.sleep(10)
-                    
-                    # 2FA認証やその他の認証ステップをチェック
-                    if self._handle_additional_auth_steps():
-                        time.sleep(5)
-                    
-                    # ログイン成功を確認
-                    if self._check_login_status():
-                        app_logger.info("Automatic login successful")
-                        return True
-                    
-                    app_logger.warning(f"Login attempt {attempt + 1} failed, retrying...")
-                    time.sleep(5)
-                    
-                except Exception as e:
-                    app_logger.error(f"Login attempt {attempt + 1} error: {e}")
-                    time.sleep(5)
-                    continue
-            
-            app_logger.error("All automatic login attempts failed")
-            return False
+            # フォームの描画遅れなどはバックオフして再試行し、ログインの失敗は再試行しない
+            login_retry.run(
+                self._submit_login_form,
+                deadline=self.deadline,
+                description="Automatic login"
+            )
+            app_logger.info("Automatic login successful")
+            return True
             
         except Exception as e:
             app_logger.error(f"Automatic login failed: {e}")
             return False
     
+    def _submit_login_form(self):
+        """ログインフォームを入力して送信（1回分）"""
+        # ユーザー名/メール入力フィールドを検索
+        username_selectors = [
+            'input[name="text"]',
+            'input[autocomplete="username"]',
+            'input[data-testid="ocfEnterTextTextInput"]',
+            'input[placeholder*="phone" i]',
+            'input[placeholder*="email" i]',
+            'input[placeholder*="username" i]'
+        ]
+        
+        username_field = None
+        for selector in username_selectors:
+            try:
+                field = self.page.ele(selector, timeout=5)
+                if field and field.is_enabled():
+                    username_field = field
+                    break
+            except:
+                continue
+        
+        if not username_field:
+            raise ElementNotFoundError("Username field not found")
+        
+        # ユーザー名またはメールアドレスを入力
+        login_identifier = Config.X_EMAIL if Config.X_EMAIL else Config.X_USERNAME
+        username_field.clear()
+        username_field.input(login_identifier)
+        app_logger.info(f"Entered username/email: {login_identifier[:3]}***")
+        
+        time.sleep(2)
+        
+        # 次へボタンをクリック
+        next_button_selectors = [
+            'div[role="button"]:has-text("Next")',
+            'div[role="button"]:has-text("次へ")',
+            'button:has-text("Next")',
+            'button:has-text("次へ")',
+            '[data-testid="ocfEnterTextNextButton"]'
+        ]
+        
+        next_button = None
+        for selector in next_button_selectors:
+            try:
+                button = self.page.ele(selector, timeout=3)
+                if button and button.is_enabled():
+                    next_button = button
+                    break
+            except:
+                continue
+        
+        if next_button:
+            next_button.click()
+            time.sleep(3)
+        
+        # パスワード入力フィールドを検索
+        password_selectors = [
+            'input[name="password"]',
+            'input[type="password"]',
+            'input[autocomplete="current-password"]',
+            'input[data-testid="ocfEnterTextTextInput"]'
+        ]
+        
+        password_field = None
+        for selector in password_selectors:
+            try:
+                field = self.page.ele(selector, timeout=10)
+                if field and field.is_enabled():
+                    password_field = field
+                    break
+            except:
+                continue
+        
+        if not password_field:
+            raise ElementNotFoundError("Password field not found")
+        
+        # パスワードを入力
+        password_field.clear()
+        password_field.input(Config.X_PASSWORD)
+        app_logger.info("Password entered")
+        
+        time.sleep(2)
+        
+        # ログインボタンをクリック
+        login_button_selectors = [
+            'div[role="button"]:has-text("Log in")',
+            'div[role="button"]:has-text("ログイン")',
+            'button:has-text("Log in")',
+            'button:has-text("ログイン")',
+            '[data-testid="LoginForm_Login_Button"]'
+        ]
+        
+        login_button = None
+        for selector in login_button_selectors:
+            try:
+                button = self.page.ele(selector, timeout=3)
+                if button and button.is_enabled():
+                    login_button = button
+                    break
+            except:
+                continue
+        
+        if not login_button:
+            raise ElementNotFoundError("Login button not found")
+        
+        login_button.click()
+        app_logger.info("Login button clicked")
+        
+        # ログイン完了を待機
+        time.sleep(10)
+        
+        # 2FA認証やその他の認証ステップをチェック
+        if self._handle_additional_auth_steps():
+            time.sleep(5)
+        
+        # ログイン成功を確認（認証情報の誤りや2FAは再試行しても解決しない）
+        if not self._check_login_status():
+            raise LoginRequiredError("Login could not be confirmed")
+        
+        return True
+    
     def _handle_additional_auth_steps(self):
         """追加の認証ステップを処理"""
         try:
@@ -303,10 +604,24 @@ class BaseScraper:
             app_logger.error(f"Error handling additional auth steps: {e}")
             return False
     
+    def probe_session(self):
+        """ログイン状態を確認（バックグラウンドのセッション維持用）"""
+        if not self.is_logged_in and not self.login_to_x():
+            return False
+        
+        try:
+            if not self.navigate_to_url(Config.SESSION_PROBE_URL):
+                return False
+        except LoginRequiredError:
+            return False
+        
+        return self._check_login_status()
+    
     def save_current_cookies(self):
         """現在のCookieを保存"""
         try:
-            cookies = self.page.cookies()
+            # CDPでの一括復元に必要な domain/path 等も含めて保存
+            cookies = self.page.cookies(all_info=True)
             if cookies:
                 auth_manager.save_cookies(cookies)
                 app_logger.info("Cookies saved successfully")
@@ -316,52 +631,341 @@ class BaseScraper:
             app_logger.error(f"Failed to save cookies: {e}")
             return False
     
-    def navigate_to_url(self, url, max_retries=3):
-        """URLに移動（リトライ機能付き）"""
-        for attempt in range(max_retries):
-            try:
-                app_logger.info(f"Navigating to: {url} (attempt {attempt + 1})")
-                self.page.get(url)
-                
-                # ページ読み込み完了を待機
-                self.wait_for_page_load()
-                
+    @timed_stage('navigate')
+    def navigate_to_url(self, url, max_retries=None):
+        """URLに移動（一時的なエラーのみ、処理期限内でバックオフして再試行）"""
+        def attempt():
+            if self._reuse_loaded_page(url):
                 return True
-                
+            
+            app_logger.info(f"Navigating to: {url}")
+            self._remember_loaded_page(None)
+            
+            if not self._navigate_in_app(url):
+                self._load_page(url)
+            
+            self._remember_loaded_page(url)
+            return True
+        
+        try:
+            return navigation_retry.run(
+                attempt,
+                deadline=self.deadline,
+                max_attempts=max_retries,
+                description=f"Navigation to {url}"
+            )
+        except (LoginRequiredError, RateLimitError, RequestAbortedError):
+            raise
+        except Exception as e:
+            app_logger.error(f"Failed to navigate to {url}: {e}")
+            return False
+    
+    @timed_stage('navigate_full')
+    def _load_page(self, url):
+        """ページを読み込み直して移動"""
+        blocked = self._block_resources()
+        
+        # 再試行は navigation_retry で行うため DrissionPage 内部の再試行は使わない
+        timeout = self.bounded_timeout(Config.PAGE_LOAD_TIMEOUT)
+        started = time.time()
+        self.page.get(url, show_errmsg=True, retry=0, timeout=timeout)
+        
+        # ページ読み込み完了を待機
+        self.wait_for_page_load()
+        
+        # 読み込み完了後に描画のために取得したリソースも含めて記録する
+        if blocked is not None:
+            resource_blocker.record(self.page, blocked, time.time() - started)
+        
+        # レート制限の案内ページはログイン画面と区別できないため、ログイン状態の確認より先に判定
+        self._check_rate_limit(url)
+        
+        # Cookie事前設定後の最初のページでログイン状態を確認
+        if self.login_pending_verification:
+            if not self._verify_preloaded_login(url):
+                raise LoginRequiredError("Stored session is no longer valid")
+    
+    def _check_rate_limit(self, url):
+        """読み込んだページがX.comのレート制限を受けていればRateLimitErrorを送出"""
+        try:
+            source = self.page.run_js(self.RATE_LIMIT_JS)
+        except Exception as e:
+            app_logger.debug(f"Failed to check rate limit: {e}")
+            return
+        
+        if source:
+            app_logger.warning(f"Rate limited by X.com while loading {url} ({source})")
+            raise RateLimitError(f"Rate limited by X.com ({source}): {url}")
+    
+    def _block_resources(self):
+        """
+        このページの読み込みでブロックするリソースをタブに設定
+        
+        Returns:
+            ブロックする場合True、比較用にブロックしない場合False、
+            ブロックが無効または設定に失敗した場合None（転送量を記録しない）
+        """
+        patterns = resource_blocker.patterns_for(type(self))
+        if patterns is None:
+            return None
+        
+        # プールのタブは前の利用者の設定が残っているため、変わった場合のみ設定し直す
+        holder = self.pooled_tab or self
+        if patterns != holder.blocked_patterns:
+            try:
+                resource_blocker.apply(self.page, patterns, configured=holder.blocked_patterns is not None)
+                holder.blocked_patterns = patterns
             except Exception as e:
-                app_logger.warning(f"Navigation attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(Config.RETRY_DELAY * (attempt + 1))
-                else:
-                    app_logger.error(f"Failed to navigate to {url} after {max_retries} attempts")
-                    return False
+                app_logger.debug(f"Failed to configure resource blocking: {e}")
+                return None
+        
+        return bool(patterns)
+    
+    def _navigate_in_app(self, url):
+        """
+        X.comを表示中のタブでは、ページを読み込み直さずにアプリ内のルーターで移動
         
+        SPA_NAVIGATION_TIMEOUT 秒以内に移動先が描画されなければFalse（呼び出し元で読み込み直す）
+        """
+        if not Config.SPA_NAVIGATION_ENABLED or self._page is None or self.login_pending_verification:
+            return False
+        
+        try:
+            current = urlsplit(self.page.url)
+        except Exception:
+            return False
+        
+        target = urlsplit(url)
+        # 同じページへの移動ではルーターが描画し直さないため読み込み直す
+        if (current.scheme, current.netloc) != (target.scheme, target.netloc) or current.path == target.path:
+            return False
+        
+        return self._route_in_app(target)
+    
+    @timed_stage('navigate_spa')
+    def _route_in_app(self, target):
+        """アプリ内のルーターで target へ移動し、描画を待機"""
+        path = target.path + (f"?{target.query}" if target.query else '')
+        try:
+            if not self.page.run_js(self.SPA_NAVIGATE_JS, path):
+                return False
+            
+            end_time = time.time() + self.bounded_timeout(Config.SPA_NAVIGATION_TIMEOUT)
+            while time.time() < end_time:
+                if urlsplit(self.page.url).path == target.path and self.page.run_js(self.SPA_RENDERED_JS):
+                    app_logger.info(f"Navigated in app to: {path}")
+                    return True
+                time.sleep(0.2)
+        except Exception as e:
+            app_logger.debug(f"In-app navigation failed: {e}")
+            return False
+        
+        app_logger.info(f"In-app navigation to {path} did not render in time, reloading")
         return False
     
+    def prefetch(self, url):
+        """
+        確認の前にページを読み込んでおく（ログイン済みのタブのみ）
+        
+        直後の navigate_to_url は表示中のページの再利用で読み込みを省く
+        """
+        self.prefer_url(url)
+        if not self.is_logged_in:
+            if not self.login_to_x():
+                raise LoginRequiredError("Login required but failed")
+        
+        return self.navigate_to_url(url)
+    
+    def _reuse_loaded_page(self, url):
+        """
+        プールのタブが同じページを表示したままなら、再読み込みせずに再利用
+        
+        TAB_REUSE_MAX_AGE 秒より前に読み込んだページ、移動後に別のページへ遷移したページは再利用しない
+        """
+        tab = self.pooled_tab
+        if not tab or tab.last_url != url or not Config.TAB_REUSE_MAX_AGE or self.login_pending_verification:
+            return False
+        
+        age = time.time() - tab.last_loaded_at
+        if age > Config.TAB_REUSE_MAX_AGE:
+            return False
+        
+        try:
+            if self.page.url != tab.landed_url:
+                return False
+            
+            # 処理済みの印を消して、一覧を先頭から読み直せるようにする
+            self.page.run_js(self.RESET_PAGE_JS)
+        except Exception as e:
+            app_logger.debug(f"Failed to reuse loaded page: {e}")
+            return False
+        
+        app_logger.info(f"Reusing loaded page: {url} (loaded {age:.0f}s ago)")
+        return True
+    
+    def _remember_loaded_page(self, url):
+        """プールのタブが表示中のページを記録（Noneで破棄）"""
+        tab = self.pooled_tab
+        if not tab:
+            return
+        
+        tab.last_url = url
+        tab.last_loaded_at = time.time() if url else None
+        tab.landed_url = self.page.url if url else None
+    
+    def _normalize_tweet_url(self, tweet_url):
+        """ツイートURLを正規化（X_BASE_URL のホストと x.com / twitter.com のURL、またはツイートID）"""
+        try:
+            hosts = {'x.com', 'twitter.com', urlsplit(Config.X_BASE_URL).netloc}
+            host_pattern = '|'.join(re.escape(host) for host in hosts if host)
+            
+            # URLパターンのマッチング
+            patterns = [
+                rf'https?://(?:www\.)?(?:{host_pattern})/\w+/status/(\d+)',
+                rf'https?://(?:www\.)?(?:{host_pattern})/i/web/status/(\d+)',
+                r'(\d{15,20})'  # ツイートIDのみ
+            ]
+            
+            for pattern in patterns:
+                match = re.search(pattern, tweet_url)
+                if match:
+                    tweet_id = match.group(1)
+                    return f"{Config.X_BASE_URL}/i/web/status/{tweet_id}"
+            
+            return None
+            
+        except Exception as e:
+            app_logger.error(f"Failed to normalize tweet URL: {e}")
+            return None
+    
+    @timed_stage('page_load')
     def wait_for_page_load(self, timeout=10):
         """ページ読み込み完了を待機"""
         try:
-            # JavaScriptの実行完了を待機
-            self.page.wait.load_start()
-            time.sleep(2)  # 追加の待機時間
+            # 読み込み完了を待機（読み込み済みのページでは待たない）
+            self.page.wait.doc_loaded(timeout=self.bounded_timeout(Config.PAGE_LOAD_TIMEOUT))
+            self.optional_sleep(2)  # 追加の待機時間
             
             # 基本的なページ要素の読み込みを確認
-            self.page.wait.ele_loaded('body', timeout=timeout)
+            self.page.wait.ele_loaded('body', timeout=self.bounded_timeout(timeout))
             
         except Exception as e:
             app_logger.warning(f"Page load wait timeout: {e}")
     
+    def crawl_user_list(self, url, known_users=None, max_scroll_attempts=None, overlap_threshold=None):
+        """
+        ユーザー一覧ページをスクロールしてユーザー名を表示順（新しい順）に取得
+        
+        known_users を指定した場合、既知のユーザーが overlap_threshold 件続いた時点で
+        それ以降は取得済みとみなして終了する（最新分のみの差分取得）
+        
+        Returns:
+            (usernames, reached_end)
+        """
+        return self._crawl_list(
+            url, self.COLLECT_USER_CELLS_JS, self.NEW_USER_CELLS_JS,
+            known_users, max_scroll_attempts, overlap_threshold
+        )
+    
+    def crawl_tweet_ids(self, url, known_ids=None, reposts_only=False, max_scroll_attempts=None, overlap_threshold=None):
+        """
+        タイムライン（いいね欄、プロフィール等）をスクロールしてツイートIDを表示順に取得
+        
+        known_ids の扱いは crawl_user_list と同じ
+        
+        Returns:
+            (tweet_ids, reached_end)
+        """
+        return self._crawl_list(
+            url, self.COLLECT_TWEET_IDS_JS, self.NEW_TWEETS_JS,
+            known_ids, max_scroll_attempts, overlap_threshold, js_args=(reposts_only,)
+        )
+    
+    def _crawl_list(self, url, collect_js, new_elements_js, known_keys=None,
+                    max_scroll_attempts=None, overlap_threshold=None, js_args=()):
+        """一覧ページをスクロールして collect_js が返す項目を重複なく表示順に取得"""
+        max_scroll_attempts = max_scroll_attempts or Config.USER_LIST_MAX_SCROLLS
+        overlap_threshold = overlap_threshold or Config.USER_LIST_OVERLAP
+        
+        if not self.is_logged_in:
+            if not self.login_to_x():
+                raise LoginRequiredError("Login required but failed")
+        
+        if not self.navigate_to_url(url):
+            raise NavigationError(f"Failed to navigate to list: {url}")
+        
+        self.wait_for_page_load()
+        
+        items = []
+        seen = set()
+        consecutive_known = 0
+        scroll_attempts = 0
+        reached_end = False
+        
+        while True:
+            for item in self.page.run_js(collect_js, *js_args) or []:
+                key = item.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                items.append(item)
+                
+                if known_keys is not None and key in known_keys:
+                    consecutive_known += 1
+                else:
+                    consecutive_known = 0
+            
+            if known_keys is not None and consecutive_known >= overlap_threshold:
+                break
+            
+            if scroll_attempts >= max_scroll_attempts:
+                break
+            
+            if not self.scroll_for_new_elements(new_elements_js):
+                reached_end = True
+                break
+            
+            scroll_attempts += 1
+        
+        app_logger.info(f"Crawled {len(items)} items from {url} ({scroll_attempts} scrolls)")
+        return items, reached_end
+    
+    @timed_stage('scroll')
+    def scroll_for_new_elements(self, new_elements_js, timeout=5):
+        """ページ下部までスクロールし、未処理の要素が表示されるまで待機"""
+        try:
+            # 現在のページの高さを取得
+            initial_height = self.page.run_js('return document.body.scrollHeight')
+            
+            self.page.scroll.to_bottom()
+            
+            end_time = time.time() + self.bounded_timeout(timeout)
+            while time.time() < end_time:
+                if self.page.run_js(new_elements_js):
+                    return True
+                time.sleep(0.2)
+            
+            # 新しいコンテンツが読み込まれたかチェック
+            new_height = self.page.run_js('return document.body.scrollHeight')
+            
+            return new_height > initial_height
+            
+        except Exception as e:
+            app_logger.debug(f"Failed to scroll for new elements: {e}")
+            return False
+    
+    @timed_stage('delay')
     def random_delay(self, min_seconds=1, max_seconds=3):
         """ランダムな遅延を追加"""
         delay = random.uniform(min_seconds, max_seconds)
-        time.sleep(delay)
+        self.optional_sleep(delay)
     
     def scroll_to_element(self, element):
         """要素までスクロール"""
         try:
             if element:
                 element.scroll.to_see()
-                time.sleep(1)
+                self.optional_sleep(1)
                 return True
         except Exception as e:
             app_logger.warning(f"Failed to scroll to element: {e}")
@@ -384,10 +988,28 @@ class BaseScraper:
             return None
     
     def close(self):
-        """ブラウザを閉じる"""
+        """ブラウザを閉じる（プール利用時はタブを返却）"""
         try:
-            if self.page:
-                self.page.quit()
+            # 中断した処理の読み込みを止めてから返却（次の利用者に持ち越さない）
+            if self.aborted and self._page is not None:
+                self._remember_loaded_page(None)
+                try:
+                    self._page.stop_loading()
+                except Exception as e:
+                    app_logger.debug(f"Failed to stop loading: {e}")
+            
+            if self.pooled_tab:
+                tab, self.pooled_tab = self.pooled_tab, None
+                # タブはCookieを共有するため、確認済みのログイン状態はプール全体で有効
+                if self.is_logged_in and not self.login_pending_verification:
+                    browser_pool.session_ready = True
+                browser_pool.release(tab)
+                app_logger.info("Browser tab returned to pool")
+                return
+            
+            if self._page:
+                self._page.quit()
+                self._page = None
                 app_logger.info("Browser closed")
         except Exception as e:
             app_logger.error(f"Failed to close browser: {e}")
@@ -406,13 +1028,36 @@ class ScrapingError(Exception):
 
 class LoginRequiredError(ScrapingError):
     """ログインが必要なエラー"""
-    pass
+    retry_category = 'auth'
+
+class NavigationError(ScrapingError):
+    """ページ遷移に失敗したエラー"""
+    retry_category = 'transient'
 
 class ElementNotFoundError(ScrapingError):
     """要素が見つからないエラー"""
-    pass
+    retry_category = 'not_found'
 
 class RateLimitError(ScrapingError):
     """レート制限エラー"""
+    retry_category = 'throttle'
+
+class RequestAbortedError(ScrapingError):
+    """リクエストの処理を中断したエラー"""
+    pass
+
+class DeadlineExceededError(RequestAbortedError):
+    """リクエストの処理期限を過ぎたエラー"""
     pass
 
+class ClientDisconnectedError(RequestAbortedError):
+    """クライアントが切断したエラー"""
+    pass
+
+class CapacityExceededError(ScrapingError):
+    """スクレイピング枠の空き待ちが上限を超えたエラー"""
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
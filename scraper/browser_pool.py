@@ -0,0 +1,292 @@
+import time
+import random
+import threading
+from collections import deque
+from DrissionPage import ChromiumPage, ChromiumOptions
+from config.config import Config
+from utils.logger import app_logger
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+]
+
+# render_light プロファイルで追加するChromiumの起動オプション（自動再生・スムーズスクロール・不要なバックグラウンド処理を止める）
+RENDER_LIGHT_ARGUMENTS = (
+    '--autoplay-policy=user-gesture-required',
+    '--force-prefers-reduced-motion',
+    '--disable-smooth-scrolling',
+    '--mute-audio',
+    '--hide-scrollbars',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-extensions'
+)
+
+# render_light プロファイルで各ページの読み込み前に実行するスクリプト（アニメーション・トランジションと動画の再生を止める）
+RENDER_LIGHT_JS = """
+(() => {
+    const style = document.createElement('style');
+    style.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; scroll-behavior: auto !important; }';
+    const inject = () => (document.head || document.documentElement).appendChild(style);
+    if (document.documentElement) {
+        inject();
+    } else {
+        document.addEventListener('DOMContentLoaded', inject);
+    }
+    HTMLMediaElement.prototype.play = function () {
+        return Promise.resolve();
+    };
+})();
+"""
+
+def render_light_enabled():
+    """render_light プロファイルを使うか"""
+    return Config.BROWSER_PROFILE == 'render_light'
+
+def build_browser_options(auto_port=False):
+    """Chromiumオプションを作成"""
+    options = ChromiumOptions()
+    options.headless(True)  # ヘッドレスモード
+    options.set_argument('--no-sandbox')
+    options.set_argument('--disable-dev-shm-usage')
+    options.set_argument('--disable-gpu')
+    options.set_argument('--disable-web-security')
+    options.set_argument('--disable-features=VizDisplayCompositor')
+    
+    # render_light は小さいウィンドウでレイアウトと描画の負荷を抑える
+    if render_light_enabled():
+        options.set_argument(f'--window-size={Config.RENDER_LIGHT_WINDOW_SIZE}')
+        for argument in RENDER_LIGHT_ARGUMENTS:
+            options.set_argument(argument)
+    else:
+        options.set_argument('--window-size=1920,1080')
+    
+    # User-Agentの設定
+    options.set_argument(f'--user-agent={random.choice(USER_AGENTS)}')
+    
+    # プール用ブラウザは他のプロセスと衝突しないポートを使用
+    if auto_port:
+        options.auto_port()
+    
+    return options
+
+def prepare_page(page):
+    """ページの共通設定（render_light ではアニメーションと動画の再生を止める）"""
+    page.set.timeouts(Config.PAGE_LOAD_TIMEOUT)
+    
+    if render_light_enabled():
+        page.run_cdp('Page.addScriptToEvaluateOnNewDocument', source=RENDER_LIGHT_JS)
+        page.run_cdp('Emulation.setEmulatedMedia', features=[{'name': 'prefers-reduced-motion', 'value': 'reduce'}])
+
+class PooledTab:
+    """プール内のタブ"""
+    
+    def __init__(self, page):
+        self.page = page
+        self.created_at = time.time()
+        self.uses = 0
+        self.last_url = None
+        self.last_loaded_at = None
+        # 遷移後の実際のURL（リダイレクト後、再利用時に別のページへ移っていないかの確認用）
+        self.landed_url = None
+        # 設定済みのブロックするURLパターン（resource_blocker）
+        self.blocked_patterns = None
+
+class BrowserPool:
+    """ワーカー内で再利用するブラウザタブのプール"""
+    
+    def __init__(self, size):
+        self.size = size
+        self.browser = None
+        self.session_ready = False
+        self._idle = deque()
+        self._tabs = []
+        self._creating = 0
+        self._condition = threading.Condition(threading.Lock())
+        # ブラウザの起動はプールのロック外で、1スレッドずつ行う
+        self._launch_lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return self.size > 0
+    
+    def acquire(self, timeout=None, url=None):
+        """
+        タブを取得（プール無効時や待機タイムアウト時はNone）
+        
+        url を表示中の空きタブがあればそのタブを優先する
+        """
+        if not self.enabled:
+            return None
+        
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        with self._condition:
+            while True:
+                if self._idle:
+                    tab = self._take_idle(url)
+                    tab.uses += 1
+                    return tab
+                
+                if len(self._tabs) + self._creating < self.size:
+                    self._creating += 1
+                    break
+                
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    app_logger.warning("Timed out waiting for a pooled browser tab")
+                    return None
+                
+                self._condition.wait(remaining)
+        
+        return self._add_tab()
+    
+    def _add_tab(self):
+        """予約済みの枠でタブを作成して登録（_creating を増やしてから呼び出す）"""
+        # タブの作成はロック外で行う
+        try:
+            tab = self._create_tab()
+        except Exception as e:
+            app_logger.error(f"Failed to create pooled tab: {e}")
+            tab = None
+        
+        with self._condition:
+            self._creating -= 1
+            if tab:
+                self._tabs.append(tab)
+                tab.uses += 1
+            self._condition.notify()
+        
+        return tab
+    
+    def _take_idle(self, url):
+        """空きタブを取り出す（ロック内で呼び出す）"""
+        if url:
+            for tab in self._idle:
+                if tab.last_url == url:
+                    self._idle.remove(tab)
+                    return tab
+        return self._idle.popleft()
+    
+    def release(self, tab, healthy=True):
+        """タブをプールに返却"""
+        with self._condition:
+            # 上限を縮小した後は、返却されたタブから閉じる
+            if healthy and tab in self._tabs and len(self._tabs) <= self.size:
+                self._idle.append(tab)
+            else:
+                self._discard(tab)
+            self._condition.notify()
+    
+    def resize(self, size):
+        """プールの上限を変更（縮小時は空いているタブから閉じる）"""
+        if not self.enabled:
+            return
+        
+        with self._condition:
+            self.size = max(size, 1)
+            while len(self._tabs) > self.size and self._idle:
+                self._discard(self._idle.pop())
+            self._condition.notify_all()
+    
+    def _create_tab(self):
+        """新しいタブを作成"""
+        with self._launch_lock:
+            browser = self.browser
+            if browser is None:
+                browser = ChromiumPage(addr_or_opts=build_browser_options(auto_port=True))
+                prepare_page(browser)
+                with self._condition:
+                    self.browser = browser
+                app_logger.info("Pooled browser started")
+                # 最初のタブはブラウザ自身のタブを使用
+                return PooledTab(browser)
+        
+        page = browser.new_tab()
+        prepare_page(page)
+        return PooledTab(page)
+    
+    def _discard(self, tab):
+        """タブを破棄"""
+        if tab in self._tabs:
+            self._tabs.remove(tab)
+        
+        try:
+            if tab.page is not self.browser:
+                tab.page.close()
+        except Exception as e:
+            app_logger.debug(f"Failed to close pooled tab: {e}")
+    
+    def warm(self, prepare=None):
+        """
+        プールを規定数まで作成し、未使用のタブを準備
+        
+        タブは1つずつ取り出して準備し、終わり次第返却する（準備中以外のタブはリクエストが使える）
+        """
+        if not self.enabled:
+            return 0
+        
+        prepared = 0
+        handled = []
+        while len(handled) < self.size:
+            tab = self._take_unprepared(handled)
+            if not tab:
+                break
+            handled.append(tab)
+            
+            healthy = True
+            if prepare:
+                try:
+                    prepare(tab)
+                    prepared += 1
+                except Exception as e:
+                    app_logger.warning(f"Failed to warm pooled tab: {e}")
+                    healthy = False
+            self.release(tab, healthy=healthy)
+        
+        return prepared
+    
+    def _take_unprepared(self, exclude):
+        """未使用の空きタブを取り出す（無ければ規定数まで作成、どちらもできなければNone）"""
+        with self._condition:
+            for tab in self._idle:
+                if tab.last_url is None and tab not in exclude:
+                    self._idle.remove(tab)
+                    tab.uses += 1
+                    return tab
+            
+            if len(self._tabs) + self._creating >= self.size:
+                return None
+            self._creating += 1
+        
+        return self._add_tab()
+    
+    def get_stats(self):
+        """プールの統計情報を取得"""
+        with self._condition:
+            return {
+                'enabled': self.enabled,
+                'size': self.size,
+                'tabs': len(self._tabs),
+                'idle': len(self._idle),
+                'session_ready': self.session_ready
+            }
+    
+    def shutdown(self):
+        """プールを停止"""
+        with self._condition:
+            self._idle.clear()
+            self._tabs = []
+            browser, self.browser = self.browser, None
+            self.session_ready = False
+        
+        if browser:
+            try:
+                browser.quit()
+            except Exception as e:
+                app_logger.error(f"Failed to quit pooled browser: {e}")
+
+# グローバルインスタンス
+browser_pool = BrowserPool(Config.BROWSER_POOL_SIZE)
@@ -0,0 +1,336 @@
+import os
+import re
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from config.config import Config
+from scraper.follow_checker import FollowChecker
+from scraper.repost_checker import RepostChecker
+from scraper.comment_checker import CommentChecker
+from scraper.index_store import follower_index_store, retweeter_index_store, replier_index_store
+from scraper.scheduler import fair_scheduler
+from utils.logger import app_logger
+from utils.distributed_lock import DistributedLock
+from utils.history_store import history_store
+
+class CampaignError(Exception):
+    """キャンペーンの登録・確認に関するエラー"""
+    pass
+
+class CampaignNotFoundError(CampaignError):
+    """キャンペーンが登録されていない"""
+    pass
+
+class CampaignRegistry:
+    """
+    キャンペーン（対象ツイート + フォロー対象アカウント）の登録と事前確認
+    
+    登録されたキャンペーンはバックグラウンドでフォロワー・リポストしたユーザー・返信したユーザーの
+    一覧を定期的に取得し、ユーザーの確認は取得済みの一覧から回答する
+    （取得間隔は直近の確認リクエスト数に応じて調整する）
+    """
+    
+    # いいねしたユーザーの一覧は投稿者本人以外には公開されないため事前確認の対象外
+    ACTIONS = ('follow', 'repost', 'comment')
+    VERIFY_ACTION = 'campaign_verify'
+    
+    def __init__(self, index_dir):
+        self.enabled = Config.CAMPAIGN_SCHEDULER_ENABLED
+        self.path = os.path.join(index_dir, 'campaigns.json')
+        self.campaigns = {}
+        self.loaded_mtime = None
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+    
+    def _load(self):
+        """登録内容を読み込み（他のワーカーが更新していれば再読み込み）"""
+        with self.lock:
+            if not os.path.exists(self.path):
+                self.campaigns = {}
+                self.loaded_mtime = None
+                return self.campaigns
+            
+            mtime = os.path.getmtime(self.path)
+            if mtime != self.loaded_mtime:
+                try:
+                    with open(self.path, 'r') as f:
+                        self.campaigns = json.load(f)
+                    self.loaded_mtime = mtime
+                except Exception as e:
+                    app_logger.error(f"Failed to load campaigns: {e}")
+            
+            return self.campaigns
+    
+    def _update(self, update_func):
+        """ワーカー間ロックの下で読み込み・更新・保存を行う"""
+        with DistributedLock('campaigns', ttl=30):
+            campaigns = dict(self._load())
+            result = update_func(campaigns)
+            
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(campaigns, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            
+            self._load()
+            return result
+    
+    def register(self, tweet_url, account=None, actions=None, name=None, expires_in_hours=None):
+        """キャンペーンを登録"""
+        actions = list(actions or self.ACTIONS)
+        invalid = [action for action in actions if action not in self.ACTIONS]
+        if invalid:
+            raise CampaignError(
+                f"Unsupported actions: {', '.join(invalid)} (supported: {', '.join(self.ACTIONS)})"
+            )
+        
+        match = re.search(r'(\d{15,20})', tweet_url or '')
+        if 'repost' in actions or 'comment' in actions:
+            if not match:
+                raise CampaignError(f"Invalid tweet URL: {tweet_url}")
+        
+        if 'follow' in actions:
+            if not account:
+                raise CampaignError("account is required for the follow action")
+            try:
+                account = follower_index_store.normalize_key(account)
+            except ValueError as e:
+                raise CampaignError(str(e))
+        
+        if expires_in_hours is None:
+            expires_in_hours = Config.CAMPAIGN_DEFAULT_TTL_HOURS
+        elif (isinstance(expires_in_hours, bool) or not isinstance(expires_in_hours, (int, float))
+              or not 0 < expires_in_hours <= Config.CAMPAIGN_MAX_TTL_HOURS):
+            raise CampaignError(
+                f"expires_in_hours must be a number greater than 0 and at most {Config.CAMPAIGN_MAX_TTL_HOURS}"
+            )
+        
+        now = time.time()
+        campaign = {
+            'id': uuid.uuid4().hex[:12],
+            'name': name,
+            'tweet_url': tweet_url,
+            'tweet_id': match.group(1) if match else None,
+            'account': account,
+            'actions': actions,
+            'created_at': now,
+            'expires_at': now + expires_in_hours * 3600,
+            'refresh_interval': Config.CAMPAIGN_MIN_INTERVAL,
+            'next_refresh_at': now,
+            'last_refresh_at': None,
+            'errors': {}
+        }
+        
+        def add(campaigns):
+            campaigns[campaign['id']] = campaign
+        
+        self._update(add)
+        app_logger.info(f"Campaign {campaign['id']} registered ({', '.join(actions)})")
+        return campaign
+    
+    def get(self, campaign_id):
+        """キャンペーンを取得"""
+        campaign = self._load().get(campaign_id)
+        if campaign is None:
+            raise CampaignNotFoundError(f"Campaign not found: {campaign_id}")
+        return campaign
+    
+    def list_campaigns(self):
+        """登録済みのキャンペーン一覧"""
+        return sorted(self._load().values(), key=lambda campaign: campaign['created_at'], reverse=True)
+    
+    def delete(self, campaign_id):
+        """キャンペーンを削除"""
+        def remove(campaigns):
+            return campaigns.pop(campaign_id, None)
+        
+        if self._update(remove) is None:
+            raise CampaignNotFoundError(f"Campaign not found: {campaign_id}")
+    
+    def _load_index(self, campaign, action):
+        """アクションに対応する取得済みの一覧"""
+        if action == 'follow':
+            return follower_index_store.load(campaign['account'])
+        if action == 'repost':
+            return retweeter_index_store.load(campaign['tweet_id'])
+        return replier_index_store.load(campaign['tweet_id'])
+    
+    def verify(self, campaign_id, usernames):
+        """
+        取得済みの一覧から複数ユーザーのアクション状況を回答（ページ遷移なし）
+        
+        Returns:
+            (results, indexes): ユーザーごとのアクション別の結果と、各一覧の状態
+            （一覧が未取得のアクションは結果がNone）
+        """
+        campaign = self.get(campaign_id)
+        
+        if not all(isinstance(username, str) and username for username in usernames):
+            raise CampaignError("users must be a list of usernames")
+        
+        indexes = {}
+        stats = {}
+        for action in campaign['actions']:
+            index = self._load_index(campaign, action)
+            indexes[action] = index
+            stats[action] = index.get_stats() if index else None
+        
+        results = {}
+        for username in usernames:
+            username = username.lstrip('@')
+            actions = {
+                action: self._index_answer(index, username)
+                for action, index in indexes.items()
+            }
+            # 1つでも未実施ならFalse、未取得の一覧があり判定できない場合はNone
+            values = list(actions.values())
+            results[username] = {
+                'actions': actions,
+                'completed': False if False in values else (None if None in values else True)
+            }
+        
+        return results, stats
+    
+    def _index_answer(self, index, username):
+        """
+        一覧での判定（未取得の一覧はNone）
+        
+        スクロール数の上限で途中までしか取得できていない一覧では、載っていなくても未実施とは限らないためNone
+        """
+        if index is None:
+            return None
+        if index.contains(username):
+            return True
+        return False if index.complete else None
+    
+    def start(self):
+        """バックグラウンドの事前確認スレッドを開始"""
+        if not self.enabled or (self.thread and self.thread.is_alive()):
+            return
+        
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='campaign-scheduler', daemon=True)
+        self.thread.start()
+        app_logger.info("Campaign scheduler started")
+    
+    def stop(self):
+        """バックグラウンドスレッドを停止"""
+        self.stop_event.set()
+    
+    def _run(self):
+        """定期実行ループ"""
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                app_logger.error(f"Campaign scheduler tick failed: {e}")
+            
+            self.stop_event.wait(Config.CAMPAIGN_TICK_INTERVAL)
+    
+    def tick(self):
+        """取得時刻を迎えたキャンペーンの一覧を更新（クラスタ内の1ワーカーのみ実行）"""
+        lock = DistributedLock('campaign_scheduler', ttl=3600)
+        if not lock.acquire(blocking=False):
+            return
+        
+        try:
+            now = time.time()
+            for campaign in self.list_campaigns():
+                if campaign['expires_at'] <= now:
+                    self.delete(campaign['id'])
+                    app_logger.info(f"Campaign {campaign['id']} expired")
+                elif campaign['next_refresh_at'] <= now:
+                    self.refresh(campaign['id'])
+        finally:
+            lock.release()
+    
+    def refresh(self, campaign_id):
+        """キャンペーンの一覧を取得し直し、次回の取得時刻を決める"""
+        campaign = self.get(campaign_id)
+        errors = {}
+        
+        for action in campaign['actions']:
+            try:
+                # 事前取得は利用者のリクエストより後回しにする
+                with fair_scheduler.slot('background:campaign', 'bulk'):
+                    if action == 'follow':
+                        with FollowChecker() as checker:
+                            checker.sync_follower_index(campaign['account'], refresh_interval=0)
+                    elif action == 'repost':
+                        with RepostChecker() as checker:
+                            checker.get_retweeter_index(campaign['tweet_id'], refresh_interval=0)
+                    else:
+                        with CommentChecker() as checker:
+                            checker.sync_replier_index(campaign['tweet_id'], Config.CAMPAIGN_REPLY_MAX_SCROLLS)
+            except Exception as e:
+                app_logger.error(f"Campaign {campaign_id} {action} refresh failed: {e}")
+                errors[action] = str(e)
+        
+        # ツイートの返信・リポスト・いいね数（一覧の取得漏れの目安）
+        counts = None
+        if campaign['tweet_id']:
+            try:
+                with fair_scheduler.slot('background:campaign', 'bulk'):
+                    with CommentChecker() as checker:
+                        counts = checker.get_engagement_counts(campaign['tweet_id'])
+            except Exception as e:
+                app_logger.error(f"Campaign {campaign_id} counts refresh failed: {e}")
+                errors['counts'] = str(e)
+        
+        interval = self._next_interval(campaign_id)
+        
+        def update(campaigns):
+            if campaign_id in campaigns:
+                now = time.time()
+                campaigns[campaign_id].update({
+                    'last_refresh_at': now,
+                    'next_refresh_at': now + interval,
+                    'refresh_interval': interval,
+                    'errors': errors
+                })
+                if counts is not None:
+                    campaigns[campaign_id]['counts'] = dict(counts, synced_at=now)
+        
+        self._update(update)
+        app_logger.info(f"Campaign {campaign_id} refreshed (next in {interval}s)")
+    
+    def _next_interval(self, campaign_id):
+        """
+        直近の確認リクエスト数から次回の取得までの間隔を決める
+        
+        CAMPAIGN_CHECKS_PER_REFRESH 件の確認ごとに1回取得する程度の頻度とし、
+        確認が無ければ最大間隔まで延ばす
+        """
+        window = Config.CAMPAIGN_DEMAND_WINDOW
+        try:
+            checks = history_store.count(self.VERIFY_ACTION, campaign_id, time.time() - window)
+        except Exception as e:
+            app_logger.warning(f"Failed to measure campaign demand: {e}")
+            checks = 0
+        
+        if not checks:
+            return Config.CAMPAIGN_MAX_INTERVAL
+        
+        interval = Config.CAMPAIGN_CHECKS_PER_REFRESH * window / checks
+        return int(max(Config.CAMPAIGN_MIN_INTERVAL, min(Config.CAMPAIGN_MAX_INTERVAL, interval)))
+    
+    def to_response(self, campaign):
+        """APIレスポンス用に日時を変換"""
+        def to_iso(timestamp):
+            return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+        
+        data = dict(campaign)
+        for key in ('created_at', 'expires_at', 'next_refresh_at', 'last_refresh_at'):
+            data[key] = to_iso(campaign.get(key))
+        if campaign.get('counts'):
+            data['counts'] = dict(campaign['counts'], synced_at=to_iso(campaign['counts'].get('synced_at')))
+        else:
+            data['counts'] = None
+        return data
+
+# グローバルインスタンス
+campaign_registry = CampaignRegistry(Config.INDEX_DIR)
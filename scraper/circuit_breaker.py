@@ -0,0 +1,207 @@
+import math
+import time
+from config.config import Config
+from scraper.base_scraper import (
+    ScrapingError, NavigationError, RateLimitError, LoginRequiredError, ElementNotFoundError
+)
+from utils.logger import app_logger
+from utils.distributed_lock import DistributedLock, shared_state
+
+class CircuitOpenError(ScrapingError):
+    """X.comへのアクセスを一時停止しているエラー"""
+    
+    def __init__(self, message, failure_class=None, retry_after=None):
+        super().__init__(message)
+        self.failure_class = failure_class
+        self.retry_after = retry_after
+
+class CircuitPermit:
+    """通過を許可されたリクエスト（半開状態で試行を任されたクラスを保持）"""
+    
+    def __init__(self, probes=None):
+        self.probes = probes or {}
+
+class CircuitBreaker:
+    """
+    失敗の種類ごとのサーキットブレーカー（状態はRedisまたはファイルでワーカー間共有）
+    
+    CIRCUIT_WINDOW 秒以内に同じ種類の失敗がしきい値に達すると開き、
+    その間はブラウザを起動せずに即座に失敗させる
+    開いてから一定時間後は1件だけ試行を通し（半開）、成功すれば閉じ、
+    同じ種類で失敗すれば開いている時間を倍にして再び開く
+    """
+    
+    STATE_KEY = 'circuit_breaker'
+    
+    # 失敗の種類（要素が見つからないのは削除済みツイートなどでも起きるため、しきい値を別にする）
+    FAILURE_CLASSES = (
+        ('navigation', NavigationError),
+        ('rate_limit', RateLimitError),
+        ('login', LoginRequiredError),
+        ('element_not_found', ElementNotFoundError)
+    )
+    
+    def __init__(self):
+        self.enabled = Config.CIRCUIT_BREAKER_ENABLED
+    
+    def classify(self, error):
+        """例外を失敗の種類に分類（対象外の例外はNone）"""
+        for failure_class, error_type in self.FAILURE_CLASSES:
+            if isinstance(error, error_type):
+                return failure_class
+        return None
+    
+    def _threshold(self, failure_class):
+        if failure_class == 'element_not_found':
+            return Config.CIRCUIT_NOT_FOUND_THRESHOLD
+        return Config.CIRCUIT_FAILURE_THRESHOLD
+    
+    def allow(self):
+        """
+        リクエストを通してよいか判定
+        
+        Returns:
+            CircuitPermit（結果は record() に渡す）
+        
+        Raises:
+            CircuitOpenError: 開いている、または半開状態で他のリクエストが試行中の場合
+        """
+        if not self.enabled:
+            return CircuitPermit()
+        
+        state = shared_state.get(self.STATE_KEY, {})
+        now = time.time()
+        probes = {}
+        
+        try:
+            for failure_class, entry in state.items():
+                if entry.get('state') != 'open':
+                    continue
+                
+                reopen_at = entry['opened_at'] + entry['open_seconds']
+                if now < reopen_at:
+                    raise CircuitOpenError(
+                        f"Circuit open for {failure_class} failures",
+                        failure_class=failure_class,
+                        retry_after=math.ceil(reopen_at - now)
+                    )
+                
+                # 半開状態: 試行できるのはクラスタ全体で1件のみ
+                lock = DistributedLock(f"circuit_probe_{failure_class}", ttl=Config.CIRCUIT_PROBE_TIMEOUT)
+                if not lock.acquire(blocking=False):
+                    raise CircuitOpenError(
+                        f"Circuit half-open for {failure_class} failures, probe in progress",
+                        failure_class=failure_class,
+                        retry_after=Config.CIRCUIT_PROBE_TIMEOUT
+                    )
+                probes[failure_class] = lock
+                
+        except CircuitOpenError:
+            for lock in probes.values():
+                lock.release()
+            raise
+        
+        if probes:
+            app_logger.info(f"Circuit probe started for {', '.join(probes)}")
+        return CircuitPermit(probes)
+    
+    def record(self, permit, error=None):
+        """リクエストの結果を記録"""
+        if not self.enabled:
+            return
+        
+        failure_class = self.classify(error) if error is not None else None
+        
+        try:
+            # 閉じている状態での成功は記録不要（共有状態への書き込みを避ける）
+            if failure_class is None and not permit.probes:
+                return
+            
+            lock = DistributedLock(self.STATE_KEY, ttl=10)
+            if not lock.acquire(timeout=2):
+                app_logger.warning("Failed to update circuit breaker state: lock busy")
+                return
+            
+            try:
+                state = shared_state.get(self.STATE_KEY, {})
+                now = time.time()
+                
+                for probe_class in permit.probes:
+                    entry = state.setdefault(probe_class, self._new_entry())
+                    if failure_class == probe_class:
+                        open_seconds = min(entry['open_seconds'] * 2, Config.CIRCUIT_MAX_OPEN_SECONDS)
+                        self._open(probe_class, entry, now, open_seconds)
+                    else:
+                        state[probe_class] = dict(self._new_entry(), trips=entry.get('trips', 0))
+                        app_logger.info(f"Circuit closed for {probe_class} failures")
+                
+                if failure_class and failure_class not in permit.probes:
+                    entry = state.setdefault(failure_class, self._new_entry())
+                    failures = [ts for ts in entry['failures'] if ts > now - Config.CIRCUIT_WINDOW]
+                    failures.append(now)
+                    entry['failures'] = failures[-self._threshold(failure_class):]
+                    
+                    if entry['state'] == 'closed' and len(failures) >= self._threshold(failure_class):
+                        self._open(failure_class, entry, now, Config.CIRCUIT_OPEN_SECONDS)
+                
+                shared_state.set(self.STATE_KEY, state)
+            finally:
+                lock.release()
+                
+        finally:
+            self.release(permit)
+    
+    def release(self, permit):
+        """試行の権利を返却（結果を記録せずに終わった場合も呼び出す）"""
+        for probe_lock in permit.probes.values():
+            probe_lock.release()
+    
+    def _new_entry(self):
+        return {
+            'state': 'closed',
+            'failures': [],
+            'opened_at': None,
+            'open_seconds': Config.CIRCUIT_OPEN_SECONDS,
+            'trips': 0
+        }
+    
+    def _open(self, failure_class, entry, now, open_seconds):
+        """サーキットを開く"""
+        entry.update({
+            'state': 'open',
+            'failures': [],
+            'opened_at': now,
+            'open_seconds': open_seconds,
+            'trips': entry.get('trips', 0) + 1
+        })
+        app_logger.warning(f"Circuit opened for {failure_class} failures ({open_seconds}s)")
+    
+    def get_status(self):
+        """種類ごとの状態"""
+        state = shared_state.get(self.STATE_KEY, {}) if self.enabled else {}
+        now = time.time()
+        
+        status = {}
+        for failure_class, _ in self.FAILURE_CLASSES:
+            entry = state.get(failure_class) or self._new_entry()
+            current = entry['state']
+            retry_after = None
+            if current == 'open':
+                reopen_at = entry['opened_at'] + entry['open_seconds']
+                if now >= reopen_at:
+                    current = 'half_open'
+                else:
+                    retry_after = math.ceil(reopen_at - now)
+            
+            status[failure_class] = {
+                'state': current,
+                'recent_failures': len([ts for ts in entry['failures'] if ts > now - Config.CIRCUIT_WINDOW]),
+                'threshold': self._threshold(failure_class),
+                'retry_after': retry_after,
+                'trips': entry.get('trips', 0)
+            }
+        
+        return {'enabled': self.enabled, 'circuits': status}
+
+# グローバルインスタンス
+circuit_breaker = CircuitBreaker()
@@ -1,40 +1,144 @@
 import time
-import re
-from scraper.base_scraper import BaseScraper, ScrapingError, ElementNotFoundError
+from urllib.parse import quote
+from scraper.base_scraper import (
+    BaseScraper, ScrapingError, LoginRequiredError, NavigationError, ElementNotFoundError, RateLimitError,
+    RequestAbortedError
+)
+from scraper.reply_index import ReplyIndex, reply_index_cache
+from scraper.index_store import replier_index_store
 from utils.logger import app_logger
 from config.config import Config
 
 class CommentChecker(BaseScraper):
     """コメント確認クラス"""
     
-    def check_comment_status(self, tweet_url, checking_username):
-        """コメント状態をチェック"""
+    # 未処理の投稿から投稿者・本文・時刻・IDをまとめて抽出するスクリプト
+    # 処理済みの要素には data-xsa-seen 属性を付けて次回以降スキップする
+    COLLECT_COMMENTS_JS = """
+    const target = arguments[0] ? arguments[0].toLowerCase() : null;
+    const comments = [];
+    let scanned = 0;
+    for (const article of document.querySelectorAll('article[data-testid="tweet"]')) {
+        if (article.dataset.xsaSeen) continue;
+        article.dataset.xsaSeen = '1';
+        scanned++;
+        
+        let author = null;
+        const userLink = article.querySelector('[data-testid="User-Names"] a[href^="/"]');
+        if (userLink) {
+            const match = userLink.getAttribute('href').match(/^\\/([^\\/?#]+)/);
+            if (match) author = match[1];
+        }
+        if (!author || (target && author.toLowerCase() !== target)) continue;
+        
+        let commentId = null;
+        let timestamp = null;
+        const timeElement = article.querySelector('time');
+        if (timeElement) timestamp = timeElement.getAttribute('datetime');
+        const statusLink = (timeElement && timeElement.closest('a[href*="/status/"]'))
+            || article.querySelector('a[href*="/status/"]');
+        if (statusLink) {
+            const match = statusLink.getAttribute('href').match(/\\/status\\/(\\d+)/);
+            if (match) commentId = match[1];
+        }
+        
+        const textElement = article.querySelector('[data-testid="tweetText"], div[lang]');
+        comments.push({
+            username: author,
+            text: textElement ? textElement.innerText.trim() : '',
+            timestamp: timestamp,
+            comment_id: commentId
+        });
+    }
+    return {scanned: scanned, comments: comments};
+    """
+    
+    # 返信の探し方（auto: 検索で見つからなければスクロール, search: 検索のみ, scroll: スクロールのみ）
+    LOOKUP_STRATEGIES = ('auto', 'search', 'scroll')
+    
+    # 検索結果の表示状態（results: 結果あり, empty: 該当なし, null: 読み込み中）
+    SEARCH_STATE_JS = """
+    if (document.querySelector('article[data-testid="tweet"]')) return 'results';
+    if (document.querySelector('[data-testid="empty_state_header_text"]')) return 'empty';
+    return null;
+    """
+    
+    # 表示中のツイート（返信先があればその下の対象ツイート）の返信・リポスト・いいね数の表示テキスト
+    ENGAGEMENT_COUNTS_JS = """
+    const article = document.querySelector('article[data-testid="tweet"][tabindex="-1"]')
+        || document.querySelector('article[data-testid="tweet"]');
+    if (!article) return null;
+    const counts = {};
+    for (const [name, ids] of [['replies', ['reply']], ['reposts', ['retweet', 'unretweet']], ['likes', ['like', 'unlike']]]) {
+        for (const id of ids) {
+            const button = article.querySelector(`[data-testid="${id}"]`);
+            if (button) {
+                const text = button.querySelector('[data-testid="app-text-transition-container"]');
+                counts[name] = text ? text.innerText.trim() : '';
+                break;
+            }
+        }
+    }
+    return counts;
+    """
+    
+    NEW_ARTICLES_JS = """
+    return document.querySelectorAll('article[data-testid="tweet"]:not([data-xsa-seen])').length > 0;
+    """
+    
+    def check_comment_status(self, tweet_url, checking_username, collect_all=False, lookup_strategy=None):
+        """
+        コメント状態をチェック（collect_all=False の場合は最初のコメントが見つかった時点で終了）
+        
+        lookup_strategy: 'auto'（検索で見つからなければスクロール）, 'search', 'scroll'
+        """
         try:
-            if not self.is_logged_in:
-                if not self.login_to_x():
-                    raise ScrapingError("Login required but failed")
-            
             # ツイートURLの正規化
             normalized_url = self._normalize_tweet_url(tweet_url)
             if not normalized_url:
                 raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
+            self.prefer_url(normalized_url)
+            
+            # ブラウザやログインの前に検索方法を確認
+            strategy = lookup_strategy or Config.COMMENT_LOOKUP_STRATEGY
+            if strategy not in self.LOOKUP_STRATEGIES:
+                raise ScrapingError(f"Invalid lookup strategy: {strategy}")
             
             # ユーザー名の正規化
             if checking_username.startswith('@'):
                 checking_username = checking_username[1:]
             
-            # ツイートページに移動
-            if not self.navigate_to_url(normalized_url):
-                raise ScrapingError(f"Failed to navigate to tweet: {normalized_url}")
+            # 返信インデックスで確認済みならブラウザを使わずに回答
+            tweet_id = normalized_url.rsplit('/', 1)[-1]
+            index = reply_index_cache.get(tweet_id)
+            if index and index.contains(checking_username) and (index.complete or not collect_all):
+                app_logger.info(f"Comment check for @{checking_username} answered from reply index")
+                return index.lookup(checking_username)
             
-            # ページ読み込み完了を待機
-            self.wait_for_page_load()
-            self.random_delay(2, 4)
+            if not self.is_logged_in:
+                if not self.login_to_x():
+                    raise LoginRequiredError("Login required but failed")
+            
+            comment_status = None
+            
+            # 検索で対象ユーザーの返信だけを取得
+            if strategy in ('auto', 'search'):
+                comment_status = self._search_user_replies(tweet_id, checking_username, collect_all)
+            
+            # 検索で見つからない場合はツイートの返信をスクロールして確認
+            if comment_status is None and strategy in ('auto', 'scroll'):
+                comment_status = self._scroll_user_replies(
+                    normalized_url, tweet_id, checking_username, collect_all
+                )
             
-            # コメント状態を確認
-            comment_status = self._check_user_comments(checking_username)
+            if comment_status is None:
+                comment_status = {
+                    'has_commented': False,
+                    'comment_count': 0,
+                    'comments': []
+                }
             
-            app_logger.info(f"Comment check completed for @{checking_username}: {comment_status}")
+            app_logger.info(f"Comment check completed for @{checking_username} ({strategy}): {comment_status}")
             
             return {
                 'has_commented': comment_status['has_commented'],
@@ -44,52 +148,217 @@ class CommentChecker(BaseScraper):
             
         except Exception as e:
             app_logger.error(f"Comment check failed for {tweet_url}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
             raise ScrapingError(f"Comment check failed: {e}")
     
-    def _normalize_tweet_url(self, tweet_url):
-        """ツイートURLを正規化"""
+    def _search_user_replies(self, tweet_id, username, collect_all=False):
+        """X検索（conversation_id + from）で返信を取得（見つからない場合はNone）"""
         try:
-            # URLパターンのマッチング
-            patterns = [
-                r'https?://(?:www\.)?(?:twitter\.com|x\.com)/\w+/status/(\d+)',
-                r'https?://(?:www\.)?(?:twitter\.com|x\.com)/i/web/status/(\d+)',
-                r'(\d{15,20})'  # ツイートIDのみ
-            ]
+            query = f"conversation_id:{tweet_id} from:{username}"
+            search_url = f"{Config.X_BASE_URL}/search?q={quote(query)}&src=typed_query&f=live"
             
-            for pattern in patterns:
-                match = re.search(pattern, tweet_url)
-                if match:
-                    tweet_id = match.group(1)
-                    return f"{Config.X_BASE_URL}/i/web/status/{tweet_id}"
+            if not self.navigate_to_url(search_url):
+                app_logger.warning(f"Failed to open search for @{username}, falling back to scroll")
+                return None
             
-            return None
+            if self._wait_for_search_results() != 'results':
+                app_logger.info(f"No search results for @{username} in conversation {tweet_id}")
+                return None
+            
+            comment_status = self._check_user_comments(
+                username,
+                collect_all=collect_all,
+                exclude_id=tweet_id,
+                max_scroll_attempts=2
+            )
             
+            if not comment_status['has_commented']:
+                return None
+            
+            return comment_status
+            
+        except (RequestAbortedError, RateLimitError):
+            raise
         except Exception as e:
-            app_logger.error(f"Failed to normalize tweet URL: {e}")
+            app_logger.warning(f"Search-based reply lookup failed: {e}")
             return None
     
-    def _check_user_comments(self, username):
-        """指定ユーザーのコメントをチェック"""
+    def _wait_for_search_results(self):
+        """検索結果の表示を待機"""
+        end_time = time.time() + self.bounded_timeout(Config.SEARCH_RESULT_TIMEOUT)
+        while time.time() < end_time:
+            state = self.page.run_js(self.SEARCH_STATE_JS)
+            if state:
+                return state
+            time.sleep(0.2)
+        return None
+    
+    def _scroll_user_replies(self, normalized_url, tweet_id, username, collect_all=False):
+        """ツイートページの返信をスクロールして確認"""
+        # ツイートページに移動
+        if not self.navigate_to_url(normalized_url):
+            raise NavigationError(f"Failed to navigate to tweet: {normalized_url}")
+        
+        # ページ読み込み完了を待機
+        self.wait_for_page_load()
+        self.random_delay(2, 4)
+        
+        # コメント状態を確認（元ツイート自体はコメントとして扱わない）
+        return self._check_user_comments(
+            username,
+            collect_all=collect_all,
+            exclude_id=tweet_id
+        )
+    
+    def check_comment_status_bulk(self, tweet_url, checking_usernames, max_scroll_attempts=None):
+        """1回の返信クロールで複数ユーザーのコメント状態をチェック"""
+        try:
+            normalized_url = self._normalize_tweet_url(tweet_url)
+            if not normalized_url:
+                raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
+            
+            tweet_id = normalized_url.rsplit('/', 1)[-1]
+            usernames = [username.lstrip('@') for username in checking_usernames if username]
+            
+            # キャッシュ済みのインデックスを再利用し、未確認のユーザーがいる場合のみ追加でクロール
+            index = reply_index_cache.get(tweet_id)
+            from_cache = index is not None
+            if index is None:
+                index = ReplyIndex(tweet_id)
+            
+            missing = [username for username in usernames if not index.contains(username)]
+            if missing and not index.complete:
+                self._extend_reply_index(
+                    normalized_url,
+                    index,
+                    max_scroll_attempts or Config.REPLY_INDEX_MAX_SCROLLS
+                )
+                reply_index_cache.put(index)
+                from_cache = False
+            
+            results = {username: index.lookup(username) for username in usernames}
+            commented = [username for username, status in results.items() if status['has_commented']]
+            
+            app_logger.info(
+                f"Bulk comment check completed for tweet {tweet_id}: "
+                f"{len(commented)}/{len(usernames)} users commented"
+            )
+            
+            index_stats = index.get_stats()
+            index_stats['from_cache'] = from_cache
+            
+            return {
+                'tweet_id': tweet_id,
+                'checked_users': len(usernames),
+                'commented_users': commented,
+                'results': results,
+                'index': index_stats
+            }
+            
+        except Exception as e:
+            app_logger.error(f"Bulk comment check failed for {tweet_url}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
+            raise ScrapingError(f"Bulk comment check failed: {e}")
+    
+    def sync_replier_index(self, tweet_url, max_scroll_attempts=None):
+        """
+        返信をクロールし直して返信したユーザーの一覧を永続化（全ワーカーで共有）
+        
+        返信は時系列順に表示されないため差分取得はせず、毎回先頭からクロールする
+        """
+        normalized_url = self._normalize_tweet_url(tweet_url)
+        if not normalized_url:
+            raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
+        
+        tweet_id = normalized_url.rsplit('/', 1)[-1]
+        index = ReplyIndex(tweet_id)
+        self._extend_reply_index(
+            normalized_url,
+            index,
+            max_scroll_attempts or Config.REPLY_INDEX_MAX_SCROLLS
+        )
+        reply_index_cache.put(index)
+        
+        return replier_index_store.write(tweet_id, index.usernames(), complete=index.complete)
+    
+    def _extend_reply_index(self, normalized_url, index, max_scroll_attempts):
+        """ツイートの返信をクロールしてインデックスに追加"""
+        if not self.is_logged_in:
+            if not self.login_to_x():
+                raise LoginRequiredError("Login required but failed")
+        
+        if not self.navigate_to_url(normalized_url):
+            raise NavigationError(f"Failed to navigate to tweet: {normalized_url}")
+        
+        self.wait_for_page_load()
+        self.random_delay(1, 2)
+        
+        # 新しい返信が得られたスクロールのみ予算に数え、既知の範囲は読み飛ばす
+        productive_scrolls = 0
+        total_scrolls = 0
+        added_total = 0
+        reached_end = False
+        
+        while True:
+            added = 0
+            for comment in self._collect_new_comments():
+                if index.add(comment):
+                    added += 1
+            
+            added_total += added
+            if added:
+                productive_scrolls += 1
+            
+            if productive_scrolls >= max_scroll_attempts or total_scrolls >= max_scroll_attempts * 3:
+                break
+            
+            if not self._scroll_to_load_more_comments():
+                # これ以上読み込める返信がない
+                reached_end = True
+                break
+            
+            total_scrolls += 1
+        
+        index.mark_crawled(reached_end)
+        
+        app_logger.info(
+            f"Reply index for tweet {index.tweet_id} extended by {added_total} comments "
+            f"({total_scrolls} scrolls, complete: {index.complete})"
+        )
+    
+    def _check_user_comments(self, username, collect_all=False, exclude_id=None, max_scroll_attempts=5):
+        """指定ユーザーのコメントをチェック（処理済みの投稿はスキップ）"""
         try:
             comments_found = []
-            max_scroll_attempts = 5
+            seen_ids = set()
+            if exclude_id:
+                seen_ids.add(exclude_id)
             scroll_attempts = 0
             
-            while scroll_attempts < max_scroll_attempts:
-                # 現在表示されているコメントを取得
-                current_comments = self._get_visible_comments(username)
+            while True:
+                # 前回以降に表示された投稿のうち対象ユーザーのものだけを取得
+                for comment in self._collect_new_comments(username):
+                    comment_id = comment.get('comment_id')
+                    if comment_id:
+                        if comment_id in seen_ids:
+                            continue
+                        seen_ids.add(comment_id)
+                    comments_found.append(comment)
+                
+                # 全件取得が不要なら最初に見つかった時点で終了
+                if comments_found and not collect_all:
+                    break
                 
-                # 新しいコメントがあれば追加
-                for comment in current_comments:
-                    if comment not in comments_found:
-                        comments_found.append(comment)
+                if scroll_attempts >= max_scroll_attempts:
+                    break
                 
                 # さらにコメントを読み込むためにスクロール
                 if not self._scroll_to_load_more_comments():
                     break
                 
                 scroll_attempts += 1
-                self.random_delay(2, 3)
             
             return {
                 'has_commented': len(comments_found) > 0,
@@ -97,6 +366,8 @@ class CommentChecker(BaseScraper):
                 'comments': comments_found
             }
             
+        except RequestAbortedError:
+            raise
         except Exception as e:
             app_logger.error(f"Failed to check user comments: {e}")
             return {
@@ -105,147 +376,43 @@ class CommentChecker(BaseScraper):
                 'comments': []
             }
     
-    def _get_visible_comments(self, username):
-        """現在表示されているコメントから指定ユーザーのものを取得"""
+    def _collect_new_comments(self, username=None):
+        """未処理の投稿をページ内で抽出（usernameを指定した場合はその投稿者のみ）"""
         try:
-            comments = []
-            
-            # コメント要素の候補セレクタ
-            comment_selectors = [
-                '[data-testid="tweet"]',
-                'article[data-testid="tweet"]',
-                'div[data-testid="tweet"]'
-            ]
-            
-            comment_elements = []
-            for selector in comment_selectors:
-                try:
-                    elements = self.page.eles(selector, timeout=3)
-                    if elements:
-                        comment_elements.extend(elements)
-                        break
-                except:
-                    continue
-            
-            if not comment_elements:
-                return comments
-            
-            # 各コメント要素をチェック
-            for element in comment_elements:
-                try:
-                    comment_info = self._extract_comment_info(element, username)
-                    if comment_info:
-                        comments.append(comment_info)
-                except Exception as e:
-                    app_logger.debug(f"Failed to extract comment info: {e}")
-                    continue
-            
-            return comments
+            result = self.page.run_js(self.COLLECT_COMMENTS_JS, username)
+            if not result:
+                return []
+            return result.get('comments', [])
             
         except Exception as e:
-            app_logger.error(f"Failed to get visible comments: {e}")
+            app_logger.error(f"Failed to collect comments: {e}")
             return []
     
-    def _extract_comment_info(self, comment_element, target_username):
-        """コメント要素から情報を抽出"""
-        try:
-            # ユーザー名を取得
-            username_selectors = [
-                '[data-testid="User-Names"] a[href*="/"]',
-                'a[role="link"][href*="/"]',
-                '[data-testid="User-Names"] span'
-            ]
-            
-            comment_username = None
-            for selector in username_selectors:
-                try:
-                    username_element = comment_element.ele(selector, timeout=1)
-                    if username_element:
-                        href = username_element.attr('href')
-                        if href:
-                            # URLからユーザー名を抽出
-                            username_match = re.search(r'/([^/]+)$', href)
-                            if username_match:
-                                comment_username = username_match.group(1)
-                                break
-                        else:
-                            # テキストからユーザー名を取得
-                            text = username_element.text.strip()
-                            if text.startswith('@'):
-                                comment_username = text[1:]
-                            elif text:
-                                comment_username = text
-                            break
-                except:
-                    continue
-            
-            # 対象ユーザーでない場合はスキップ
-            if not comment_username or comment_username.lower() != target_username.lower():
-                return None
-            
-            # コメント本文を取得
-            text_selectors = [
-                '[data-testid="tweetText"]',
-                'div[lang]',
-                'span[lang]'
-            ]
-            
-            comment_text = ""
-            for selector in text_selectors:
-                try:
-                    text_element = comment_element.ele(selector, timeout=1)
-                    if text_element:
-                        comment_text = text_element.text.strip()
-                        break
-                except:
-                    continue
-            
-            # 投稿時刻を取得
-            time_element = comment_element.ele('time', timeout=1)
-            timestamp = None
-            if time_element:
-                timestamp = time_element.attr('datetime')
-            
-            # コメントIDを取得（重複チェック用）
-            comment_id = None
-            link_elements = comment_element.eles('a[href*="/status/"]')
-            for link in link_elements:
-                href = link.attr('href')
-                if href:
-                    id_match = re.search(r'/status/(\d+)', href)
-                    if id_match:
-                        comment_id = id_match.group(1)
-                        break
-            
-            return {
-                'username': comment_username,
-                'text': comment_text,
-                'timestamp': timestamp,
-                'comment_id': comment_id
-            }
-            
-        except Exception as e:
-            app_logger.debug(f"Failed to extract comment info: {e}")
-            return None
+    def _scroll_to_load_more_comments(self, timeout=5):
+        """さらにコメントを読み込むためにスクロールし、新しい投稿の表示を待機"""
+        return self.scroll_for_new_elements(self.NEW_ARTICLES_JS, timeout=timeout)
     
-    def _scroll_to_load_more_comments(self):
-        """さらにコメントを読み込むためにスクロール"""
-        try:
-            # 現在のページの高さを取得
-            initial_height = self.page.run_js('return document.body.scrollHeight')
-            
-            # ページの下部にスクロール
-            self.page.scroll.to_bottom()
-            time.sleep(2)
-            
-            # 新しいコンテンツが読み込まれたかチェック
-            new_height = self.page.run_js('return document.body.scrollHeight')
-            
-            return new_height > initial_height
-            
-        except Exception as e:
-            app_logger.debug(f"Failed to scroll for more comments: {e}")
-            return False
+    def get_engagement_counts(self, tweet_url):
+        """ツイートの返信・リポスト・いいね数を取得（表示されていない数は含めない）"""
+        normalized_url = self._normalize_tweet_url(tweet_url)
+        if not normalized_url:
+            raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
+        
+        if not self.is_logged_in:
+            if not self.login_to_x():
+                raise LoginRequiredError("Login required but failed")
+        
+        if not self.navigate_to_url(normalized_url):
+            raise NavigationError(f"Failed to navigate to tweet: {normalized_url}")
+        
+        self.wait_for_page_load()
+        
+        counts = self.page.run_js(self.ENGAGEMENT_COUNTS_JS)
+        if counts is None:
+            raise ElementNotFoundError(f"Tweet not found: {normalized_url}")
+        
+        # 0件のボタンは数を表示しない
+        return {name: self._parse_count_text(text) if text else 0 for name, text in counts.items()}
     
     def get_total_comment_count(self, tweet_url):
         """ツイートの総コメント数を取得"""
@@ -308,7 +475,7 @@ class CommentChecker(BaseScraper):
     def check_specific_comment_exists(self, tweet_url, comment_text, username):
         """特定のコメント内容が存在するかチェック"""
         try:
-            comment_status = self.check_comment_status(tweet_url, username)
+            comment_status = self.check_comment_status(tweet_url, username, collect_all=True)
             
             if not comment_status['has_commented']:
                 return False
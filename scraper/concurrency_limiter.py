@@ -0,0 +1,131 @@
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from config.config import Config
+from scraper.browser_pool import browser_pool
+from scraper.retry_policy import classify_error
+from scraper.scheduler import fair_scheduler
+from utils.logger import app_logger
+
+def memory_available_percent():
+    """ホストの利用可能メモリの割合（%、取得できなければNone）"""
+    try:
+        values = {}
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                values[key] = int(value.split()[0])
+        return values['MemAvailable'] * 100.0 / values['MemTotal']
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return None
+
+class AdaptiveConcurrencyLimiter:
+    """
+    スクレイピングの同時実行数の自動調整（AIMD、ワーカーごと）
+    
+    現在の同時実行数と同じ件数の確認が、失敗なく所要時間の目標内に終わるたびに1ずつ増やし、
+    X.comのレート制限・タイムアウトなど一時的な失敗、またはメモリ不足を検出したら
+    CONCURRENCY_BACKOFF 倍に減らす（減らした直後の CONCURRENCY_COOLDOWN 秒間は再度減らさない）
+    調整した値はスクレイピング枠の数とブラウザプールのタブ数に反映する
+    """
+    
+    # 減らす原因となる失敗の種類
+    DECREASE_CATEGORIES = {'throttle': 'rate_limit', 'transient': 'timeout'}
+    
+    def __init__(self):
+        self.enabled = Config.ADAPTIVE_CONCURRENCY_ENABLED and fair_scheduler.enabled
+        self.min_limit = max(Config.CONCURRENCY_MIN, 1)
+        self.max_limit = max(Config.CONCURRENCY_MAX, self.min_limit)
+        self.limit = float(min(max(fair_scheduler.capacity, self.min_limit), self.max_limit))
+        self.window = []
+        self.last_decrease = 0.0
+        self.last_memory_check = 0.0
+        self.history = deque(maxlen=Config.CONCURRENCY_HISTORY_SIZE)
+        self.lock = threading.Lock()
+        
+        if self.enabled:
+            self._apply('initial')
+    
+    def record(self, duration, error=None):
+        """確認の結果を反映"""
+        if not self.enabled:
+            return
+        
+        with self.lock:
+            reason = self._congestion(error)
+            if reason:
+                self._decrease(reason)
+                return
+            
+            if error is not None:
+                return
+            
+            self.window.append(duration)
+            if len(self.window) < int(self.limit):
+                return
+            
+            # 同時実行数と同じ件数ごとに所要時間を評価して1つ増やす
+            window, self.window = sorted(self.window), []
+            p90 = window[min(len(window) - 1, int(len(window) * 0.9))]
+            if p90 <= Config.CONCURRENCY_LATENCY_TARGET and self.limit < self.max_limit:
+                self.limit = min(self.limit + 1, self.max_limit)
+                self._apply('increase', p90=round(p90, 3))
+    
+    def _congestion(self, error):
+        """減らすべき状況の原因（無ければNone、ロック内で呼び出す）"""
+        if error is not None:
+            reason = self.DECREASE_CATEGORIES.get(classify_error(error))
+            if reason:
+                return reason
+        
+        # メモリの確認は数秒おき
+        now = time.monotonic()
+        if now - self.last_memory_check >= 5:
+            self.last_memory_check = now
+            available = memory_available_percent()
+            if available is not None and available < Config.CONCURRENCY_MIN_FREE_MEMORY:
+                return 'memory'
+        
+        return None
+    
+    def _decrease(self, reason):
+        """同時実行数を乗算的に減らす（ロック内で呼び出す）"""
+        now = time.monotonic()
+        self.window = []
+        if now - self.last_decrease < Config.CONCURRENCY_COOLDOWN or self.limit <= self.min_limit:
+            return
+        
+        self.last_decrease = now
+        self.limit = max(self.limit * Config.CONCURRENCY_BACKOFF, self.min_limit)
+        self._apply(reason)
+        app_logger.warning(f"Scrape concurrency reduced to {int(self.limit)} ({reason})")
+    
+    def _apply(self, reason, **details):
+        """調整した値を反映し、履歴に記録（ロック内で呼び出す）"""
+        limit = int(self.limit)
+        fair_scheduler.set_capacity(limit)
+        browser_pool.resize(limit)
+        self.history.append(dict({
+            'at': datetime.utcnow().isoformat(),
+            'limit': limit,
+            'reason': reason
+        }, **details))
+    
+    def _rounded(self, value):
+        return round(value, 1) if value is not None else None
+    
+    def get_status(self):
+        """現在の同時実行数と調整の履歴"""
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'limit': int(self.limit),
+                'min': self.min_limit,
+                'max': self.max_limit,
+                'memory_available_percent': self._rounded(memory_available_percent()),
+                'history': list(self.history)
+            }
+
+# グローバルインスタンス
+concurrency_limiter = AdaptiveConcurrencyLimiter()
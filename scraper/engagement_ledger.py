@@ -0,0 +1,213 @@
+import re
+import time
+import threading
+from datetime import datetime
+from config.config import Config
+from scraper.base_scraper import BaseScraper, ScrapingError, LoginRequiredError
+from scraper.index_store import UserIndexStore
+from scraper.scheduler import fair_scheduler
+from utils.logger import app_logger
+from utils.distributed_lock import DistributedLock, shared_state
+
+class EngagementLedger:
+    """
+    ログイン中アカウント自身のフォロー・いいね・リポストの台帳
+    
+    自分のフォロー中一覧・いいね欄・プロフィールのタイムラインを差分同期しておき、
+    台帳が新しいうちは確認APIをページ遷移なしで回答する（台帳に無い場合はページで確認）
+    """
+    
+    STATE_KEY = 'engagement_ledger'
+    KINDS = ('following', 'likes', 'reposts')
+    
+    def __init__(self):
+        self.enabled = Config.LEDGER_ENABLED
+        self.interval = Config.LEDGER_SYNC_INTERVAL
+        self.max_age = Config.LEDGER_MAX_AGE
+        self.rebuild_interval = Config.LEDGER_REBUILD_INTERVAL
+        self.stores = {
+            kind: UserIndexStore(Config.INDEX_DIR, f"ledger_{kind}", r'[a-z0-9_]{1,15}')
+            for kind in self.KINDS
+        }
+        self.hits = {kind: 0 for kind in self.KINDS}
+        self.misses = {kind: 0 for kind in self.KINDS}
+        self.stats_lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.next_sync_at = None
+    
+    def get_account(self):
+        """台帳の対象アカウント（設定が無ければ同期時に検出した値）"""
+        account = Config.LEDGER_ACCOUNT or shared_state.get(self.STATE_KEY, {}).get('account')
+        return account.lstrip('@').lower() if account else None
+    
+    def lookup(self, kind, value):
+        """
+        台帳で確認
+        
+        Returns:
+            True: 台帳に記録あり / None: 台帳が無い・古い、または記録なし（ページで確認する）
+        """
+        if not self.enabled:
+            return None
+        
+        account = self.get_account()
+        index = self.stores[kind].load(account) if account else None
+        found = bool(index and time.time() - (index.synced_at or 0) < self.max_age and index.contains(value))
+        
+        with self.stats_lock:
+            if found:
+                self.hits[kind] += 1
+            else:
+                self.misses[kind] += 1
+        
+        return True if found else None
+    
+    def start(self):
+        """バックグラウンド同期スレッドを開始"""
+        if not self.enabled or (self.thread and self.thread.is_alive()):
+            return
+        
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='engagement-ledger', daemon=True)
+        self.thread.start()
+        app_logger.info(f"Engagement ledger sync started (interval: {self.interval}s)")
+    
+    def stop(self):
+        """バックグラウンド同期スレッドを停止"""
+        self.stop_event.set()
+    
+    def _run(self):
+        """定期同期ループ"""
+        while not self.stop_event.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                app_logger.error(f"Engagement ledger sync failed: {e}")
+            
+            self.next_sync_at = time.time() + self.interval
+            self.stop_event.wait(self.interval)
+    
+    def sync(self, kinds=None, full=False):
+        """
+        台帳を同期（クラスタ内の1ワーカーのみ実行）
+        
+        通常は各一覧の先頭から既知の項目に達するまでの差分のみ取得し、
+        LEDGER_REBUILD_INTERVAL 秒ごと（または full=True）に一覧全体を取得し直す
+        （差分同期ではフォロー解除・いいね取り消しが反映されないため）
+        """
+        kinds = kinds or self.KINDS
+        lock = DistributedLock('engagement_ledger', ttl=3600)
+        if not lock.acquire(blocking=False):
+            # 他のワーカーが同期中
+            return None
+        
+        try:
+            results = {}
+            account = self.get_account()
+            
+            # 台帳の同期は利用者のリクエストより後回しにし、一覧ごとに枠を返却する
+            for kind in kinds:
+                with fair_scheduler.slot('background:ledger', 'bulk'):
+                    with LedgerSyncScraper() as scraper:
+                        account = account or scraper.detect_own_account()
+                        if not account:
+                            raise ScrapingError("Could not determine the logged-in account for the ledger")
+                        
+                        try:
+                            results[kind] = self._sync_kind(scraper, account, kind, full)
+                        except Exception as e:
+                            # 1種類の失敗で他の一覧の同期を止めない
+                            app_logger.error(f"Ledger {kind} sync failed for @{account}: {e}")
+                            results[kind] = {'error': str(e)}
+            
+            state = shared_state.get(self.STATE_KEY, {})
+            state.update({'account': account, 'last_sync_at': time.time()})
+            shared_state.set(self.STATE_KEY, state)
+            return results
+            
+        finally:
+            lock.release()
+    
+    def _sync_kind(self, scraper, account, kind, full):
+        """1種類の一覧を同期"""
+        store = self.stores[kind]
+        index = store.load(account)
+        
+        # 他のワーカーが直近に同期済みならスキップ
+        if index and not full and not index.needs_refresh(self.interval * 0.9):
+            return index.get_stats()
+        
+        rebuild = full or index is None or time.time() - index.created_at >= self.rebuild_interval
+        known = None if rebuild else index.users
+        max_scrolls = Config.LEDGER_MAX_SCROLLS if rebuild else None
+        
+        if kind == 'following':
+            items, reached_end = scraper.crawl_user_list(
+                f"{Config.X_BASE_URL}/{account}/following", known, max_scrolls
+            )
+        elif kind == 'likes':
+            items, reached_end = scraper.crawl_tweet_ids(
+                f"{Config.X_BASE_URL}/{account}/likes", known, max_scroll_attempts=max_scrolls
+            )
+        else:
+            items, reached_end = scraper.crawl_tweet_ids(
+                f"{Config.X_BASE_URL}/{account}", known, reposts_only=True, max_scroll_attempts=max_scrolls
+            )
+        
+        if rebuild:
+            index = store.write(account, items, complete=reached_end)
+        else:
+            index = store.write(account, items, base=index)
+        
+        app_logger.info(f"Ledger {kind} for @{account} synced ({len(items)} items seen, total {len(index)})")
+        return index.get_stats()
+    
+    def get_status(self):
+        """台帳の状態を取得"""
+        account = self.get_account()
+        state = shared_state.get(self.STATE_KEY, {})
+        last_sync_at = state.get('last_sync_at')
+        
+        indexes = {}
+        for kind in self.KINDS:
+            index = self.stores[kind].load(account) if account else None
+            if index:
+                indexes[kind] = index.get_stats()
+                indexes[kind]['fresh'] = time.time() - (index.synced_at or 0) < self.max_age
+            else:
+                indexes[kind] = None
+        
+        with self.stats_lock:
+            hits = dict(self.hits)
+            misses = dict(self.misses)
+        
+        return {
+            'enabled': self.enabled,
+            'account': account,
+            'running': bool(self.thread and self.thread.is_alive()),
+            'last_sync_at': datetime.utcfromtimestamp(last_sync_at).isoformat() if last_sync_at else None,
+            'next_sync_at': datetime.utcfromtimestamp(self.next_sync_at).isoformat() if self.next_sync_at else None,
+            'indexes': indexes,
+            'hits': hits,
+            'misses': misses
+        }
+
+class LedgerSyncScraper(BaseScraper):
+    """台帳同期用のスクレイパー"""
+    
+    def detect_own_account(self):
+        """ナビゲーションのプロフィールリンクからログイン中のアカウント名を取得"""
+        if not self.is_logged_in:
+            if not self.login_to_x():
+                raise LoginRequiredError("Login required but failed")
+        
+        if not self.navigate_to_url(Config.SESSION_PROBE_URL):
+            return None
+        
+        link = self.page.ele('a[data-testid="AppTabBar_Profile_Link"]', timeout=10)
+        match = re.fullmatch(r'/([A-Za-z0-9_]{1,15})', link.attr('href') or '') if link else None
+        return match.group(1).lower() if match else None
+
+# グローバルインスタンス
+engagement_ledger = EngagementLedger()
@@ -1,6 +1,9 @@
 import time
-from scraper.base_scraper import BaseScraper, ScrapingError, ElementNotFoundError
+from scraper.base_scraper import BaseScraper, timed_stage, ScrapingError, LoginRequiredError, NavigationError, ElementNotFoundError
+from scraper.index_store import follower_index_store
+from scraper.engagement_ledger import engagement_ledger
 from utils.logger import app_logger
+from utils.distributed_lock import DistributedLock
 from config.config import Config
 
 class FollowChecker(BaseScraper):
@@ -9,20 +12,31 @@ class FollowChecker(BaseScraper):
     def check_follow_status(self, target_username):
         """フォロー状態をチェック"""
         try:
-            if not self.is_logged_in:
-                if not self.login_to_x():
-                    raise ScrapingError("Login required but failed")
-            
             # ユーザー名の正規化
             if target_username.startswith('@'):
                 target_username = target_username[1:]
             
             # プロフィールページのURL構築
             profile_url = f"{Config.X_BASE_URL}/{target_username}"
+            self.prefer_url(profile_url)
+            
+            # 台帳にフォロー中として記録されていればページを開かずに回答
+            if engagement_ledger.lookup('following', target_username):
+                app_logger.info(f"Follow check for @{target_username} answered from ledger")
+                return {
+                    'is_following': True,
+                    'button_text': None,
+                    'button_state': 'following',
+                    'source': 'ledger'
+                }
+            
+            if not self.is_logged_in:
+                if not self.login_to_x():
+                    raise LoginRequiredError("Login required but failed")
             
             # プロフィールページに移動
             if not self.navigate_to_url(profile_url):
-                raise ScrapingError(f"Failed to navigate to profile: {profile_url}")
+                raise NavigationError(f"Failed to navigate to profile: {profile_url}")
             
             # ページ読み込み完了を待機
             self.wait_for_page_load()
@@ -41,8 +55,92 @@ class FollowChecker(BaseScraper):
             
         except Exception as e:
             app_logger.error(f"Follow check failed for @{target_username}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
             raise ScrapingError(f"Follow check failed: {e}")
     
+    def check_followers_bulk(self, account, usernames):
+        """フォロワーインデックスで複数ユーザーが指定アカウントをフォローしているかチェック"""
+        try:
+            account = follower_index_store.normalize_key(account)
+            index = self.sync_follower_index(account)
+            
+            usernames = [username.lstrip('@') for username in usernames if username]
+            # FOLLOWER_INDEX_MAX_SCROLLS で途中までしか取得できていない一覧では、載っていなくても未フォローとは限らないためNone
+            results = {
+                username: True if index.contains(username) else (False if index.complete else None)
+                for username in usernames
+            }
+            following = [username for username, is_following in results.items() if is_following]
+            unknown = [username for username, is_following in results.items() if is_following is None]
+            
+            app_logger.info(
+                f"Bulk follow check completed for @{account}: "
+                f"{len(following)}/{len(usernames)} users following, {len(unknown)} unknown"
+            )
+            
+            return {
+                'account': account,
+                'checked_users': len(usernames),
+                'following_users': following,
+                'unknown_users': unknown,
+                'results': results,
+                'index': index.get_stats()
+            }
+            
+        except Exception as e:
+            app_logger.error(f"Bulk follow check failed for @{account}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
+            raise ScrapingError(f"Bulk follow check failed: {e}")
+    
+    def sync_follower_index(self, account, full=False, refresh_interval=None):
+        """
+        フォロワー一覧をクロールしてインデックスを更新
+        
+        通常は新しい順に既知のフォロワーに達するまでの差分のみ取得し、
+        full=True の場合は一覧全体を取得し直す（フォロー解除も反映される）
+        """
+        refresh_interval = refresh_interval if refresh_interval is not None else Config.FOLLOWER_INDEX_REFRESH
+        account = follower_index_store.normalize_key(account)
+        index = follower_index_store.load(account)
+        if index and not full and not index.needs_refresh(refresh_interval):
+            return index
+        
+        # クロールは1ワーカーのみ（インデックスがあれば他ワーカーの更新中は既存のものを使用）
+        lock = DistributedLock(f"followers_{account}", ttl=3600)  # 初回クロールは長時間かかる場合がある
+        if not lock.acquire(blocking=index is None, timeout=Config.FOLLOWER_INDEX_WAIT):
+            if index:
+                return index
+            raise ScrapingError(f"Follower index for @{account} is being built, try again later")
+        
+        try:
+            # ロック待機中に他のワーカーが更新していれば再利用
+            index = follower_index_store.load(account)
+            if index and not full and not index.needs_refresh(refresh_interval):
+                return index
+            
+            followers_url = f"{Config.X_BASE_URL}/{account}/followers"
+            
+            if index is None or full:
+                usernames, reached_end = self.crawl_user_list(
+                    followers_url,
+                    max_scroll_attempts=Config.FOLLOWER_INDEX_MAX_SCROLLS
+                )
+                before = 0
+                index = follower_index_store.write(account, usernames, complete=reached_end)
+            else:
+                usernames, _ = self.crawl_user_list(followers_url, known_users=index.users)
+                before = len(index)
+                index = follower_index_store.write(account, usernames, base=index)
+            
+            app_logger.info(f"Follower index for @{account} synced (+{len(index) - before} users, total {len(index)})")
+            return index
+            
+        finally:
+            lock.release()
+    
+    @timed_stage('resolve')
     def _check_follow_button_status(self):
         """フォローボタンの状態をチェック"""
         try:
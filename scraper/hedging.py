@@ -0,0 +1,208 @@
+import time
+import queue
+import threading
+from collections import deque
+from config.config import Config
+from scraper.scheduler import fair_scheduler
+from utils.logger import app_logger
+
+class CheckAttempt:
+    """確認の1回分の実行（チェッカーと割り当てられた枠を保持し、終了時に両方を返却）"""
+    
+    def __init__(self, checker_class, check, ticket, deadline=None, is_cancelled=None, hedge=False):
+        self.checker = checker_class()
+        self.check = check
+        self.ticket = ticket
+        self.hedge = hedge
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        
+        self.checker.deadline = deadline
+        self.checker.is_cancelled = is_cancelled
+    
+    @property
+    def duration(self):
+        return self.finished - self.started
+    
+    def execute(self):
+        """確認を実行（例外は error に保持）"""
+        self.started = time.monotonic()
+        try:
+            self.result = self.check(self.checker)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = time.monotonic()
+            self.checker.close()
+            fair_scheduler.release(self.ticket)
+
+class HedgedExecutor:
+    """
+    確認の並行実行（ヘッジ）
+    
+    確認が同じアクションの直近の所要時間の HEDGE_PERCENTILE パーセンタイルを超えても終わらない場合、
+    空いている枠（別のタブ）で同じ確認をもう1件実行し、先に成功した結果を使って他方を中断する
+    並行実行はスクレイピング枠の HEDGE_MAX_FRACTION の割合までに制限し、待機中の要求がある場合は行わない
+    """
+    
+    def __init__(self):
+        self.enabled = Config.HEDGE_ENABLED
+        self.latencies = {}
+        self.active_hedges = 0
+        self.lock = threading.Lock()
+        self.stats = {'hedged': 0, 'hedge_wins': 0, 'skipped': 0}
+    
+    @property
+    def max_hedges(self):
+        """同時に実行できるヘッジの数"""
+        return int(fair_scheduler.capacity * Config.HEDGE_MAX_FRACTION)
+    
+    def percentile(self, action, pct):
+        """アクションの直近の所要時間のパーセンタイル（記録が足りなければNone）"""
+        with self.lock:
+            samples = sorted(self.latencies.get(action, ()))
+        if len(samples) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+    
+    def record_latency(self, action, seconds):
+        """成功した確認の所要時間を記録（ページを開かずに回答した確認は呼び出し側で除く）"""
+        with self.lock:
+            if action not in self.latencies:
+                self.latencies[action] = deque(maxlen=Config.HEDGE_LATENCY_WINDOW)
+            self.latencies[action].append(seconds)
+    
+    def run(self, action, ticket, checker_class, check, deadline=None, is_cancelled=None, hedge=True):
+        """
+        割り当て済みの枠で確認を実行し、必要に応じてヘッジする
+        
+        Returns:
+            CheckAttempt: 採用した実行（両方失敗した場合は最初の実行）
+        """
+        primary = self._new_attempt(checker_class, check, ticket, deadline, is_cancelled)
+        hedge_delay = self.percentile(action, Config.HEDGE_PERCENTILE) if self.enabled and hedge else None
+        
+        if hedge_delay is None:
+            primary.execute()
+            if primary.error is None and primary.checker.navigated:
+                self.record_latency(action, primary.duration)
+            return primary
+        
+        done = queue.Queue()
+        attempts = [primary]
+        self._start(primary, done, f"check-{action}")
+        
+        try:
+            finished = done.get(timeout=hedge_delay)
+        except queue.Empty:
+            hedge_attempt = self._start_hedge(action, ticket, checker_class, check, deadline, is_cancelled, done)
+            if hedge_attempt:
+                attempts.append(hedge_attempt)
+            finished = done.get()
+        
+        # 先に成功した方を採用し、失敗した場合はもう一方の結果を待つ
+        winner = finished
+        pending = len(attempts) - 1
+        while winner.error is not None and pending:
+            winner = done.get()
+            pending -= 1
+        
+        if winner.error is not None:
+            winner = primary
+        
+        # 遅れた方は読み込み中のページを止めて次のステージの開始時に中断し、タブと枠を返却する
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.checker.cancel()
+        
+        if winner.error is None:
+            # ヘッジが先に終わった場合も、最初の実行の開始から回答までの時間を記録する
+            # （ヘッジ自体の所要時間だと閾値が下がり続け、ヘッジが増える）
+            elapsed = winner.finished - primary.started
+            if winner.checker.navigated:
+                self.record_latency(action, elapsed)
+            if winner.hedge:
+                with self.lock:
+                    self.stats['hedge_wins'] += 1
+                app_logger.info(
+                    f"Hedged {action} check answered first ({winner.duration:.1f}s, {elapsed:.1f}s since the first attempt)"
+                )
+        
+        return winner
+    
+    def _new_attempt(self, checker_class, check, ticket, deadline, is_cancelled, hedge=False):
+        """実行を作成（失敗した場合は枠を返却）"""
+        try:
+            return CheckAttempt(checker_class, check, ticket, deadline, is_cancelled, hedge)
+        except Exception:
+            fair_scheduler.release(ticket)
+            raise
+    
+    def _start(self, attempt, done, name, on_finish=None):
+        """別スレッドで実行し、終了したら done に入れる"""
+        def target():
+            try:
+                attempt.execute()
+            finally:
+                if on_finish:
+                    on_finish()
+                done.put(attempt)
+        
+        threading.Thread(target=target, name=name, daemon=True).start()
+    
+    def _start_hedge(self, action, ticket, checker_class, check, deadline, is_cancelled, done):
+        """ヘッジを開始（予算・空き枠・残り時間が足りなければNone）"""
+        # 残り時間が通常の所要時間に満たなければ、ヘッジしても間に合わない
+        median = self.percentile(action, 50)
+        if deadline is not None and median is not None and deadline - time.monotonic() < median:
+            return None
+        
+        with self.lock:
+            if self.active_hedges >= self.max_hedges:
+                self.stats['skipped'] += 1
+                return None
+            
+            hedge_ticket = fair_scheduler.try_acquire(ticket.client_id, ticket.priority)
+            if hedge_ticket is None:
+                self.stats['skipped'] += 1
+                return None
+            
+            self.active_hedges += 1
+            self.stats['hedged'] += 1
+        
+        def finish():
+            with self.lock:
+                self.active_hedges -= 1
+        
+        try:
+            attempt = self._new_attempt(checker_class, check, hedge_ticket, deadline, is_cancelled, hedge=True)
+        except Exception:
+            finish()
+            raise
+        
+        app_logger.info(f"Hedging slow {action} check")
+        self._start(attempt, done, f"hedge-{action}", on_finish=finish)
+        return attempt
+    
+    def get_stats(self):
+        """ヘッジの実行状況"""
+        thresholds = {}
+        for action in list(self.latencies):
+            threshold = self.percentile(action, Config.HEDGE_PERCENTILE)
+            thresholds[action] = round(threshold, 3) if threshold is not None else None
+        
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'active': self.active_hedges,
+                'max_concurrent': self.max_hedges,
+                'hedged': self.stats['hedged'],
+                'hedge_wins': self.stats['hedge_wins'],
+                'skipped': self.stats['skipped'],
+                'thresholds': thresholds
+            }
+
+# グローバルインスタンス
+hedged_executor = HedgedExecutor()
@@ -0,0 +1,113 @@
+import os
+import re
+import time
+import threading
+from config.config import Config
+from utils.compact_index import CompactUserIndex, write_compact_index, hash_username
+from utils.logger import app_logger
+
+class UserIndexStore:
+    """
+    ユーザー一覧インデックス（フォロワー、リポストしたユーザー等）を永続化するストア
+    
+    インデックスはソート済みハッシュ配列のコンパクト形式で保存し、mmapで読み込むため
+    全ワーカーがOSのページキャッシュ上の同じデータを共有する
+    """
+    
+    def __init__(self, index_dir, kind, key_pattern):
+        self.index_dir = index_dir
+        self.kind = kind
+        self.key_pattern = key_pattern
+        self.indexes = {}
+        self.lock = threading.Lock()
+    
+    def _index_path(self, key):
+        """インデックスファイルのパス"""
+        return os.path.join(self.index_dir, f"{self.kind}_{key}.idx")
+    
+    def normalize_key(self, key):
+        """キーを正規化（ファイル名に使えない文字は拒否）"""
+        key = str(key).lstrip('@').lower()
+        if not re.fullmatch(self.key_pattern, key):
+            raise ValueError(f"Invalid {self.kind} index key: {key}")
+        return key
+    
+    def load(self, key):
+        """インデックスを取得（他のワーカーが置換していれば開き直す）"""
+        key = self.normalize_key(key)
+        path = self._index_path(key)
+        
+        with self.lock:
+            index = self.indexes.get(key)
+            if index and index.is_current():
+                return index
+            
+            if not os.path.exists(path):
+                self.indexes.pop(key, None)
+                return None
+            
+            try:
+                # 置換前のマッピングは参照中のリクエストが終わればGCで解放される
+                index = CompactUserIndex(path)
+            except Exception as e:
+                app_logger.error(f"Failed to load {self.kind} index for {key}: {e}")
+                return self.indexes.get(key)
+            
+            self.indexes[key] = index
+            return index
+    
+    def write(self, key, usernames, base=None, complete=None):
+        """
+        インデックスを書き込み（一時ファイル経由でアトミックに置換）
+        
+        base を指定した場合は既存のインデックスにユーザーを追加する
+        """
+        key = self.normalize_key(key)
+        now = time.time()
+        
+        hashes = set(hash_username(username) for username in usernames)
+        if base is not None:
+            hashes.update(base.iter_hashes())
+        
+        metadata = {
+            'key': key,
+            'complete': base.complete if complete is None and base is not None else bool(complete),
+            'created_at': base.created_at if base is not None else now,
+            'synced_at': now,
+            'sync_count': (base.sync_count if base is not None else 0) + 1
+        }
+        
+        write_compact_index(self._index_path(key), hashes, metadata, Config.INDEX_BLOOM_BITS)
+        return self.load(key)
+    
+    def list_keys(self):
+        """インデックスが存在するキー一覧"""
+        if not os.path.isdir(self.index_dir):
+            return []
+        
+        keys = set()
+        pattern = re.compile(rf'{re.escape(self.kind)}_({self.key_pattern})\.idx')
+        for filename in os.listdir(self.index_dir):
+            match = pattern.fullmatch(filename)
+            if match:
+                keys.add(match.group(1))
+        return sorted(keys)
+    
+    def prune(self, max_age):
+        """作成から max_age 秒以上経過したインデックスを削除"""
+        removed = 0
+        for key in self.list_keys():
+            path = self._index_path(key)
+            try:
+                # 最終同期（ファイル更新）が max_age より前なら作成日時も max_age より前
+                if os.path.exists(path) and time.time() - os.path.getmtime(path) >= max_age:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                app_logger.warning(f"Failed to prune {self.kind} index for {key}: {e}")
+        return removed
+
+# グローバルインスタンス
+follower_index_store = UserIndexStore(Config.INDEX_DIR, 'followers', r'[a-z0-9_]{1,15}')
+retweeter_index_store = UserIndexStore(Config.INDEX_DIR, 'retweeters', r'\d{1,20}')
+replier_index_store = UserIndexStore(Config.INDEX_DIR, 'repliers', r'\d{1,20}')
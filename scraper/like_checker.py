@@ -1,6 +1,6 @@
 import time
-import re
-from scraper.base_scraper import BaseScraper, ScrapingError, ElementNotFoundError
+from scraper.base_scraper import BaseScraper, timed_stage, ScrapingError, LoginRequiredError, NavigationError, ElementNotFoundError
+from scraper.engagement_ledger import engagement_ledger
 from utils.logger import app_logger
 from config.config import Config
 
@@ -10,18 +10,30 @@ class LikeChecker(BaseScraper):
     def check_like_status(self, tweet_url):
         """いいね状態をチェック"""
         try:
-            if not self.is_logged_in:
-                if not self.login_to_x():
-                    raise ScrapingError("Login required but failed")
-            
             # ツイートURLの正規化
             normalized_url = self._normalize_tweet_url(tweet_url)
             if not normalized_url:
                 raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
+            self.prefer_url(normalized_url)
+            
+            # 台帳に記録されていればページを開かずに回答
+            tweet_id = normalized_url.rsplit('/', 1)[-1]
+            if engagement_ledger.lookup('likes', tweet_id):
+                app_logger.info(f"Like check for tweet {tweet_id} answered from ledger")
+                return {
+                    'is_liked': True,
+                    'like_count': None,
+                    'button_state': 'liked',
+                    'source': 'ledger'
+                }
+            
+            if not self.is_logged_in:
+                if not self.login_to_x():
+                    raise LoginRequiredError("Login required but failed")
             
             # ツイートページに移動
             if not self.navigate_to_url(normalized_url):
-                raise ScrapingError(f"Failed to navigate to tweet: {normalized_url}")
+                raise NavigationError(f"Failed to navigate to tweet: {normalized_url}")
             
             # ページ読み込み完了を待機
             self.wait_for_page_load()
@@ -40,30 +52,11 @@ class LikeChecker(BaseScraper):
             
         except Exception as e:
             app_logger.error(f"Like check failed for {tweet_url}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
             raise ScrapingError(f"Like check failed: {e}")
     
-    def _normalize_tweet_url(self, tweet_url):
-        """ツイートURLを正規化"""
-        try:
-            # URLパターンのマッチング
-            patterns = [
-                r'https?://(?:www\.)?(?:twitter\.com|x\.com)/\w+/status/(\d+)',
-                r'https?://(?:www\.)?(?:twitter\.com|x\.com)/i/web/status/(\d+)',
-                r'(\d{15,20})'  # ツイートIDのみ
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, tweet_url)
-                if match:
-                    tweet_id = match.group(1)
-                    return f"{Config.X_BASE_URL}/i/web/status/{tweet_id}"
-            
-            return None
-            
-        except Exception as e:
-            app_logger.error(f"Failed to normalize tweet URL: {e}")
-            return None
-    
+    @timed_stage('resolve')
     def _check_like_button_status(self):
         """いいねボタンの状態をチェック"""
         try:
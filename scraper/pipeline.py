@@ -0,0 +1,114 @@
+import threading
+from config.config import Config
+from scraper.browser_pool import browser_pool
+from scraper.scheduler import fair_scheduler
+from utils.logger import app_logger
+
+class PipelineJob:
+    """パイプラインで実行する確認（url を先読みし、extract でチェッカーから結果を取り出す）"""
+    
+    def __init__(self, url, extract):
+        self.url = url
+        self.extract = extract
+        self.result = None
+        self.error = None
+
+class PipelinedExecutor:
+    """
+    確認の一覧をブラウザプールの複数のタブで先読みしながら順に実行
+    
+    あるタブで結果を取り出している間に、別のタブで次の確認のページを読み込んでおき、
+    通信・描画の待ち時間を結果の取り出しや待機と重ねる
+    先読みしたページは表示中のページの再利用（TAB_REUSE_MAX_AGE）で確認に使われるため、
+    ブラウザプールが無効な場合や再利用が無効な場合は1つのチェッカーで順に実行する
+    """
+    
+    def __init__(self):
+        self.depth = max(Config.PIPELINE_DEPTH, 1)
+        self.lock = threading.Lock()
+        self.stats = {'runs': 0, 'jobs': 0, 'prefetched': 0, 'prefetch_failures': 0}
+    
+    @property
+    def enabled(self):
+        return self.depth > 1 and browser_pool.enabled and Config.TAB_REUSE_MAX_AGE > 0
+    
+    def run(self, jobs, checker_class, client_id, priority='bulk'):
+        """
+        jobs を順に実行（呼び出し元がスクレイピング枠を1つ確保している前提）
+        
+        2つ目以降のタブの枠は空きがある場合のみ確保する
+        結果と例外は各 PipelineJob の result / error に設定する
+        """
+        tickets = []
+        if self.enabled and len(jobs) > 1:
+            for _ in range(min(self.depth, len(jobs)) - 1):
+                ticket = fair_scheduler.try_acquire(client_id, priority)
+                if ticket is None:
+                    break
+                tickets.append(ticket)
+        
+        lanes = [checker_class() for _ in range(len(tickets) + 1)]
+        prefetches = {}
+        
+        try:
+            if len(lanes) > 1:
+                for index in range(len(lanes)):
+                    prefetches[index] = self._start_prefetch(lanes[index], jobs[index])
+            
+            for index, job in enumerate(jobs):
+                lane = lanes[index % len(lanes)]
+                
+                # 先読みが終わってから同じタブで結果を取り出す
+                prefetch = prefetches.pop(index, None)
+                if prefetch:
+                    prefetch.join()
+                
+                try:
+                    job.result = job.extract(lane)
+                except Exception as e:
+                    job.error = e
+                
+                following = index + len(lanes)
+                if len(lanes) > 1 and following < len(jobs):
+                    prefetches[following] = self._start_prefetch(lane, jobs[following])
+        finally:
+            for prefetch in prefetches.values():
+                prefetch.join()
+            for lane in lanes:
+                lane.close()
+            for ticket in tickets:
+                fair_scheduler.release(ticket)
+        
+        with self.lock:
+            self.stats['runs'] += 1
+            self.stats['jobs'] += len(jobs)
+        
+        return jobs
+    
+    def _start_prefetch(self, checker, job):
+        """別スレッドで job のページを読み込んでおく"""
+        def target():
+            if not job.url:
+                return
+            
+            # 失敗しても確認の実行時に読み込み直すため、結果は統計のみに反映する
+            try:
+                loaded = checker.prefetch(job.url)
+            except Exception as e:
+                app_logger.debug(f"Prefetch of {job.url} failed: {e}")
+                loaded = False
+            
+            with self.lock:
+                self.stats['prefetched' if loaded else 'prefetch_failures'] += 1
+        
+        thread = threading.Thread(target=target, name='pipeline-prefetch', daemon=True)
+        thread.start()
+        return thread
+    
+    def get_stats(self):
+        """先読みの実行状況"""
+        with self.lock:
+            return dict(self.stats, enabled=self.enabled, depth=self.depth)
+
+# グローバルインスタンス
+pipelined_executor = PipelinedExecutor()
@@ -0,0 +1,113 @@
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from config.config import Config
+
+class ReplyIndex:
+    """
+    ツイートの返信を投稿者ごとにまとめたインデックス
+    
+    キャッシュ経由で複数のリクエストスレッドから参照・追加されるため、操作はインデックスごとのロック内で行う
+    """
+    
+    def __init__(self, tweet_id):
+        self.tweet_id = tweet_id
+        self.authors = {}
+        self.seen_ids = {tweet_id}
+        self.complete = False
+        self.created_at = time.time()
+        self.updated_at = None
+        self.crawl_count = 0
+        self.lock = threading.Lock()
+    
+    def add(self, comment):
+        """コメントを追加（追加された場合はTrue）"""
+        author = (comment.get('username') or '').lower()
+        comment_id = comment.get('comment_id')
+        
+        with self.lock:
+            if comment_id:
+                if comment_id in self.seen_ids:
+                    return False
+                self.seen_ids.add(comment_id)
+            
+            if not author:
+                return False
+            
+            self.authors.setdefault(author, []).append(comment)
+            return True
+    
+    def mark_crawled(self, complete):
+        """クロールの終了を記録"""
+        with self.lock:
+            self.complete = self.complete or complete
+            self.crawl_count += 1
+            self.updated_at = time.time()
+    
+    def lookup(self, username):
+        """指定ユーザーのコメント状態を取得"""
+        with self.lock:
+            comments = list(self.authors.get(username.lstrip('@').lower(), []))
+        return {
+            'has_commented': len(comments) > 0,
+            'comment_count': len(comments),
+            'comments': comments
+        }
+    
+    def contains(self, username):
+        with self.lock:
+            return username.lstrip('@').lower() in self.authors
+    
+    def usernames(self):
+        """返信したユーザー名の一覧"""
+        with self.lock:
+            return list(self.authors)
+    
+    def is_fresh(self):
+        return time.time() - self.created_at < Config.REPLY_INDEX_TTL
+    
+    def get_stats(self):
+        """インデックスの統計情報"""
+        with self.lock:
+            return {
+                'authors': len(self.authors),
+                'comments': sum(len(comments) for comments in self.authors.values()),
+                'complete': self.complete,
+                'crawl_count': self.crawl_count,
+                'updated_at': datetime.utcfromtimestamp(self.updated_at).isoformat() if self.updated_at else None
+            }
+
+class ReplyIndexCache:
+    """ツイートIDごとの返信インデックスのキャッシュ（ワーカー内）"""
+    
+    def __init__(self, max_entries=100):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, tweet_id):
+        """有効なインデックスを取得（期限切れの場合はNone）"""
+        with self.lock:
+            index = self.entries.get(tweet_id)
+            if index is None:
+                return None
+            
+            if not index.is_fresh():
+                del self.entries[tweet_id]
+                return None
+            
+            self.entries.move_to_end(tweet_id)
+            return index
+    
+    def put(self, index):
+        """インデックスを保存"""
+        with self.lock:
+            self.entries[index.tweet_id] = index
+            self.entries.move_to_end(index.tweet_id)
+            
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+# グローバルインスタンス
+reply_index_cache = ReplyIndexCache()
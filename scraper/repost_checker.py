@@ -1,6 +1,8 @@
 import time
-import re
-from scraper.base_scraper import BaseScraper, ScrapingError, ElementNotFoundError
+from scraper.base_scraper import BaseScraper, timed_stage, ScrapingError, LoginRequiredError, NavigationError, ElementNotFoundError
+from scraper.index_store import retweeter_index_store
+from scraper.engagement_ledger import engagement_ledger
+from utils.distributed_lock import DistributedLock
 from utils.logger import app_logger
 from config.config import Config
 
@@ -10,18 +12,30 @@ class RepostChecker(BaseScraper):
     def check_repost_status(self, tweet_url):
         """リポスト状態をチェック"""
         try:
-            if not self.is_logged_in:
-                if not self.login_to_x():
-                    raise ScrapingError("Login required but failed")
-            
             # ツイートURLの正規化
             normalized_url = self._normalize_tweet_url(tweet_url)
             if not normalized_url:
                 raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
+            self.prefer_url(normalized_url)
+            
+            # 台帳に記録されていればページを開かずに回答
+            tweet_id = normalized_url.rsplit('/', 1)[-1]
+            if engagement_ledger.lookup('reposts', tweet_id):
+                app_logger.info(f"Repost check for tweet {tweet_id} answered from ledger")
+                return {
+                    'is_reposted': True,
+                    'repost_count': None,
+                    'button_state': 'reposted',
+                    'source': 'ledger'
+                }
+            
+            if not self.is_logged_in:
+                if not self.login_to_x():
+                    raise LoginRequiredError("Login required but failed")
             
             # ツイートページに移動
             if not self.navigate_to_url(normalized_url):
-                raise ScrapingError(f"Failed to navigate to tweet: {normalized_url}")
+                raise NavigationError(f"Failed to navigate to tweet: {normalized_url}")
             
             # ページ読み込み完了を待機
             self.wait_for_page_load()
@@ -40,30 +54,97 @@ class RepostChecker(BaseScraper):
             
         except Exception as e:
             app_logger.error(f"Repost check failed for {tweet_url}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
             raise ScrapingError(f"Repost check failed: {e}")
     
-    def _normalize_tweet_url(self, tweet_url):
-        """ツイートURLを正規化"""
+    def check_repost_status_bulk(self, tweet_url, usernames):
+        """リポストしたユーザー一覧を1回クロールして複数ユーザーのリポスト状態をチェック"""
         try:
-            # URLパターンのマッチング
-            patterns = [
-                r'https?://(?:www\.)?(?:twitter\.com|x\.com)/\w+/status/(\d+)',
-                r'https?://(?:www\.)?(?:twitter\.com|x\.com)/i/web/status/(\d+)',
-                r'(\d{15,20})'  # ツイートIDのみ
-            ]
+            normalized_url = self._normalize_tweet_url(tweet_url)
+            if not normalized_url:
+                raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
             
-            for pattern in patterns:
-                match = re.search(pattern, tweet_url)
-                if match:
-                    tweet_id = match.group(1)
-                    return f"{Config.X_BASE_URL}/i/web/status/{tweet_id}"
+            tweet_id = normalized_url.rsplit('/', 1)[-1]
+            index = self.get_retweeter_index(tweet_id)
             
-            return None
+            usernames = [username.lstrip('@') for username in usernames if username]
+            # スクロール数の上限で途中までしか取得できていない一覧では、載っていなくても未リポストとは限らないためNone
+            results = {
+                username: True if index.contains(username) else (False if index.complete else None)
+                for username in usernames
+            }
+            reposted = [username for username, has_reposted in results.items() if has_reposted]
+            unknown = [username for username, has_reposted in results.items() if has_reposted is None]
+            
+            app_logger.info(
+                f"Bulk repost check completed for tweet {tweet_id}: "
+                f"{len(reposted)}/{len(usernames)} users reposted, {len(unknown)} unknown"
+            )
+            
+            return {
+                'tweet_id': tweet_id,
+                'checked_users': len(usernames),
+                'reposted_users': reposted,
+                'unknown_users': unknown,
+                'results': results,
+                'index': index.get_stats()
+            }
             
         except Exception as e:
-            app_logger.error(f"Failed to normalize tweet URL: {e}")
+            app_logger.error(f"Bulk repost check failed for {tweet_url}: {e}")
+            if isinstance(e, ScrapingError):
+                raise
+            raise ScrapingError(f"Bulk repost check failed: {e}")
+    
+    def get_retweeter_index(self, tweet_id, refresh_interval=None):
+        """リポストしたユーザーのインデックスを取得（必要に応じて最新分のみ再取得）"""
+        refresh_interval = refresh_interval if refresh_interval is not None else Config.REPOST_INDEX_REFRESH
+        index = self._load_retweeter_index(tweet_id)
+        if index and not index.needs_refresh(refresh_interval):
+            return index
+        
+        # クロールは1ワーカーのみ（インデックスがあれば他ワーカーの更新中は既存のものを使用）
+        lock = DistributedLock(f"retweeters_{tweet_id}", ttl=3600)
+        if not lock.acquire(blocking=index is None, timeout=Config.REPOST_INDEX_WAIT):
+            if index:
+                return index
+            raise ScrapingError(f"Retweeter index for tweet {tweet_id} is being built, try again later")
+        
+        try:
+            # ロック待機中に他のワーカーが更新していれば再利用
+            index = self._load_retweeter_index(tweet_id)
+            if index and not index.needs_refresh(refresh_interval):
+                return index
+            
+            retweets_url = f"{Config.X_BASE_URL}/i/status/{tweet_id}/retweets"
+            
+            if index is None:
+                # 初回は一覧全体をクロール
+                usernames, reached_end = self.crawl_user_list(retweets_url)
+                before = 0
+                index = retweeter_index_store.write(tweet_id, usernames, complete=reached_end)
+                retweeter_index_store.prune(Config.REPOST_INDEX_TTL)
+            else:
+                # 2回目以降は新しい順に既知のユーザーに達するまでのみ取得
+                usernames, _ = self.crawl_user_list(retweets_url, known_users=index.users)
+                before = len(index)
+                index = retweeter_index_store.write(tweet_id, usernames, base=index)
+            
+            app_logger.info(f"Retweeter index for tweet {tweet_id} synced (+{len(index) - before} users, total {len(index)})")
+            return index
+            
+        finally:
+            lock.release()
+    
+    def _load_retweeter_index(self, tweet_id):
+        """保持期間内のリポストユーザーのインデックス（期間を過ぎたものは作り直すためNone）"""
+        index = retweeter_index_store.load(tweet_id)
+        if index and time.time() - index.created_at >= Config.REPOST_INDEX_TTL:
             return None
+        return index
     
+    @timed_stage('resolve')
     def _check_repost_button_status(self):
         """リポストボタンの状態をチェック"""
         try:
@@ -258,14 +339,14 @@ class RepostChecker(BaseScraper):
         try:
             if not self.is_logged_in:
                 if not self.login_to_x():
-                    raise ScrapingError("Login required but failed")
+                    raise LoginRequiredError("Login required but failed")
             
             normalized_url = self._normalize_tweet_url(tweet_url)
             if not normalized_url:
                 raise ScrapingError(f"Invalid tweet URL: {tweet_url}")
             
             if not self.navigate_to_url(normalized_url):
-                raise ScrapingError(f"Failed to navigate to tweet: {normalized_url}")
+                raise NavigationError(f"Failed to navigate to tweet: {normalized_url}")
             
             self.wait_for_page_load()
             self.random_delay(2, 4)
@@ -0,0 +1,170 @@
+import random
+import threading
+from collections import deque
+from config.config import Config
+from utils.logger import app_logger
+
+class ResourceBlocker:
+    """
+    確認に不要なリソース（画像・動画、フォント、計測用の通信、不要なAPI呼び出し）の読み込みを止める
+    
+    CDPの Network.setBlockedURLs でタブごとにブロックするURLパターンを設定する
+    チェッカーごとに許可するカテゴリまたはURLパターンを指定でき（クラスの RESOURCE_ALLOWLIST と RESOURCE_ALLOWLISTS）、
+    ページを読み込み直すたびに転送量と所要時間を記録して、ブロックしない場合との差を集計する
+    """
+    
+    # カテゴリごとのURLパターン（* は任意の文字列）
+    CATEGORIES = {
+        'media': (
+            '*pbs.twimg.com/media/*', '*pbs.twimg.com/profile_images/*', '*pbs.twimg.com/profile_banners/*',
+            '*pbs.twimg.com/ext_tw_video_thumb/*', '*pbs.twimg.com/amplify_video_thumb/*',
+            '*pbs.twimg.com/card_img/*', '*video.twimg.com/*', '*abs.twimg.com/emoji/*',
+            '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.mp4', '*.m3u8', '*.m4s'
+        ),
+        'font': ('*.woff', '*.woff2', '*.ttf', '*.otf'),
+        'tracking': (
+            '*google-analytics.com/*', '*googletagmanager.com/*', '*doubleclick.net/*',
+            '*ads-twitter.com/*', '*ads-api.x.com/*', '*analytics.x.com/*', '*/1.1/jot/*'
+        ),
+        'xhr': (
+            '*/i/api/1.1/dm/*', '*/i/api/2/badge_count/*', '*/i/api/1.1/hashflags.json*',
+            '*/i/api/2/guide.json*', '*/i/api/graphql/*/ExploreSidebar*', '*/i/api/fleets/*',
+            '*/i/api/graphql/*/DMPinnedInboxQuery*', '*/i/api/1.1/live_pipeline/*'
+        )
+    }
+    
+    # 読み込んだページの転送量（バイト）と、ページの読み込み完了（loadイベントの終了）までの時間（ミリ秒、未完了は0）
+    PAGE_WEIGHT_JS = """
+    let bytes = 0;
+    for (const entry of performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))) {
+        bytes += entry.transferSize || 0;
+    }
+    const navigation = performance.getEntriesByType('navigation')[0];
+    return {bytes: bytes, load_ms: navigation ? navigation.loadEventEnd : 0};
+    """
+    
+    # 読み込みの記録件数の上限を引き上げる（既定の250件では転送量を数えきれない）
+    TIMING_BUFFER_JS = "performance.setResourceTimingBufferSize(5000);"
+    
+    def __init__(self):
+        self.enabled = Config.RESOURCE_BLOCKING_ENABLED
+        self.categories = [
+            category.strip() for category in Config.RESOURCE_BLOCK_CATEGORIES.split(',')
+            if category.strip()
+        ]
+        self.extra_patterns = [
+            pattern.strip() for pattern in Config.RESOURCE_BLOCK_PATTERNS.split(',')
+            if pattern.strip()
+        ]
+        self.allowlists = self._parse_allowlists(Config.RESOURCE_ALLOWLISTS)
+        self.samples = {
+            'blocked': deque(maxlen=Config.RESOURCE_STATS_WINDOW),
+            'unblocked': deque(maxlen=Config.RESOURCE_STATS_WINDOW)
+        }
+        self.lock = threading.Lock()
+        
+        for category in self.categories:
+            if category not in self.CATEGORIES:
+                app_logger.warning(f"Unknown resource block category: {category}")
+    
+    def _parse_allowlists(self, value):
+        """「チェッカー名:カテゴリまたはURLパターン,...」形式の設定を読み込み（同じチェッカーは複数指定可）"""
+        allowlists = {}
+        for item in (value or '').split(','):
+            checker_name, _, entry = item.strip().partition(':')
+            if checker_name and entry:
+                allowlists.setdefault(checker_name, set()).add(entry)
+        return allowlists
+    
+    def patterns_for(self, checker_class):
+        """
+        チェッカーがブロックするURLパターン
+        
+        ブロックしない場合の転送量・所要時間を比較用に記録するため、
+        RESOURCE_BLOCK_BASELINE_RATE の割合の読み込みではブロックしない（空のタプル）
+        ブロックが無効の場合はNone（タブの設定も記録もしない）
+        """
+        if not self.enabled:
+            return None
+        if random.random() < Config.RESOURCE_BLOCK_BASELINE_RATE:
+            return ()
+        
+        # 継承元のチェッカー（BatchChecker なら各チェッカー）の許可も引き継ぐ
+        allowed = set()
+        for cls in checker_class.__mro__:
+            allowed.update(cls.__dict__.get('RESOURCE_ALLOWLIST', ()))
+            allowed.update(self.allowlists.get(cls.__name__, ()))
+        
+        patterns = []
+        for category in self.categories:
+            if category not in allowed:
+                patterns.extend(self.CATEGORIES.get(category, ()))
+        patterns.extend(self.extra_patterns)
+        return tuple(pattern for pattern in patterns if pattern not in allowed)
+    
+    def apply(self, page, patterns, configured=True):
+        """
+        タブにブロックするURLパターンを設定
+        
+        configured が False（このタブで初めて設定する）場合は、転送量の記録件数の上限も引き上げる
+        """
+        if not configured:
+            page.run_cdp('Page.addScriptToEvaluateOnNewDocument', source=self.TIMING_BUFFER_JS)
+        page.run_cdp('Network.enable')
+        page.run_cdp('Network.setBlockedURLs', urls=list(patterns))
+    
+    def record(self, page, blocked, duration):
+        """
+        ページ読み込みの転送量と所要時間を記録（読み込み完了の待機後に呼び出す）
+        
+        所要時間はブラウザが計測した読み込み完了までの時間（呼び出し元の待機を含まない）を使い、
+        取得できない場合は duration を使う
+        """
+        try:
+            weight = page.run_js(self.PAGE_WEIGHT_JS) or {}
+            transferred = int(weight.get('bytes') or 0)
+        except Exception as e:
+            app_logger.debug(f"Failed to measure page weight: {e}")
+            return
+        
+        if weight.get('load_ms'):
+            duration = weight['load_ms'] / 1000
+        
+        mode = 'blocked' if blocked else 'unblocked'
+        with self.lock:
+            self.samples[mode].append((transferred, duration))
+        
+        app_logger.debug(f"Page weight: {transferred / 1024:.0f} KB in {duration:.2f}s ({mode})")
+    
+    def _summary(self, samples):
+        if not samples:
+            return None
+        return {
+            'navigations': len(samples),
+            'avg_bytes': int(sum(transferred for transferred, _ in samples) / len(samples)),
+            'avg_seconds': round(sum(duration for _, duration in samples) / len(samples), 3)
+        }
+    
+    def get_stats(self):
+        """ブロックの有無ごとの平均転送量・所要時間と、1回の読み込みあたりの削減量"""
+        with self.lock:
+            blocked = self._summary(self.samples['blocked'])
+            unblocked = self._summary(self.samples['unblocked'])
+        
+        saved = None
+        if blocked and unblocked:
+            saved = {
+                'bytes_per_navigation': unblocked['avg_bytes'] - blocked['avg_bytes'],
+                'seconds_per_navigation': round(unblocked['avg_seconds'] - blocked['avg_seconds'], 3)
+            }
+        
+        return {
+            'enabled': self.enabled,
+            'categories': self.categories,
+            'blocked': blocked,
+            'unblocked': unblocked,
+            'saved': saved
+        }
+
+# グローバルインスタンス
+resource_blocker = ResourceBlocker()
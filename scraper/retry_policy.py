@@ -0,0 +1,109 @@
+import time
+import random
+from DrissionPage import errors as dp_errors
+from config.config import Config
+from utils.logger import app_logger
+
+# 一時的な通信・ブラウザのエラー（再試行で回復しうる）
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    dp_errors.PageDisconnectedError,
+    dp_errors.ContextLostError,
+    dp_errors.BrowserConnectError,
+    dp_errors.WaitTimeoutError,
+    dp_errors.CDPError
+)
+
+def classify_error(error):
+    """
+    例外を再試行の判断に使う種類に分類
+    
+    スクレイピングのエラーはクラスの retry_category に従う
+    
+    Returns:
+        'transient' / 'throttle' / 'not_found' / 'auth' / 'permanent'
+    """
+    category = getattr(error, 'retry_category', None)
+    if category:
+        return category
+    
+    message = str(error).lower()
+    if '429' in message or 'rate limit' in message:
+        return 'throttle'
+    if isinstance(error, dp_errors.ElementNotFoundError):
+        return 'not_found'
+    if isinstance(error, TRANSIENT_ERRORS):
+        return 'transient'
+    return 'permanent'
+
+class RetryPolicy:
+    """
+    エラーの種類に応じた再試行ポリシー
+    
+    base_delays に含まれる種類のエラーのみ、ジッター付きの指数バックオフで再試行する
+    期限（time.monotonic() 基準）が指定された場合、待機と次の試行が期限内に収まらなければ再試行しない
+    """
+    
+    def __init__(self, name, max_attempts, base_delays, max_delay):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delays = base_delays
+        self.max_delay = max_delay
+    
+    def backoff(self, category, retry_number):
+        """retry_number 回目の再試行前の待機時間（上限の半分〜上限の範囲でランダム）"""
+        cap = min(self.max_delay, self.base_delays[category] * (2 ** retry_number))
+        return random.uniform(cap / 2, cap)
+    
+    def run(self, func, deadline=None, max_attempts=None, description=None):
+        """
+        func を実行し、再試行できるエラーの場合は待機して再実行
+        
+        再試行しないエラー、または試行回数・期限を使い切った場合は最後の例外をそのまま送出する
+        """
+        max_attempts = max_attempts or self.max_attempts
+        description = description or self.name
+        
+        for attempt in range(max_attempts):
+            started = time.monotonic()
+            try:
+                return func()
+            except Exception as e:
+                category = classify_error(e)
+                if category not in self.base_delays or attempt + 1 >= max_attempts:
+                    raise
+                
+                delay = self.backoff(category, attempt)
+                
+                # 次の試行には直前の試行と同じ程度の時間がかかる見込み
+                if deadline is not None:
+                    needed = delay + (time.monotonic() - started)
+                    if time.monotonic() + needed > deadline:
+                        app_logger.warning(
+                            f"{description} failed ({category}: {e}); "
+                            f"not retrying, remaining time budget is too short"
+                        )
+                        raise
+                
+                app_logger.warning(
+                    f"{description} attempt {attempt + 1}/{max_attempts} failed ({category}: {e}); "
+                    f"retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+# ページ遷移: 通信エラーと一時的な制限のみ再試行（削除済み・ログイン切れは再試行しない）
+navigation_retry = RetryPolicy(
+    'navigation',
+    Config.RETRY_COUNT,
+    {'transient': Config.RETRY_DELAY, 'throttle': Config.RETRY_THROTTLE_DELAY},
+    Config.RETRY_MAX_DELAY
+)
+
+# 自動ログイン: フォームの描画遅れ（要素が見つからない）も再試行、認証の失敗は再試行しない
+login_retry = RetryPolicy(
+    'login',
+    Config.LOGIN_RETRY_COUNT,
+    {'transient': Config.RETRY_DELAY, 'not_found': Config.RETRY_DELAY},
+    Config.RETRY_MAX_DELAY
+)
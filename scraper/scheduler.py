@@ -0,0 +1,333 @@
+import math
+import time
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from config.config import Config
+from scraper.base_scraper import CapacityExceededError
+from utils.logger import app_logger
+
+class ScheduleTicket:
+    """スクレイピング枠の割り当て待ち"""
+    
+    def __init__(self, client_id, priority, start, finish, seq):
+        self.client_id = client_id
+        self.priority = priority
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted_at = None
+        # 並行実行（ヘッジ）用の割り当て（処理時間の推定に含めない）
+        self.hedge = False
+        # バックグラウンド処理（一覧のクロール等）の割り当て（処理時間の推定に含めない）
+        self.background = False
+    
+    @property
+    def wait_ms(self):
+        """割り当てまでの待ち時間（ミリ秒）"""
+        if self.granted_at is None:
+            return None
+        return int((self.granted_at - self.enqueued_at) * 1000)
+
+class FairScheduler:
+    """
+    スクレイピング枠の割り当て（ワーカー内）
+    
+    クライアントごとの重み付き公平キュー（仮想終了時刻の小さい順）で割り当て、
+    interactive の要求を bulk より優先する
+    bulk の要求も SCHEDULER_BULK_MAX_WAIT 秒待つと interactive と同じ扱いになる
+    バックグラウンド処理（クライアントIDが background: で始まるもの）には、
+    SCHEDULER_INTERACTIVE_RESERVE 枠を残して割り当てる（枠が1つの場合を除く）
+    
+    待ち時間に上限がある要求は、キューの長さと直近の処理時間から見込んだ待ち時間が
+    上限を超える場合、キューに入れずに即座に拒否する（Retry-After はキューの消化速度から算出）
+    """
+    
+    PRIORITIES = ('interactive', 'bulk')
+    
+    BACKGROUND_PREFIX = 'background:'
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.active = 0
+        self.background_active = 0
+        self.virtual_time = 0.0
+        self.client_finish = {}
+        self.waiting = []
+        self.weights = self._parse_weights(Config.SCHEDULER_CLIENT_WEIGHTS)
+        self.seq = itertools.count()
+        self.service_times = deque(maxlen=Config.SCHEDULER_LATENCY_WINDOW)
+        self.condition = threading.Condition(threading.Lock())
+        self.stats = {
+            priority: {'granted': 0, 'timeouts': 0, 'shed': 0, 'wait_ms_total': 0}
+            for priority in self.PRIORITIES
+        }
+    
+    @property
+    def enabled(self):
+        return self.capacity > 0
+    
+    def _parse_weights(self, value):
+        """「APIキー:重み,...」形式の設定を読み込み"""
+        weights = {}
+        for item in (value or '').split(','):
+            key, _, weight = item.strip().rpartition(':')
+            if not key:
+                continue
+            try:
+                weights[key] = max(float(weight), 0.01)
+            except ValueError:
+                app_logger.warning(f"Invalid scheduler weight: {item}")
+        return weights
+    
+    def weight_for(self, client_id):
+        """クライアントの重み（APIキーごとに設定、未設定は1）"""
+        key = client_id[len('api_key:'):] if client_id.startswith('api_key:') else client_id
+        return self.weights.get(key, 1.0)
+    
+    @contextmanager
+    def slot(self, client_id, priority='interactive', timeout=None):
+        """枠を確保して処理を実行するコンテキストマネージャー"""
+        ticket = self.acquire(client_id, priority, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+    
+    def acquire(self, client_id, priority='interactive', timeout=None):
+        """
+        枠が割り当てられるまで待機
+        
+        Raises:
+            CapacityExceededError: timeout 秒以内に割り当てられない見込みの場合、
+                または実際に割り当てられなかった場合
+        """
+        client_id = client_id or 'anonymous'
+        if priority not in self.PRIORITIES:
+            priority = 'interactive'
+        
+        with self.condition:
+            # ブラウザに触れる前に、待ち時間の上限内に処理できない要求を拒否する
+            if self.enabled and timeout is not None:
+                self._admit(priority, timeout)
+            
+            ticket = self._new_ticket(client_id, priority)
+            
+            if not self.enabled:
+                ticket.granted_at = ticket.enqueued_at
+                return ticket
+            
+            self.waiting.append(ticket)
+            deadline = ticket.enqueued_at + timeout if timeout is not None else None
+            
+            while True:
+                self._dispatch()
+                if ticket.granted_at is not None:
+                    break
+                
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    self.waiting.remove(ticket)
+                    self.stats[priority]['timeouts'] += 1
+                    service_time = self._service_time()
+                    raise CapacityExceededError(
+                        f"No scraping capacity available within {timeout}s "
+                        f"({len(self.waiting)} requests waiting)",
+                        retry_after=self._drain_seconds(self._position(priority), service_time) or timeout
+                    )
+                
+                self.condition.wait(remaining)
+            
+            self.stats[priority]['granted'] += 1
+            self.stats[priority]['wait_ms_total'] += ticket.wait_ms
+            return ticket
+    
+    def set_capacity(self, capacity):
+        """同時実行数を変更（縮小時は処理中の要求が終わるまで新たに割り当てない）"""
+        if not self.enabled:
+            return
+        
+        with self.condition:
+            self.capacity = max(capacity, 1)
+            self._dispatch()
+    
+    def try_acquire(self, client_id, priority='interactive'):
+        """
+        空いている枠があり、待機中の要求も無い場合のみ即座に割り当て（ヘッジ・先読み用）
+        
+        Returns:
+            ScheduleTicket（割り当てられなければNone）
+        """
+        if not self.enabled:
+            return None
+        
+        with self.condition:
+            if self.waiting or self.active >= self.capacity:
+                return None
+            
+            client_id = client_id or 'anonymous'
+            if client_id.startswith(self.BACKGROUND_PREFIX) and self.background_active >= self._background_limit():
+                return None
+            
+            ticket = self._new_ticket(client_id, priority)
+            ticket.granted_at = ticket.enqueued_at
+            ticket.hedge = True
+            self._grant(ticket)
+            return ticket
+    
+    def _new_ticket(self, client_id, priority):
+        """割り当て待ちを作成（ロック内で呼び出す）"""
+        # 同じクライアントの要求は前の要求の終了時刻から積み上げる
+        start = max(self.virtual_time, self.client_finish.get(client_id, 0.0))
+        finish = start + 1.0 / self.weight_for(client_id)
+        self.client_finish[client_id] = finish
+        
+        ticket = ScheduleTicket(client_id, priority, start, finish, next(self.seq))
+        ticket.background = client_id.startswith(self.BACKGROUND_PREFIX)
+        return ticket
+    
+    def _grant(self, ticket):
+        """枠を割り当て済みとして数える（ロック内で呼び出す）"""
+        self.active += 1
+        if ticket.background:
+            self.background_active += 1
+        self.virtual_time = max(self.virtual_time, ticket.start)
+    
+    def _background_limit(self):
+        """バックグラウンド処理に割り当てられる枠の数（ロック内で呼び出す）"""
+        return max(self.capacity - Config.SCHEDULER_INTERACTIVE_RESERVE, 1)
+    
+    def release(self, ticket):
+        """枠を返却"""
+        if not self.enabled:
+            return
+        
+        with self.condition:
+            self.active -= 1
+            if ticket.background:
+                self.background_active -= 1
+            elif ticket.granted_at is not None and not ticket.hedge:
+                # バックグラウンド処理は一覧全体のクロールなど長時間になるため、利用者の待ち時間の見込みに含めない
+                self.service_times.append(time.monotonic() - ticket.granted_at)
+            self._dispatch()
+    
+    def _service_time(self):
+        """直近の1件あたりの処理時間（中央値、記録が無ければNone）"""
+        if not self.service_times:
+            return None
+        return sorted(self.service_times)[len(self.service_times) // 2]
+    
+    def _rank(self, ticket, now):
+        """割り当て順の優先区分（0: interactive または待ち時間の長い bulk、1: bulk）"""
+        promoted = now - ticket.enqueued_at >= Config.SCHEDULER_BULK_MAX_WAIT
+        return 0 if ticket.priority == 'interactive' or promoted else 1
+    
+    def _position(self, priority):
+        """
+        新しい要求が割り当てを受けるまでに消化される要求の数（ロック内で呼び出す）
+        
+        先に待機している要求に、処理中の要求の残り（平均して半分）を加えたもの
+        """
+        now = time.monotonic()
+        rank = 0 if priority == 'interactive' else 1
+        ahead = sum(1 for ticket in self.waiting if self._rank(ticket, now) <= rank)
+        if ahead == 0 and self.active < self.capacity:
+            return 0
+        return ahead + 0.5
+    
+    def _drain_seconds(self, positions, service_time):
+        """キューを positions 件分消化するのにかかる見込み時間（秒）"""
+        if positions <= 0 or service_time is None:
+            return None
+        return max(1, math.ceil(positions * service_time / self.capacity))
+    
+    def _admit(self, priority, timeout):
+        """キューの長さと見込み待ち時間から受け付けるか判定（ロック内で呼び出す）"""
+        position = self._position(priority)
+        if position == 0:
+            return
+        
+        service_time = self._service_time()
+        
+        # キューの上限、または待ち時間の上限内に割り当てられる位置を超えた分
+        excess = len(self.waiting) + 1 - Config.SCHEDULER_MAX_QUEUE
+        reason = f"queue is full ({len(self.waiting)} requests waiting)"
+        if service_time:
+            wait_excess = position - timeout * self.capacity / service_time
+            if wait_excess > excess:
+                excess = wait_excess
+                reason = f"estimated wait exceeds {timeout}s ({len(self.waiting)} requests waiting)"
+        if excess <= 0:
+            return
+        
+        self.stats[priority]['shed'] += 1
+        raise CapacityExceededError(
+            f"Scraping capacity exhausted: {reason}",
+            retry_after=self._drain_seconds(excess, service_time) or timeout
+        )
+    
+    def _dispatch(self):
+        """空いている枠を待機中の要求に割り当てる（ロック内で呼び出す）"""
+        granted = False
+        now = time.monotonic()
+        
+        while self.waiting and self.active < self.capacity:
+            # バックグラウンド処理は上限まで割り当て済みなら待たせる
+            candidates = [
+                ticket for ticket in self.waiting
+                if not ticket.background or self.background_active < self._background_limit()
+            ]
+            if not candidates:
+                break
+            
+            ticket = min(candidates, key=lambda ticket: (self._rank(ticket, now), ticket.finish, ticket.seq))
+            self.waiting.remove(ticket)
+            ticket.granted_at = now
+            self._grant(ticket)
+            granted = True
+        
+        # 仮想時刻に追い越されたクライアントの記録は不要
+        if granted:
+            self.client_finish = {
+                client_id: finish for client_id, finish in self.client_finish.items()
+                if finish > self.virtual_time
+            }
+            self.condition.notify_all()
+    
+    def get_stats(self):
+        """割り当て状況"""
+        with self.condition:
+            waiting = {priority: 0 for priority in self.PRIORITIES}
+            for ticket in self.waiting:
+                waiting[ticket.priority] += 1
+            
+            service_time = self._service_time()
+            
+            return {
+                'enabled': self.enabled,
+                'capacity': self.capacity,
+                'active': self.active,
+                'background_active': self.background_active,
+                'background_limit': self._background_limit(),
+                'waiting': waiting,
+                'max_queue': Config.SCHEDULER_MAX_QUEUE,
+                'service_time_ms': int(service_time * 1000) if service_time is not None else None,
+                'estimated_wait_seconds': {
+                    priority: self._drain_seconds(self._position(priority), service_time) or 0
+                    for priority in self.PRIORITIES
+                },
+                'priorities': {
+                    priority: {
+                        'granted': stats['granted'],
+                        'timeouts': stats['timeouts'],
+                        'shed': stats['shed'],
+                        'avg_wait_ms': int(stats['wait_ms_total'] / stats['granted']) if stats['granted'] else 0
+                    }
+                    for priority, stats in self.stats.items()
+                }
+            }
+
+# グローバルインスタンス
+fair_scheduler = FairScheduler(Config.SCHEDULER_CONCURRENCY)
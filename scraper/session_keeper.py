@@ -0,0 +1,173 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from config.config import Config
+from scraper.base_scraper import BaseScraper
+from scraper.browser_pool import browser_pool
+from scraper.scheduler import fair_scheduler
+from utils.logger import app_logger
+from utils.auth_manager import auth_manager
+from utils.distributed_lock import DistributedLock, shared_state
+
+class SessionKeeper:
+    """期限切れ前にX.comセッションを更新するバックグラウンドタスク"""
+    
+    STATE_KEY = 'session_keeper'
+    
+    def __init__(self):
+        self.enabled = Config.SESSION_KEEPER_ENABLED
+        self.interval = Config.SESSION_KEEPER_INTERVAL
+        self.refresh_margin = timedelta(seconds=Config.SESSION_REFRESH_MARGIN)
+        self.lock = DistributedLock('session_keeper', ttl=Config.LOGIN_LOCK_TTL)
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.next_tick_at = None
+    
+    def start(self):
+        """バックグラウンドスレッドを開始"""
+        if not self.enabled or (self.thread and self.thread.is_alive()):
+            return
+        
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='session-keeper', daemon=True)
+        self.thread.start()
+        app_logger.info(f"Session keeper started (interval: {self.interval}s)")
+    
+    def stop(self):
+        """バックグラウンドスレッドを停止"""
+        self.stop_event.set()
+    
+    def _run(self):
+        """定期実行ループ"""
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                app_logger.error(f"Session keeper tick failed: {e}")
+            
+            self.next_tick_at = time.time() + self._next_wait()
+            self.stop_event.wait(self.next_tick_at - time.time())
+    
+    def _next_wait(self):
+        """次回実行までの待機時間（更新期限が近ければ前倒し）"""
+        remaining = self.seconds_until_refresh()
+        if remaining is None:
+            return self.interval
+        return max(30, min(self.interval, remaining))
+    
+    def seconds_until_refresh(self):
+        """次回のCookie更新までの秒数（セッションが無い場合はNone）"""
+        deadline = auth_manager.get_session_deadline()
+        if deadline is None:
+            return None
+        
+        refresh_at = deadline - self.refresh_margin
+        return max(0, int((refresh_at - datetime.utcnow()).total_seconds()))
+    
+    def tick(self):
+        """セッションの確認と更新、プールのウォームアップ"""
+        # 確認と更新はクラスタ内の1ワーカーだけが実行
+        if self.lock.acquire(blocking=False):
+            try:
+                self._maintain_session()
+            finally:
+                self.lock.release()
+        
+        self._warm_pool()
+    
+    def _maintain_session(self):
+        """セッションを確認し、期限が近ければCookieを更新"""
+        state = shared_state.get(self.STATE_KEY, {})
+        remaining = self.seconds_until_refresh()
+        refresh_due = remaining is None or remaining <= 0
+        
+        # 他のワーカーが直近に確認済みならスキップ
+        if not refresh_due and time.time() - state.get('last_probe_at', 0) < self.interval * 0.9:
+            return
+        
+        refreshed = False
+        # 他のバックグラウンド処理と同じく、利用者のリクエスト用の枠を残して実行する
+        with fair_scheduler.slot('background:session', 'bulk'):
+            with BaseScraper() as scraper:
+                ok = scraper.probe_session()
+                
+                if not ok and not scraper.credential_login_attempted:
+                    # Cookieが失効している場合はリクエスト外で再ログイン
+                    browser_pool.session_ready = False
+                    ok = scraper._login_with_credentials()
+                    refreshed = ok
+                    
+                elif ok and refresh_due:
+                    # ログイン中のブラウザから最新のCookieを保存し直して期限を延長
+                    refreshed = scraper.save_current_cookies()
+                    auth_manager.update_session_validity()
+        
+        now = time.time()
+        state.update({
+            'last_probe_at': now,
+            'last_probe_ok': ok
+        })
+        if refreshed:
+            state['last_refresh_at'] = now
+        shared_state.set(self.STATE_KEY, state)
+        
+        if ok:
+            app_logger.info(f"Session keeper probe succeeded (refreshed: {refreshed})")
+        else:
+            app_logger.warning("Session keeper could not restore a valid session")
+    
+    def _warm_pool(self):
+        """ログイン済みのセッションでプールのタブを準備"""
+        if not browser_pool.enabled:
+            return
+        
+        # ウォームアップは急がないため、枠に空きがある場合のみ実行する（次回の実行で再試行）
+        ticket = fair_scheduler.try_acquire('background:session', 'bulk')
+        if fair_scheduler.enabled and ticket is None:
+            app_logger.debug("Skipped pool warm-up: scheduler is busy")
+            return
+        
+        try:
+            # このワーカーのプールで未確認なら保存済みCookieでログイン状態を確立
+            if not browser_pool.session_ready and auth_manager.is_session_valid():
+                with BaseScraper() as scraper:
+                    scraper.probe_session()
+            
+            if not browser_pool.session_ready:
+                return
+            
+            prepared = browser_pool.warm(prepare=self._prepare_tab)
+            if prepared:
+                app_logger.info(f"Pre-warmed {prepared} pooled tabs")
+        finally:
+            if ticket is not None:
+                fair_scheduler.release(ticket)
+    
+    def _prepare_tab(self, tab):
+        """タブでX.comを読み込んでおく"""
+        tab.page.get(Config.SESSION_PROBE_URL)
+        tab.last_url = Config.SESSION_PROBE_URL
+        tab.last_loaded_at = time.time()
+        tab.landed_url = tab.page.url
+    
+    def get_status(self):
+        """セッション維持の状態を取得"""
+        state = shared_state.get(self.STATE_KEY, {})
+        
+        def to_iso(timestamp):
+            return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+        
+        return {
+            'enabled': self.enabled,
+            'running': bool(self.thread and self.thread.is_alive()),
+            'interval_seconds': self.interval,
+            'last_probe_at': to_iso(state.get('last_probe_at')),
+            'last_probe_ok': state.get('last_probe_ok'),
+            'last_refresh_at': to_iso(state.get('last_refresh_at')),
+            'seconds_until_refresh': self.seconds_until_refresh(),
+            'next_check_at': to_iso(self.next_tick_at),
+            'browser_pool': browser_pool.get_stats()
+        }
+
+# グローバルインスタンス
+session_keeper = SessionKeeper()
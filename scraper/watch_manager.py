@@ -0,0 +1,552 @@
+import os
+import re
+import hmac
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import ipaddress
+import threading
+from urllib.parse import urlsplit
+from datetime import datetime
+import requests
+from config.config import Config
+from scraper.base_scraper import LoginRequiredError, NavigationError
+from scraper.follow_checker import FollowChecker
+from scraper.like_checker import LikeChecker
+from scraper.repost_checker import RepostChecker
+from scraper.comment_checker import CommentChecker
+from scraper.engagement_ledger import engagement_ledger
+from scraper.scheduler import fair_scheduler
+from scraper.pipeline import PipelineJob, pipelined_executor
+from utils.logger import app_logger
+from utils.distributed_lock import DistributedLock
+from utils.result_cache import normalize_target
+
+class WatchError(Exception):
+    """監視の登録に関するエラー"""
+    pass
+
+class BatchChecker(FollowChecker, LikeChecker, RepostChecker, CommentChecker):
+    """複数の確認を1つのブラウザでまとめて行うチェッカー"""
+    
+    def check_tweet_engagement(self, tweet_id, actions):
+        """
+        1回のページ読み込みでツイートのいいね・リポスト状態をまとめて確認
+        
+        Returns:
+            {'like': bool, 'repost': bool} のうち actions で指定したもの
+        """
+        states = {}
+        
+        # 台帳に記録されていればページを開かない
+        for action, kind in (('like', 'likes'), ('repost', 'reposts')):
+            if action in actions and engagement_ledger.lookup(kind, tweet_id):
+                states[action] = True
+        
+        remaining = [action for action in actions if action not in states]
+        if not remaining:
+            return states
+        
+        if not self.is_logged_in:
+            if not self.login_to_x():
+                raise LoginRequiredError("Login required but failed")
+        
+        tweet_url = self._normalize_tweet_url(tweet_id)
+        if not self.navigate_to_url(tweet_url):
+            raise NavigationError(f"Failed to navigate to tweet: {tweet_url}")
+        
+        self.wait_for_page_load()
+        self.random_delay(1, 2)
+        
+        if 'like' in remaining:
+            states['like'] = self._check_like_button_status()['is_liked']
+        if 'repost' in remaining:
+            states['repost'] = self._check_repost_button_status()['is_reposted']
+        
+        return states
+
+class WatchManager:
+    """
+    (アクション, 対象) の監視登録と定期的な一括再確認
+    
+    期限を迎えた監視をまとめて確認し、同じ対象・同じツイートの確認はページ読み込みを共有する
+    状態が変わった場合のみ変更履歴に記録し、Webhookが登録されていれば通知する
+    """
+    
+    ACTIONS = ('follow', 'like', 'repost', 'comment')
+    
+    # 正規化後の対象の形式
+    TARGET_PATTERNS = {
+        'follow': r'[a-z0-9_]{1,15}',
+        'like': r'\d{15,20}',
+        'repost': r'\d{15,20}',
+        'comment': r'\d{15,20}:[a-z0-9_]{1,15}'
+    }
+    TARGET_FORMATS = {
+        'follow': 'expected a username',
+        'like': 'expected a tweet URL or ID',
+        'repost': 'expected a tweet URL or ID',
+        'comment': "expected '<tweet_url>:<username>'"
+    }
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS watches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id TEXT NOT NULL,
+        action TEXT NOT NULL,
+        target TEXT NOT NULL,
+        webhook_url TEXT,
+        interval INTEGER NOT NULL,
+        state INTEGER,
+        created_at REAL NOT NULL,
+        last_checked_at REAL,
+        next_check_at REAL NOT NULL,
+        last_error TEXT,
+        UNIQUE (client_id, action, target)
+    );
+    CREATE INDEX IF NOT EXISTS idx_watches_next_check_at ON watches (next_check_at);
+    CREATE TABLE IF NOT EXISTS watch_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        watch_id INTEGER NOT NULL,
+        client_id TEXT NOT NULL,
+        action TEXT NOT NULL,
+        target TEXT NOT NULL,
+        previous_state INTEGER,
+        state INTEGER NOT NULL,
+        changed_at REAL NOT NULL,
+        webhook_url TEXT,
+        delivery_status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_watch_changes_client ON watch_changes (client_id, id);
+    CREATE INDEX IF NOT EXISTS idx_watch_changes_delivery ON watch_changes (delivery_status);
+    """
+    
+    def __init__(self, db_path):
+        self.enabled = Config.WATCH_ENABLED
+        self.db_path = db_path
+        self.schema_ready = False
+        self.thread = None
+        self.stop_event = threading.Event()
+    
+    def _connect(self):
+        """接続を作成（スレッドごとに作成する）"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        
+        if not self.schema_ready:
+            conn.executescript(self.SCHEMA)
+            self.schema_ready = True
+        
+        return conn
+    
+    def subscribe(self, client_id, watches, webhook_url=None, interval=None):
+        """
+        監視を登録（同じクライアント・アクション・対象の登録は設定を更新）
+        
+        watches: [{'action': 'follow', 'target': '@user'}, ...]
+        """
+        if not isinstance(watches, list) or not watches:
+            raise WatchError("watches must be a non-empty list")
+        if len(watches) > Config.WATCH_MAX_PER_REQUEST:
+            raise WatchError(f"watches must contain at most {Config.WATCH_MAX_PER_REQUEST} entries")
+        
+        try:
+            interval = max(int(interval or Config.WATCH_DEFAULT_INTERVAL), Config.WATCH_MIN_INTERVAL)
+        except (TypeError, ValueError):
+            raise WatchError("interval must be an integer (seconds)")
+        if webhook_url:
+            self._validate_webhook_url(webhook_url)
+        
+        rows = []
+        for watch in watches:
+            action = (watch or {}).get('action')
+            target = (watch or {}).get('target')
+            if action not in self.ACTIONS:
+                raise WatchError(f"Unsupported action: {action} (supported: {', '.join(self.ACTIONS)})")
+            if not target:
+                raise WatchError("target is required for each watch")
+            normalized = normalize_target(action, target)
+            if not re.fullmatch(self.TARGET_PATTERNS[action], normalized):
+                raise WatchError(f"Invalid {action} target: {target} ({self.TARGET_FORMATS[action]})")
+            rows.append((action, normalized))
+        
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                for action, target in rows:
+                    conn.execute(
+                        """
+                        INSERT INTO watches (client_id, action, target, webhook_url, interval, created_at, next_check_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (client_id, action, target)
+                        DO UPDATE SET webhook_url = excluded.webhook_url, interval = excluded.interval
+                        """,
+                        (client_id, action, target, webhook_url, interval, now, now)
+                    )
+            
+            subscribed = {}
+            for action, target in rows:
+                row = conn.execute(
+                    'SELECT * FROM watches WHERE client_id = ? AND action = ? AND target = ?',
+                    (client_id, action, target)
+                ).fetchone()
+                subscribed[row['id']] = self._watch_to_dict(row)
+            return list(subscribed.values())
+        finally:
+            conn.close()
+    
+    def list_watches(self, client_id, limit=1000):
+        """クライアントの監視一覧"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT * FROM watches WHERE client_id = ? ORDER BY id LIMIT ?', (client_id, limit)
+            ).fetchall()
+            return [self._watch_to_dict(row) for row in rows]
+        finally:
+            conn.close()
+    
+    def unsubscribe(self, client_id, watch_id):
+        """監視を解除"""
+        conn = self._connect()
+        try:
+            with conn:
+                deleted = conn.execute(
+                    'DELETE FROM watches WHERE id = ? AND client_id = ?', (watch_id, client_id)
+                ).rowcount
+            return deleted > 0
+        finally:
+            conn.close()
+    
+    def get_changes(self, client_id, since_id=0, limit=100):
+        """状態の変更履歴（since_id より後のもの）"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT * FROM watch_changes WHERE client_id = ? AND id > ? ORDER BY id LIMIT ?',
+                (client_id, since_id, limit)
+            ).fetchall()
+            return [self._change_to_dict(row) for row in rows]
+        finally:
+            conn.close()
+    
+    def start(self):
+        """バックグラウンドの再確認スレッドを開始"""
+        if not self.enabled or (self.thread and self.thread.is_alive()):
+            return
+        
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='watch-manager', daemon=True)
+        self.thread.start()
+        app_logger.info("Watch manager started")
+    
+    def stop(self):
+        """バックグラウンドスレッドを停止"""
+        self.stop_event.set()
+    
+    def _run(self):
+        """定期実行ループ"""
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                app_logger.error(f"Watch manager tick failed: {e}")
+            
+            self.stop_event.wait(Config.WATCH_TICK_INTERVAL)
+    
+    def tick(self):
+        """期限を迎えた監視の再確認と通知（クラスタ内の1ワーカーのみ実行）"""
+        lock = DistributedLock('watch_manager', ttl=3600)
+        if not lock.acquire(blocking=False):
+            return
+        
+        try:
+            self.run_batch()
+            self.deliver_changes()
+        finally:
+            lock.release()
+    
+    def run_batch(self):
+        """期限を迎えた監視をまとめて再確認"""
+        conn = self._connect()
+        try:
+            due = conn.execute(
+                'SELECT * FROM watches WHERE next_check_at <= ? ORDER BY next_check_at LIMIT ?',
+                (time.time(), Config.WATCH_BATCH_SIZE)
+            ).fetchall()
+            if not due:
+                return 0
+            
+            # 同じ (アクション, 対象) は複数クライアントが登録していても1回だけ確認する
+            pairs = sorted(set((row['action'], row['target']) for row in due))
+            states, errors = self._check_pairs(pairs)
+            
+            now = time.time()
+            with conn:
+                for row in due:
+                    key = (row['action'], row['target'])
+                    if key in errors:
+                        # 失敗した場合は状態を変えずに短い間隔で再確認
+                        conn.execute(
+                            'UPDATE watches SET last_error = ?, next_check_at = ? WHERE id = ?',
+                            (errors[key], now + min(row['interval'], Config.WATCH_MIN_INTERVAL), row['id'])
+                        )
+                        continue
+                    
+                    if states[key] is None:
+                        # 判定できなかった場合は前回の状態を維持し、通常の間隔で再確認
+                        conn.execute(
+                            'UPDATE watches SET last_checked_at = ?, next_check_at = ?, last_error = NULL WHERE id = ?',
+                            (now, now + row['interval'], row['id'])
+                        )
+                        continue
+                    
+                    state = 1 if states[key] else 0
+                    conn.execute(
+                        """
+                        UPDATE watches SET state = ?, last_checked_at = ?, next_check_at = ?, last_error = NULL
+                        WHERE id = ?
+                        """,
+                        (state, now, now + row['interval'], row['id'])
+                    )
+                    
+                    # 初回の確認は基準状態として記録のみ行い、変化した場合だけ変更履歴に残す
+                    if row['state'] is not None and row['state'] != state:
+                        conn.execute(
+                            """
+                            INSERT INTO watch_changes (watch_id, client_id, action, target, previous_state, state,
+                                                       changed_at, webhook_url, delivery_status)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            """,
+                            (row['id'], row['client_id'], row['action'], row['target'], row['state'], state,
+                             now, row['webhook_url'], 'pending' if row['webhook_url'] else 'none')
+                        )
+            
+            app_logger.info(
+                f"Watch batch re-checked {len(due)} watches "
+                f"({len(pairs)} unique targets, {len(errors)} failed)"
+            )
+            return len(due)
+        finally:
+            conn.close()
+    
+    def _check_pairs(self, pairs):
+        """
+        (アクション, 対象) の一覧を1つのブラウザで確認
+        
+        いいね・リポストは同じツイートを1回の読み込みで確認し、
+        コメントは同じツイートの返信を1回のクロールで確認する
+        
+        Returns:
+            (states, errors)（判定できなかった対象の状態はNone）
+        """
+        states = {}
+        errors = {}
+        tweets = {}
+        comments = {}
+        
+        for action, target in pairs:
+            if action in ('like', 'repost'):
+                tweets.setdefault(target, []).append(action)
+            elif action == 'comment':
+                tweet_id, username = target.split(':', 1)
+                comments.setdefault(tweet_id, []).append(username)
+        
+        # ページごとの確認（対象のキー一覧と、先読みするページ）
+        jobs = []
+        for action, target in pairs:
+            if action == 'follow':
+                jobs.append((
+                    [(action, target)],
+                    PipelineJob(
+                        f"{Config.X_BASE_URL}/{target}",
+                        lambda checker, target=target: {
+                            ('follow', target): checker.check_follow_status(target)['is_following']
+                        }
+                    )
+                ))
+        
+        for tweet_id, actions in tweets.items():
+            jobs.append((
+                [(action, tweet_id) for action in actions],
+                PipelineJob(
+                    self._tweet_url(tweet_id),
+                    lambda checker, tweet_id=tweet_id, actions=actions: {
+                        (action, tweet_id): state
+                        for action, state in checker.check_tweet_engagement(tweet_id, actions).items()
+                    }
+                )
+            ))
+        
+        for tweet_id, usernames in comments.items():
+            jobs.append((
+                [('comment', f"{tweet_id}:{username}") for username in usernames],
+                PipelineJob(
+                    self._tweet_url(tweet_id),
+                    lambda checker, tweet_id=tweet_id, usernames=usernames: self._comment_states(
+                        checker, tweet_id, usernames
+                    )
+                )
+            ))
+        
+        # 定期再確認は利用者のリクエストより後回しにし、WATCH_JOBS_PER_SLOT 件ごとに枠を返却する
+        # 空き枠があれば次の確認のページを別のタブで先読みする
+        chunk_size = max(Config.WATCH_JOBS_PER_SLOT, 1)
+        for offset in range(0, len(jobs), chunk_size):
+            with fair_scheduler.slot('background:watch', 'bulk'):
+                pipelined_executor.run(
+                    [job for _, job in jobs[offset:offset + chunk_size]], BatchChecker, 'background:watch', 'bulk'
+                )
+        
+        for keys, job in jobs:
+            if job.error is not None:
+                for key in keys:
+                    errors[key] = str(job.error)
+                continue
+            
+            states.update(job.result)
+        
+        return states, errors
+    
+    def _comment_states(self, checker, tweet_id, usernames):
+        """
+        返信の1回のクロールでコメントの状態を確認
+        
+        スクロール数の上限で途中までしか取得できていない場合、見つからなかったユーザーは未コメントとは限らないためNone
+        """
+        result = checker.check_comment_status_bulk(tweet_id, usernames)
+        complete = result['index']['complete']
+        return {
+            ('comment', f"{tweet_id}:{username}"): True if state['has_commented'] else (False if complete else None)
+            for username, state in result['results'].items()
+        }
+    
+    def _tweet_url(self, tweet_id):
+        """ツイートIDから確認時と同じURLを組み立て（_normalize_tweet_url と同じ形式）"""
+        return f"{Config.X_BASE_URL}/i/web/status/{tweet_id}"
+    
+    def deliver_changes(self):
+        """未送信の変更をWebhookごとにまとめて送信"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM watch_changes WHERE delivery_status = 'pending' ORDER BY id LIMIT 1000"
+            ).fetchall()
+            
+            by_webhook = {}
+            for row in rows:
+                by_webhook.setdefault(row['webhook_url'], []).append(row)
+            
+            for webhook_url, changes in by_webhook.items():
+                payload = [self._change_to_dict(row) for row in changes]
+                for change in payload:
+                    change.pop('delivery_status')
+                delivered = self._post_webhook(webhook_url, payload)
+                ids = [row['id'] for row in changes]
+                placeholders = ', '.join('?' for _ in ids)
+                
+                with conn:
+                    if delivered:
+                        conn.execute(
+                            f"UPDATE watch_changes SET delivery_status = 'delivered', attempts = attempts + 1 "
+                            f"WHERE id IN ({placeholders})", ids
+                        )
+                    else:
+                        # 規定回数失敗した変更は送信を諦める（変更フィードからは取得できる）
+                        conn.execute(
+                            f"""
+                            UPDATE watch_changes SET attempts = attempts + 1,
+                                delivery_status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                            WHERE id IN ({placeholders})
+                            """,
+                            [Config.WATCH_WEBHOOK_MAX_ATTEMPTS] + ids
+                        )
+        finally:
+            conn.close()
+    
+    def _validate_webhook_url(self, webhook_url):
+        """
+        Webhookの送信先を確認（内部ネットワークへのリクエストに使われないようにする）
+        
+        WATCH_WEBHOOK_ALLOWED_HOSTS 以外のホストは、名前解決したアドレスがすべてグローバルなものに限る
+        """
+        try:
+            parts = urlsplit(webhook_url)
+            host = parts.hostname
+            port = parts.port
+        except ValueError:
+            raise WatchError("webhook_url must be an http(s) URL")
+        if parts.scheme not in ('http', 'https') or not host:
+            raise WatchError("webhook_url must be an http(s) URL")
+        
+        allowed_hosts = [item.strip().lower() for item in Config.WATCH_WEBHOOK_ALLOWED_HOSTS.split(',') if item.strip()]
+        if host.lower() in allowed_hosts:
+            return
+        
+        try:
+            addresses = socket.getaddrinfo(host, port or (443 if parts.scheme == 'https' else 80), proto=socket.IPPROTO_TCP)
+        except (socket.gaierror, UnicodeError):
+            raise WatchError(f"webhook_url host could not be resolved: {host}")
+        
+        for address in addresses:
+            ip = ipaddress.ip_address(address[4][0].split('%', 1)[0])
+            if not ip.is_global or ip.is_multicast:
+                raise WatchError(f"webhook_url must not point to a private or internal address: {host}")
+    
+    def _post_webhook(self, webhook_url, changes):
+        """Webhookに変更を送信（WATCH_WEBHOOK_SECRET が設定されていれば署名を付ける）"""
+        # 登録後に名前解決の結果が変わっている場合があるため、送信のたびに確認する
+        try:
+            self._validate_webhook_url(webhook_url)
+        except WatchError as e:
+            app_logger.warning(f"Webhook delivery to {webhook_url} refused: {e}")
+            return False
+        
+        body = json.dumps({'changes': changes}, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if Config.WATCH_WEBHOOK_SECRET:
+            signature = hmac.new(Config.WATCH_WEBHOOK_SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+            headers['X-Signature-SHA256'] = signature
+        
+        try:
+            response = requests.post(
+                webhook_url, data=body, headers=headers,
+                timeout=Config.WATCH_WEBHOOK_TIMEOUT, allow_redirects=False
+            )
+            if 200 <= response.status_code < 300:
+                return True
+            app_logger.warning(f"Webhook {webhook_url} responded with {response.status_code}")
+        except requests.RequestException as e:
+            app_logger.warning(f"Webhook delivery to {webhook_url} failed: {e}")
+        return False
+    
+    def _watch_to_dict(self, row):
+        """監視の行をレスポンス用の辞書に変換"""
+        data = dict(row)
+        data.pop('client_id')
+        data['state'] = bool(data['state']) if data['state'] is not None else None
+        for key in ('created_at', 'last_checked_at', 'next_check_at'):
+            data[key] = datetime.utcfromtimestamp(data[key]).isoformat() if data[key] else None
+        return data
+    
+    def _change_to_dict(self, row):
+        """変更の行をレスポンス用の辞書に変換"""
+        return {
+            'id': row['id'],
+            'watch_id': row['watch_id'],
+            'action': row['action'],
+            'target': row['target'],
+            'previous_state': bool(row['previous_state']) if row['previous_state'] is not None else None,
+            'state': bool(row['state']),
+            'changed_at': datetime.utcfromtimestamp(row['changed_at']).isoformat(),
+            'delivery_status': row['delivery_status']
+        }
+
+# グローバルインスタンス
+watch_manager = WatchManager(Config.WATCH_DB_PATH)
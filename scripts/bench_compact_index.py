@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+コンパクトインデックスのベンチマーク
+
+Pythonのset（従来のJSONインデックスの読み込み後の形）とmmapのコンパクト形式について、
+ワーカー1つあたりのメモリ増加量（RSS）と検索レイテンシを比較する
+
+使い方:
+    python scripts/bench_compact_index.py --users 1000000 --lookups 100000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compact_index import CompactUserIndex, write_compact_index, hash_username
+
+def rss_kb():
+    """現在のプロセスのRSS（KB）"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+def generate_usernames(count, seed):
+    """ランダムなユーザー名を生成"""
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits + '_'
+    return [''.join(rng.choices(alphabet, k=rng.randint(4, 15))) for _ in range(count)]
+
+def measure_lookups(contains, hits, misses):
+    """ヒット・ミスそれぞれの平均検索時間（マイクロ秒）"""
+    results = {}
+    for name, queries in (('hit', hits), ('miss', misses)):
+        start = time.perf_counter()
+        for username in queries:
+            contains(username)
+        results[f'{name}_us'] = round((time.perf_counter() - start) / len(queries) * 1e6, 3)
+    return results
+
+def run_mode(args):
+    """1つの方式を計測（RSSを正しく測るため別プロセスで実行）"""
+    users = generate_usernames(args.users, seed=1)
+    rng = random.Random(2)
+    hits = rng.sample(users, min(args.lookups, len(users)))
+    misses = [f"miss_{i}" for i in range(args.lookups)]
+    
+    if args.mode == 'set':
+        with open(args.path, 'w') as f:
+            json.dump({'users': users}, f)
+        del users
+        
+        before = rss_kb()
+        with open(args.path) as f:
+            index = set(json.load(f)['users'])
+        loaded = rss_kb()
+        stats = measure_lookups(lambda username: username.lower() in index, hits, misses)
+    else:
+        write_compact_index(args.path, (hash_username(username) for username in users),
+                            bloom_bits_per_entry=0 if args.mode == 'compact' else 10)
+        del users
+        
+        before = rss_kb()
+        index = CompactUserIndex(args.path)
+        loaded = rss_kb()
+        stats = measure_lookups(index.contains, hits, misses)
+    
+    stats.update({
+        'mode': args.mode,
+        'users': args.users,
+        'file_bytes': os.path.getsize(args.path),
+        'rss_load_kb': loaded - before,
+        'rss_after_lookups_kb': rss_kb() - before
+    })
+    print(json.dumps(stats))
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact index benchmark')
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--mode', choices=['set', 'compact', 'bloom'])
+    parser.add_argument('--path')
+    args = parser.parse_args()
+    
+    if args.mode:
+        run_mode(args)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'mode':<8} {'file MB':>8} {'RSS MB':>8} {'hit us':>8} {'miss us':>8}")
+        for mode in ('set', 'compact', 'bloom'):
+            output = subprocess.check_output([
+                sys.executable, __file__, '--mode', mode,
+                '--users', str(args.users), '--lookups', str(args.lookups),
+                '--path', os.path.join(tmp_dir, f'{mode}.idx')
+            ])
+            stats = json.loads(output)
+            print(
+                f"{mode:<8} {stats['file_bytes'] / 1048576:>8.1f} {stats['rss_after_lookups_kb'] / 1024:>8.1f} "
+                f"{stats['hit_us']:>8.2f} {stats['miss_us']:>8.2f}"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+ブラウザプロファイルのベンチマーク
+
+standard と render_light のそれぞれで同じ確認を繰り返し、
+確認1件あたりのChromium（ブラウザプロセスと子プロセス）のCPU時間と所要時間を比較する
+CPU時間に対する所要時間の比から、CPU1コアあたりに同時に処理できる確認数（タブ数）の目安を算出する
+
+.env のログイン情報（または保存済みCookie）でX.comにログインして実行する
+ページの再利用・アプリ内の移動・台帳は無効にして、毎回ページを読み込む確認を計測する
+
+使い方:
+    python scripts/bench_render_profile.py --action like --target https://x.com/user/status/123 --checks 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILES = ('standard', 'render_light')
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+def process_tree_cpu_seconds(root_pid):
+    """プロセスと子孫プロセスのCPU時間の合計（秒、終了して回収された子プロセスの分を含む）"""
+    parents = {}
+    times = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # コマンド名に空白を含む場合があるため、最後の ')' 以降を分割する
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        pid = int(entry)
+        parents[pid] = int(fields[1])
+        # utime, stime, cutime, cstime
+        times[pid] = sum(int(value) for value in fields[11:15])
+    
+    total = 0
+    for pid, ticks in times.items():
+        ancestor = pid
+        while ancestor and ancestor != root_pid:
+            ancestor = parents.get(ancestor)
+        if ancestor == root_pid:
+            total += ticks
+    return total / CLOCK_TICKS
+
+def run_check(action, target):
+    """確認を1件実行"""
+    from scraper import FollowChecker, LikeChecker, RepostChecker
+    
+    if action == 'follow':
+        with FollowChecker() as checker:
+            return checker.check_follow_status(target)
+    if action == 'repost':
+        with RepostChecker() as checker:
+            return checker.check_repost_status(target)
+    with LikeChecker() as checker:
+        return checker.check_like_status(target)
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_profile(args):
+    """1つのプロファイルを計測（プロファイルは起動時の設定で決まるため別プロセスで実行）"""
+    from scraper import browser_pool
+    
+    # 初回はブラウザの起動とログインを含むため計測しない（ブラウザを起動するため最低1件は実行）
+    for _ in range(max(args.warmup, 1)):
+        run_check(args.action, args.target)
+    
+    browser_pid = browser_pool.browser.process_id
+    cpu_seconds = []
+    wall_seconds = []
+    failures = 0
+    
+    for _ in range(args.checks):
+        cpu_before = process_tree_cpu_seconds(browser_pid)
+        started = time.perf_counter()
+        try:
+            run_check(args.action, args.target)
+        except Exception:
+            failures += 1
+            continue
+        wall_seconds.append(time.perf_counter() - started)
+        cpu_seconds.append(process_tree_cpu_seconds(browser_pid) - cpu_before)
+    
+    browser_pool.shutdown()
+    
+    if not cpu_seconds:
+        print(json.dumps({'profile': args.profile, 'failures': failures}))
+        return
+    
+    cpu_mean = sum(cpu_seconds) / len(cpu_seconds)
+    wall_mean = sum(wall_seconds) / len(wall_seconds)
+    print(json.dumps({
+        'profile': args.profile,
+        'checks': len(cpu_seconds),
+        'failures': failures,
+        'cpu_mean_s': round(cpu_mean, 3),
+        'cpu_p90_s': round(percentile(cpu_seconds, 90), 3),
+        'wall_mean_s': round(wall_mean, 3),
+        'tabs_per_core': round(wall_mean / cpu_mean, 1) if cpu_mean else None
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description='Browser profile CPU benchmark')
+    parser.add_argument('--action', choices=['like', 'follow', 'repost'], default='like')
+    parser.add_argument('--target', required=True, help='tweet URL (like/repost) or username (follow)')
+    parser.add_argument('--checks', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--profile', choices=PROFILES)
+    args = parser.parse_args()
+    
+    if args.profile:
+        run_profile(args)
+        return
+    
+    print(f"{'profile':<13} {'checks':>6} {'fail':>5} {'CPU s':>7} {'CPU p90':>8} {'wall s':>7} {'tabs/core':>10}")
+    for profile in PROFILES:
+        env = dict(
+            os.environ,
+            BROWSER_PROFILE=profile,
+            BROWSER_POOL_SIZE='1',
+            TAB_REUSE_MAX_AGE='0',
+            SPA_NAVIGATION_ENABLED='False',
+            LEDGER_ENABLED='False'
+        )
+        output = subprocess.check_output([
+            sys.executable, __file__, '--profile', profile,
+            '--action', args.action, '--target', args.target,
+            '--checks', str(args.checks), '--warmup', str(args.warmup)
+        ], env=env)
+        stats = json.loads(output.splitlines()[-1])
+        if 'checks' not in stats:
+            print(f"{profile:<13} {0:>6} {stats['failures']:>5}")
+            continue
+        print(
+            f"{profile:<13} {stats['checks']:>6} {stats['failures']:>5} {stats['cpu_mean_s']:>7.2f} "
+            f"{stats['cpu_p90_s']:>8.2f} {stats['wall_mean_s']:>7.2f} {stats['tabs_per_core'] or 0:>10.1f}"
+        )
+
+if __name__ == '__main__':
+    main()
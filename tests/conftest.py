@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+# 設定は読み込み時に環境変数から決まるため、アプリのモジュールより先に一時ディレクトリを指定する
+STATE_DIR = tempfile.mkdtemp(prefix='x-scraping-tests-')
+os.environ.setdefault('LOCK_DIR', os.path.join(STATE_DIR, 'locks'))
+os.environ.setdefault('INDEX_DIR', os.path.join(STATE_DIR, 'indexes'))
+os.environ.setdefault('HISTORY_DB_PATH', os.path.join(STATE_DIR, 'history.db'))
+os.environ.setdefault('WATCH_DB_PATH', os.path.join(STATE_DIR, 'watches.db'))
+os.environ.setdefault('API_KEY', 'test-api-key')
+os.environ.setdefault('AUTO_LOGIN_ENABLED', 'False')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    X.comの代わりに fixtures のページを返す検証用サーバー
+    
+    検索は alice の返信のみ返し（carol の返信は検索に未反映の想定）、ツイートページには両方の返信を表示する
+    /limited/ 以下はレート制限のページを429で返す
+    """
+    
+    def do_GET(self):
+        if urlsplit(self.path).path.startswith('/limited/'):
+            with open(os.path.join(FIXTURE_DIR, 'rate_limited.html'), 'rb') as f:
+                body = f.read()
+            self.send_response(429)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+    
+    def translate_path(self, path):
+        parts = urlsplit(path)
+        if parts.path == '/search':
+            query = parse_qs(parts.query).get('q', [''])[0]
+            name = 'search_results.html' if 'from:alice' in query else 'search_empty.html'
+        elif parts.path.startswith('/i/web/status/'):
+            name = 'tweet.html'
+        else:
+            name = 'missing.html'
+        return os.path.join(FIXTURE_DIR, name)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope='session')
+def fixture_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(FixtureHandler, directory=FIXTURE_DIR))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.fixture(scope='session')
+def chromium():
+    """実際のブラウザを使うテスト用（Chromiumが無い環境ではスキップ）"""
+    from DrissionPage import ChromiumPage
+    from scraper.browser_pool import build_browser_options
+    
+    try:
+        ChromiumPage(addr_or_opts=build_browser_options()).quit()
+    except Exception as e:
+        pytest.skip(f"Chromium is not available: {e}")
@@ -0,0 +1,49 @@
+from scraper.follow_checker import FollowChecker
+from scraper.index_store import follower_index_store, retweeter_index_store
+from scraper.repost_checker import RepostChecker
+
+TWEET_ID = '1790000000000000001'
+
+def stub_follower_index(monkeypatch, checker, usernames, complete):
+    index = follower_index_store.write('campaign', usernames, complete=complete)
+    monkeypatch.setattr(checker, 'sync_follower_index', lambda account: index)
+
+def stub_retweeter_index(monkeypatch, checker, usernames, complete):
+    index = retweeter_index_store.write(TWEET_ID, usernames, complete=complete)
+    monkeypatch.setattr(checker, 'get_retweeter_index', lambda tweet_id: index)
+
+# リポスト一括確認
+
+def test_repost_bulk_complete_index_reports_misses(monkeypatch):
+    checker = RepostChecker()
+    stub_retweeter_index(monkeypatch, checker, ['alice'], complete=True)
+    result = checker.check_repost_status_bulk(TWEET_ID, ['@alice', 'bob'])
+    assert result['results'] == {'alice': True, 'bob': False}
+    assert result['reposted_users'] == ['alice']
+    assert result['unknown_users'] == []
+
+def test_repost_bulk_partial_index_reports_unknown(monkeypatch):
+    checker = RepostChecker()
+    stub_retweeter_index(monkeypatch, checker, ['alice'], complete=False)
+    result = checker.check_repost_status_bulk(TWEET_ID, ['alice', 'bob'])
+    assert result['results'] == {'alice': True, 'bob': None}
+    assert result['reposted_users'] == ['alice']
+    assert result['unknown_users'] == ['bob']
+
+# フォロー一括確認
+
+def test_follow_bulk_complete_index_reports_misses(monkeypatch):
+    checker = FollowChecker()
+    stub_follower_index(monkeypatch, checker, ['alice'], complete=True)
+    result = checker.check_followers_bulk('@campaign', ['alice', 'bob'])
+    assert result['results'] == {'alice': True, 'bob': False}
+    assert result['following_users'] == ['alice']
+    assert result['unknown_users'] == []
+
+def test_follow_bulk_partial_index_reports_unknown(monkeypatch):
+    checker = FollowChecker()
+    stub_follower_index(monkeypatch, checker, ['alice'], complete=False)
+    result = checker.check_followers_bulk('@campaign', ['alice', '@bob'])
+    assert result['results'] == {'alice': True, 'bob': None}
+    assert result['following_users'] == ['alice']
+    assert result['unknown_users'] == ['bob']
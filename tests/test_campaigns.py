@@ -0,0 +1,41 @@
+import pytest
+
+from config.config import Config
+from scraper.campaign_registry import CampaignError, campaign_registry
+
+TWEET_URL = 'https://x.com/campaign/status/1790000000000000001'
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+def post(client, path, body):
+    return client.post(path, json=body, headers={'X-API-Key': Config.API_KEY})
+
+@pytest.mark.parametrize('expires_in_hours', ['72', 0, -1, True, Config.CAMPAIGN_MAX_TTL_HOURS + 1])
+def test_register_rejects_invalid_expiry(client, expires_in_hours):
+    response = post(client, '/api/campaigns', {
+        'tweet_url': TWEET_URL, 'actions': ['repost'], 'expires_in_hours': expires_in_hours
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_REQUEST'
+
+def test_register_uses_default_expiry_only_when_omitted():
+    campaign = campaign_registry.register(TWEET_URL, actions=['repost'])
+    assert campaign['expires_at'] - campaign['created_at'] == Config.CAMPAIGN_DEFAULT_TTL_HOURS * 3600
+    
+    campaign = campaign_registry.register(TWEET_URL, actions=['repost'], expires_in_hours=0.5)
+    assert campaign['expires_at'] - campaign['created_at'] == 1800
+
+def test_verify_rejects_non_string_users(client):
+    campaign = campaign_registry.register(TWEET_URL, actions=['repost'])
+    with pytest.raises(CampaignError):
+        campaign_registry.verify(campaign['id'], ['alice', 42])
+    
+    response = post(client, f"/api/campaigns/{campaign['id']}/verify", {'users': [42]})
+    assert response.status_code == 400
+
+def test_bulk_check_rejects_non_string_users(client):
+    response = post(client, '/api/check/repost/bulk', {'tweet_url': TWEET_URL, 'checking_users': ['alice', 42]})
+    assert response.status_code == 400
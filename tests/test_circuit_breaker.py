@@ -0,0 +1,81 @@
+import pytest
+
+from config.config import Config
+from scraper.base_scraper import ElementNotFoundError, NavigationError
+from scraper.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitPermit
+from utils.distributed_lock import shared_state
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(Config, 'CIRCUIT_FAILURE_THRESHOLD', 2)
+    monkeypatch.setattr(Config, 'CIRCUIT_OPEN_SECONDS', 60)
+    monkeypatch.setattr(Config, 'CIRCUIT_MAX_OPEN_SECONDS', 900)
+    shared_state.set(CircuitBreaker.STATE_KEY, {})
+    breaker = CircuitBreaker()
+    breaker.enabled = True
+    yield breaker
+    shared_state.set(CircuitBreaker.STATE_KEY, {})
+
+def fail(breaker, error, times=1):
+    for _ in range(times):
+        breaker.record(breaker.allow(), error)
+
+def elapse_open_period(failure_class):
+    """開いている時間が過ぎた状態にする"""
+    state = shared_state.get(CircuitBreaker.STATE_KEY)
+    state[failure_class]['opened_at'] -= state[failure_class]['open_seconds']
+    shared_state.set(CircuitBreaker.STATE_KEY, state)
+
+def circuit_state(breaker, failure_class):
+    return breaker.get_status()['circuits'][failure_class]['state']
+
+def test_opens_at_threshold(breaker):
+    fail(breaker, NavigationError('timeout'))
+    assert circuit_state(breaker, 'navigation') == 'closed'
+    
+    fail(breaker, NavigationError('timeout'))
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.allow()
+    assert excinfo.value.failure_class == 'navigation'
+    assert 0 < excinfo.value.retry_after <= 60
+
+def test_failure_classes_have_separate_thresholds(breaker):
+    fail(breaker, ElementNotFoundError('missing'), times=2)
+    assert circuit_state(breaker, 'element_not_found') == 'closed'
+    breaker.release(breaker.allow())
+
+def test_half_open_probe_closes_on_success(breaker):
+    fail(breaker, NavigationError('timeout'), times=2)
+    elapse_open_period('navigation')
+    assert circuit_state(breaker, 'navigation') == 'half_open'
+    
+    # 試行を通すのは1件のみ
+    probe = breaker.allow()
+    assert list(probe.probes) == ['navigation']
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    
+    breaker.record(probe)
+    assert circuit_state(breaker, 'navigation') == 'closed'
+    assert breaker.allow().probes == {}
+
+def test_failed_probe_reopens_for_longer(breaker):
+    fail(breaker, NavigationError('timeout'), times=2)
+    elapse_open_period('navigation')
+    
+    breaker.record(breaker.allow(), NavigationError('timeout'))
+    entry = shared_state.get(CircuitBreaker.STATE_KEY)['navigation']
+    assert (entry['state'], entry['open_seconds'], entry['trips']) == ('open', 120, 2)
+
+def test_released_probe_can_be_retried(breaker):
+    fail(breaker, NavigationError('timeout'), times=2)
+    elapse_open_period('navigation')
+    
+    breaker.release(breaker.allow())
+    probe = breaker.allow()
+    assert list(probe.probes) == ['navigation']
+    breaker.release(probe)
+
+def test_success_while_closed_is_not_written(breaker):
+    breaker.record(CircuitPermit())
+    assert shared_state.get(CircuitBreaker.STATE_KEY) == {}
@@ -0,0 +1,132 @@
+import pytest
+
+from config.config import Config
+from scraper.base_scraper import ScrapingError
+from scraper.comment_checker import CommentChecker
+
+TWEET_ID = '1790000000000000001'
+
+def commented(username):
+    return {
+        'has_commented': True,
+        'comment_count': 1,
+        'comments': [{'username': username, 'text': '', 'timestamp': None, 'comment_id': '1790000000000000101'}]
+    }
+
+class StubbedLookup(CommentChecker):
+    """検索とスクロールを差し替えて、呼び出された順を記録するチェッカー"""
+    
+    def __init__(self, search_result=None, scroll_result=None):
+        super().__init__()
+        self.is_logged_in = True
+        self.calls = []
+        self.search_result = search_result
+        self.scroll_result = scroll_result
+    
+    def _search_user_replies(self, tweet_id, username, collect_all=False):
+        self.calls.append('search')
+        return self.search_result
+    
+    def _scroll_user_replies(self, normalized_url, tweet_id, username, collect_all=False):
+        self.calls.append('scroll')
+        return self.scroll_result
+
+# 検索方法の選択
+
+def test_auto_uses_search_hit_without_scrolling():
+    checker = StubbedLookup(search_result=commented('alice'))
+    result = checker.check_comment_status(TWEET_ID, 'alice', lookup_strategy='auto')
+    assert result['has_commented'] is True
+    assert checker.calls == ['search']
+
+def test_auto_falls_back_to_scroll_on_search_miss():
+    checker = StubbedLookup(search_result=None, scroll_result=commented('carol'))
+    result = checker.check_comment_status(TWEET_ID, '@carol', lookup_strategy='auto')
+    assert result['has_commented'] is True
+    assert checker.calls == ['search', 'scroll']
+
+def test_search_only_does_not_scroll():
+    checker = StubbedLookup(search_result=None, scroll_result=commented('carol'))
+    result = checker.check_comment_status(TWEET_ID, 'carol', lookup_strategy='search')
+    assert result['has_commented'] is False
+    assert checker.calls == ['search']
+
+def test_scroll_only_skips_search():
+    checker = StubbedLookup(search_result=commented('carol'), scroll_result=commented('carol'))
+    checker.check_comment_status(TWEET_ID, 'carol', lookup_strategy='scroll')
+    assert checker.calls == ['scroll']
+
+def test_configured_strategy_is_the_default(monkeypatch):
+    monkeypatch.setattr(Config, 'COMMENT_LOOKUP_STRATEGY', 'scroll')
+    checker = StubbedLookup(scroll_result=commented('carol'))
+    checker.check_comment_status(TWEET_ID, 'carol')
+    assert checker.calls == ['scroll']
+
+def test_invalid_strategy_fails_before_browser_setup():
+    checker = StubbedLookup()
+    checker.is_logged_in = False
+    with pytest.raises(ScrapingError):
+        checker.check_comment_status(TWEET_ID, 'alice', lookup_strategy='fast')
+    assert checker.calls == []
+    assert checker._page is None
+
+def test_api_rejects_invalid_strategy():
+    from app import app
+    
+    response = app.test_client().post(
+        '/api/check/comment',
+        json={'tweet_url': TWEET_ID, 'checking_user': 'alice', 'lookup_strategy': 'fast'},
+        headers={'X-API-Key': Config.API_KEY}
+    )
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_REQUEST'
+
+# X_BASE_URL に合わせたURL・Cookieの扱い
+
+def test_tweet_urls_follow_base_url(monkeypatch):
+    monkeypatch.setattr(Config, 'X_BASE_URL', 'http://127.0.0.1:8765')
+    checker = CommentChecker()
+    expected = f"http://127.0.0.1:8765/i/web/status/{TWEET_ID}"
+    assert checker._normalize_tweet_url(f"http://127.0.0.1:8765/campaign/status/{TWEET_ID}") == expected
+    assert checker._normalize_tweet_url(f"https://x.com/campaign/status/{TWEET_ID}") == expected
+    assert checker._normalize_tweet_url('https://example.com/campaign/status/42') is None
+
+def test_cookie_domain_follows_base_url(monkeypatch):
+    checker = CommentChecker()
+    cookie = {'name': 'auth_token', 'value': 'token'}
+    
+    monkeypatch.setattr(Config, 'X_BASE_URL', 'http://127.0.0.1:8765')
+    local = checker._to_cdp_cookie(cookie)
+    assert (local['domain'], local['secure']) == ('127.0.0.1', False)
+    
+    monkeypatch.setattr(Config, 'X_BASE_URL', 'https://x.com')
+    production = checker._to_cdp_cookie(cookie)
+    assert (production['domain'], production['secure']) == ('.x.com', True)
+
+# 検証用サーバーのページを実際のブラウザで確認（Chromiumが無い環境ではスキップ）
+
+@pytest.fixture
+def live_checker(fixture_server, chromium, monkeypatch):
+    monkeypatch.setattr(Config, 'X_BASE_URL', fixture_server)
+    monkeypatch.setattr(Config, 'SEARCH_RESULT_TIMEOUT', 3)
+    checker = CommentChecker()
+    checker.is_logged_in = True
+    monkeypatch.setattr(checker, 'random_delay', lambda *args: None)
+    yield checker
+    checker.close()
+
+def test_live_search_hit(live_checker):
+    result = live_checker.check_comment_status(TWEET_ID, 'alice', lookup_strategy='search')
+    assert result['has_commented'] is True
+    assert result['comments'][0]['comment_id'] == '1790000000000000101'
+    assert '/search' in live_checker.page.url
+
+def test_live_search_miss_falls_back_to_scroll(live_checker):
+    result = live_checker.check_comment_status(TWEET_ID, 'carol', lookup_strategy='auto')
+    assert result['has_commented'] is True
+    assert result['comments'][0]['comment_id'] == '1790000000000000102'
+    assert '/i/web/status/' in live_checker.page.url
+
+def test_live_search_only_misses_unindexed_reply(live_checker):
+    result = live_checker.check_comment_status(TWEET_ID, 'carol', lookup_strategy='search')
+    assert result['has_commented'] is False
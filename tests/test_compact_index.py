@@ -0,0 +1,47 @@
+import os
+
+from utils.compact_index import CompactIndex, CompactUserIndex, hash_username, write_compact_index
+
+def test_round_trip(tmp_path):
+    path = os.path.join(tmp_path, 'followers_campaign.idx')
+    metadata = {'key': 'campaign', 'complete': True, 'created_at': 1.0, 'synced_at': 2.0, 'sync_count': 3}
+    write_compact_index(path, [hash_username(name) for name in ('alice', '@Bob', 'bob')], metadata)
+    
+    index = CompactUserIndex(path)
+    assert len(index) == 2
+    assert 'alice' in index and '@BOB' in index
+    assert 'carol' not in index
+    assert (index.key, index.complete, index.sync_count) == ('campaign', True, 3)
+    assert sorted(index.iter_hashes()) == sorted([hash_username('alice'), hash_username('bob')])
+    assert index.is_current()
+    
+    # 置換されたファイルは開き直しが必要と判定される
+    write_compact_index(path, [hash_username('carol')], metadata)
+    assert not index.is_current()
+    index.close()
+
+def test_empty_index(tmp_path):
+    path = os.path.join(tmp_path, 'empty.idx')
+    write_compact_index(path, [], bloom_bits_per_entry=10)
+    index = CompactIndex(path)
+    assert len(index) == 0
+    assert 'alice' not in index
+    index.close()
+
+def test_bloom_filter_has_no_false_negatives(tmp_path):
+    path = os.path.join(tmp_path, 'bloom.idx')
+    members = [f"user{i}" for i in range(5000)]
+    write_compact_index(path, [hash_username(name) for name in members], bloom_bits_per_entry=10)
+    
+    index = CompactIndex(path)
+    assert index.bloom_bits == 5000 * 10
+    assert all(name in index for name in members)
+    # Bloomフィルターの誤検知は二分探索で除外される
+    assert not any(f"other{i}" in index for i in range(5000))
+    index.close()
+
+def test_write_leaves_no_temp_files(tmp_path):
+    path = os.path.join(tmp_path, 'followers_campaign.idx')
+    for _ in range(3):
+        write_compact_index(path, [hash_username('alice')])
+    assert os.listdir(tmp_path) == ['followers_campaign.idx']
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from config.config import Config
+from scraper.hedging import HedgedExecutor
+from scraper.scheduler import fair_scheduler
+
+class FakeChecker:
+    """最初の1件だけ中断されるまで終わらないチェッカー"""
+    
+    instances = []
+    navigated = True
+    
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.closed = False
+        FakeChecker.instances.append(self)
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def close(self):
+        self.closed = True
+
+def check(checker):
+    if checker is FakeChecker.instances[0]:
+        checker.cancelled.wait(timeout=5)
+        raise RuntimeError('cancelled')
+    return {'answer': len(FakeChecker.instances)}
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(fair_scheduler, 'capacity', 2)
+    monkeypatch.setattr(Config, 'HEDGE_MAX_FRACTION', 1.0)
+    monkeypatch.setattr(Config, 'HEDGE_MIN_SAMPLES', 5)
+    FakeChecker.instances = []
+    
+    executor = HedgedExecutor()
+    executor.enabled = True
+    for _ in range(5):
+        executor.record_latency('like', 0.05)
+    return executor
+
+def test_hedge_answers_and_cancels_the_slow_attempt(executor):
+    ticket = fair_scheduler.acquire('api_key:client')
+    started = time.monotonic()
+    winner = executor.run('like', ticket, FakeChecker, check)
+    
+    assert winner.hedge and winner.result == {'answer': 2}
+    assert FakeChecker.instances[0].cancelled.is_set()
+    assert executor.stats['hedged'] == executor.stats['hedge_wins'] == 1
+    
+    # 記録する所要時間は最初の実行の開始から回答まで
+    assert executor.latencies['like'][-1] >= 0.05
+    assert executor.latencies['like'][-1] <= time.monotonic() - started
+    
+    deadline = time.monotonic() + 2
+    while fair_scheduler.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fair_scheduler.active == 0
+
+def test_no_hedge_without_enough_samples(executor, monkeypatch):
+    monkeypatch.setattr(Config, 'HEDGE_MIN_SAMPLES', 100)
+    ticket = fair_scheduler.acquire('api_key:client')
+    
+    attempt = executor.run('like', ticket, FakeChecker, lambda checker: 'answer')
+    assert not attempt.hedge and attempt.result == 'answer'
+    assert len(FakeChecker.instances) == 1 and FakeChecker.instances[0].closed
+    assert executor.stats['hedged'] == 0
+    assert fair_scheduler.active == 0
+
+def test_answers_without_a_page_load_are_not_latency_samples(executor):
+    class LedgerChecker(FakeChecker):
+        navigated = False
+    
+    ticket = fair_scheduler.acquire('api_key:client')
+    executor.run('follow', ticket, LedgerChecker, lambda checker: {'source': 'ledger'})
+    assert 'follow' not in executor.latencies
@@ -0,0 +1,83 @@
+import pytest
+
+from config.config import Config
+from scraper import retry_policy
+from scraper.base_scraper import BaseScraper, RateLimitError
+from scraper.concurrency_limiter import AdaptiveConcurrencyLimiter
+from scraper.retry_policy import classify_error, navigation_retry
+
+class FakeWait:
+    def doc_loaded(self, timeout=None):
+        return True
+    
+    def ele_loaded(self, locator, timeout=None):
+        return True
+
+class FakePage:
+    """読み込むたびに同じレート制限の検出結果を返すページ"""
+    
+    def __init__(self, rate_limit=None):
+        self.rate_limit = rate_limit
+        self.url = 'about:blank'
+        self.wait = FakeWait()
+        self.loads = []
+    
+    def get(self, url, **kwargs):
+        self.loads.append(url)
+        self.url = url
+    
+    def run_cdp(self, *args, **kwargs):
+        return {}
+    
+    def run_js(self, script, *args):
+        if script == BaseScraper.RATE_LIMIT_JS:
+            return self.rate_limit
+        return None
+
+def make_scraper(monkeypatch, rate_limit):
+    scraper = BaseScraper()
+    scraper.page = FakePage(rate_limit)
+    monkeypatch.setattr(scraper, 'optional_sleep', lambda seconds: None)
+    monkeypatch.setattr(retry_policy.time, 'sleep', lambda seconds: None)
+    return scraper
+
+def test_rate_limited_page_raises(monkeypatch):
+    scraper = make_scraper(monkeypatch, 'api')
+    with pytest.raises(RateLimitError):
+        scraper._load_page('https://x.com/someone')
+
+def test_navigation_retries_rate_limit_as_throttle(monkeypatch):
+    scraper = make_scraper(monkeypatch, 'page')
+    with pytest.raises(RateLimitError) as excinfo:
+        scraper.navigate_to_url('https://x.com/someone')
+    
+    assert classify_error(excinfo.value) == 'throttle'
+    assert len(scraper.page.loads) == navigation_retry.max_attempts
+
+def test_normal_page_loads(monkeypatch):
+    scraper = make_scraper(monkeypatch, None)
+    assert scraper.navigate_to_url('https://x.com/someone') is True
+    assert len(scraper.page.loads) == 1
+
+def test_rate_limit_reduces_concurrency(monkeypatch):
+    scraper = make_scraper(monkeypatch, 'page')
+    with pytest.raises(RateLimitError) as excinfo:
+        scraper.navigate_to_url('https://x.com/someone')
+    
+    limiter = AdaptiveConcurrencyLimiter()
+    applied = []
+    monkeypatch.setattr(limiter, '_apply', lambda reason, **details: applied.append(reason))
+    limiter.enabled = True
+    limiter.min_limit = 1
+    limiter.limit = 4.0
+    limiter.last_decrease = float('-inf')
+    
+    limiter.record(1.0, excinfo.value)
+    assert applied == ['rate_limit']
+    assert limiter.limit == 4.0 * Config.CONCURRENCY_BACKOFF
+
+def test_live_rate_limit_page(fixture_server, chromium, monkeypatch):
+    monkeypatch.setattr(navigation_retry, 'max_attempts', 1)
+    with BaseScraper() as scraper:
+        with pytest.raises(RateLimitError):
+            scraper.navigate_to_url(f"{fixture_server}/limited/home")
@@ -0,0 +1,30 @@
+import os
+import time
+
+from utils.history_store import HistoryStore
+from utils.result_cache import ResultCache
+
+def wait_for_writes(store, count):
+    deadline = time.time() + 5
+    while store.written < count and time.time() < deadline:
+        time.sleep(0.05)
+    assert store.written == count
+
+def test_warm_skips_uncacheable_results(tmp_path):
+    store = HistoryStore(os.path.join(tmp_path, 'history.db'))
+    store.enabled = True
+    store.flush_interval = 0.05
+    
+    store.record('like', '1790000000000000001', True, result={'is_liked': True})
+    store.record('comment', '1790000000000000001:alice', True, result={'comments': ['all']}, cacheable=False)
+    store.record('repost_bulk', '1790000000000000001', True, result={'reposted_users': []}, cacheable=False)
+    wait_for_writes(store, 3)
+    
+    cache = ResultCache(ttl=600, max_entries=100)
+    assert cache.warm(store) == 1
+    assert cache.get('like', '1790000000000000001')['is_liked'] is True
+    assert cache.get('comment', '1790000000000000001:alice') is None
+    assert cache.get('repost_bulk', '1790000000000000001') is None
+    
+    # 障害時の古い結果にも使わない
+    assert store.latest_result('comment', '1790000000000000001:alice', 600) is None
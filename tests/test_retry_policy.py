@@ -0,0 +1,73 @@
+import pytest
+from DrissionPage import errors as dp_errors
+
+from scraper import retry_policy
+from scraper.base_scraper import ElementNotFoundError, LoginRequiredError, NavigationError, RateLimitError
+from scraper.retry_policy import RetryPolicy, classify_error
+
+@pytest.mark.parametrize('error, category', [
+    (NavigationError('failed'), 'transient'),
+    (RateLimitError('limited'), 'throttle'),
+    (LoginRequiredError('expired'), 'auth'),
+    (ElementNotFoundError('missing'), 'not_found'),
+    (Exception('HTTP 429 Too Many Requests'), 'throttle'),
+    (Exception('Rate limit exceeded'), 'throttle'),
+    (dp_errors.ElementNotFoundError(), 'not_found'),
+    (dp_errors.PageDisconnectedError(), 'transient'),
+    (TimeoutError(), 'transient'),
+    (ConnectionError(), 'transient'),
+    (ValueError('bad value'), 'permanent')
+])
+def test_classify_error(error, category):
+    assert classify_error(error) == category
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry_policy.time, 'sleep', slept.append)
+    return slept
+
+def failing(error, calls):
+    def func():
+        calls.append(1)
+        raise error
+    return func
+
+def test_retries_only_configured_categories(sleeps):
+    policy = RetryPolicy('test', 3, {'transient': 1.0}, 10)
+    
+    calls = []
+    with pytest.raises(NavigationError):
+        policy.run(failing(NavigationError('failed'), calls))
+    assert len(calls) == 3 and len(sleeps) == 2
+    
+    calls = []
+    with pytest.raises(LoginRequiredError):
+        policy.run(failing(LoginRequiredError('expired'), calls))
+    assert len(calls) == 1
+
+def test_returns_after_transient_failure(sleeps):
+    policy = RetryPolicy('test', 3, {'transient': 1.0}, 10)
+    outcomes = [NavigationError('failed'), 'ok']
+    
+    def func():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    assert policy.run(func) == 'ok'
+    assert len(sleeps) == 1
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy('test', 5, {'throttle': 4.0}, 10)
+    for retry_number in range(4):
+        cap = min(10, 4.0 * 2 ** retry_number)
+        assert cap / 2 <= policy.backoff('throttle', retry_number) <= cap
+
+def test_does_not_retry_past_deadline(sleeps):
+    policy = RetryPolicy('test', 3, {'transient': 5.0}, 10)
+    calls = []
+    with pytest.raises(NavigationError):
+        policy.run(failing(NavigationError('failed'), calls), deadline=retry_policy.time.monotonic() + 1)
+    assert len(calls) == 1 and sleeps == []
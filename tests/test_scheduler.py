@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from config.config import Config
+from scraper.base_scraper import CapacityExceededError
+from scraper.scheduler import FairScheduler
+
+@pytest.fixture(autouse=True)
+def scheduler_config(monkeypatch):
+    monkeypatch.setattr(Config, 'SCHEDULER_INTERACTIVE_RESERVE', 1)
+    monkeypatch.setattr(Config, 'SCHEDULER_MAX_QUEUE', 16)
+
+# バックグラウンド処理の上限
+
+def test_background_never_fills_every_slot():
+    scheduler = FairScheduler(3)
+    tickets = [scheduler.acquire('background:ledger', 'bulk') for _ in range(2)]
+    
+    with pytest.raises(CapacityExceededError):
+        scheduler.acquire('background:watch', 'bulk', timeout=0.1)
+    assert scheduler.try_acquire('background:watch', 'bulk') is None
+    assert (scheduler.active, scheduler.background_active) == (2, 2)
+    
+    # 残した枠は利用者のリクエストに割り当てられる
+    interactive = scheduler.acquire('api_key:client', timeout=0.1)
+    assert scheduler.active == 3
+    
+    for ticket in tickets + [interactive]:
+        scheduler.release(ticket)
+    assert (scheduler.active, scheduler.background_active) == (0, 0)
+
+def test_waiting_background_does_not_block_interactive():
+    scheduler = FairScheduler(2)
+    running = scheduler.acquire('background:ledger', 'bulk')
+    
+    granted = []
+    waiter = threading.Thread(target=lambda: granted.append(scheduler.acquire('background:watch', 'bulk')))
+    waiter.start()
+    
+    interactive = scheduler.acquire('api_key:client', timeout=0.5)
+    assert not granted
+    
+    # バックグラウンド処理の枠が返却されれば、待っていたバックグラウンド処理に割り当てる
+    scheduler.release(running)
+    waiter.join(timeout=1)
+    assert len(granted) == 1 and granted[0].background
+    
+    scheduler.release(granted[0])
+    scheduler.release(interactive)
+
+def test_single_slot_is_shared_with_background():
+    scheduler = FairScheduler(1)
+    ticket = scheduler.acquire('background:ledger', 'bulk', timeout=0.1)
+    assert scheduler.background_active == 1
+    scheduler.release(ticket)
+
+def test_background_time_is_not_a_service_time_sample():
+    scheduler = FairScheduler(2)
+    scheduler.release(scheduler.acquire('background:ledger', 'bulk'))
+    assert scheduler._service_time() is None
+    
+    scheduler.release(scheduler.acquire('api_key:client'))
+    assert scheduler._service_time() is not None
+
+# 受け付けの判定
+
+def test_admits_when_a_slot_is_free():
+    scheduler = FairScheduler(1)
+    scheduler.service_times.append(60.0)
+    scheduler.release(scheduler.acquire('api_key:client', timeout=1))
+    assert scheduler.stats['interactive']['shed'] == 0
+
+def test_sheds_when_estimated_wait_exceeds_timeout():
+    scheduler = FairScheduler(1)
+    running = scheduler.acquire('api_key:client')
+    scheduler.service_times.extend([20.0] * 3)
+    
+    # 処理中の1件の残り（平均して半分）で10秒待つ見込みに対して上限は5秒
+    with pytest.raises(CapacityExceededError) as excinfo:
+        scheduler.acquire('api_key:other', timeout=5)
+    
+    assert excinfo.value.retry_after == 5
+    assert scheduler.stats['interactive']['shed'] == 1
+    assert scheduler.waiting == []
+    scheduler.release(running)
+
+def test_sheds_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(Config, 'SCHEDULER_MAX_QUEUE', 0)
+    scheduler = FairScheduler(1)
+    running = scheduler.acquire('api_key:client')
+    
+    # 処理時間の記録が無い場合は待ち時間の上限を Retry-After にする
+    with pytest.raises(CapacityExceededError) as excinfo:
+        scheduler.acquire('api_key:other', timeout=7)
+    
+    assert excinfo.value.retry_after == 7
+    scheduler.release(running)
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from scraper.watch_manager import BatchChecker, WatchManager
+
+TWEET_ID = '1790000000000000001'
+
+@pytest.fixture
+def manager(tmp_path):
+    return WatchManager(os.path.join(tmp_path, 'watches.db'))
+
+def stub_reply_crawl(monkeypatch, has_commented, complete):
+    def check_comment_status_bulk(self, tweet_url, usernames, max_scroll_attempts=None):
+        return {
+            'results': {username: {'has_commented': has_commented} for username in usernames},
+            'index': {'complete': complete}
+        }
+    monkeypatch.setattr(BatchChecker, 'check_comment_status_bulk', check_comment_status_bulk)
+
+def recheck(manager):
+    conn = manager._connect()
+    with conn:
+        conn.execute('UPDATE watches SET next_check_at = 0')
+    conn.close()
+    manager.run_batch()
+
+def watch_state(manager):
+    conn = manager._connect()
+    try:
+        state = conn.execute('SELECT state FROM watches').fetchone()['state']
+        changes = conn.execute('SELECT COUNT(*) FROM watch_changes').fetchone()[0]
+        return state, changes
+    finally:
+        conn.close()
+
+def test_partial_reply_index_does_not_record_a_change(manager, monkeypatch):
+    manager.subscribe('client', [{'action': 'comment', 'target': f"{TWEET_ID}:alice"}])
+    
+    stub_reply_crawl(monkeypatch, has_commented=True, complete=False)
+    recheck(manager)
+    assert watch_state(manager) == (1, 0)
+    
+    # 途中までの返信に見つからなくても、前回の状態を維持する
+    stub_reply_crawl(monkeypatch, has_commented=False, complete=False)
+    recheck(manager)
+    assert watch_state(manager) == (1, 0)
+    
+    # 末尾までクロールして見つからなければ変更として記録する
+    stub_reply_crawl(monkeypatch, has_commented=False, complete=True)
+    recheck(manager)
+    assert watch_state(manager) == (0, 1)
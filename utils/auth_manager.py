@@ -154,6 +154,29 @@ class AuthManager:
             # フォールバック
             self.session_valid_until = datetime.utcnow() + timedelta(hours=valid_duration_hours)
     
+    def get_session_deadline(self):
+        """セッションの有効期限（Cookieファイルの鮮度も考慮）を取得"""
+        try:
+            session_file = os.path.join(os.path.dirname(self.cookie_file), 'session_validity.json')
+            
+            if not os.path.exists(session_file) or not os.path.exists(self.cookie_file):
+                return None
+            
+            with open(session_file, 'r') as f:
+                session_data = json.load(f)
+            
+            last_valid = datetime.fromisoformat(session_data.get('last_valid', '2000-01-01T00:00:00'))
+            validity_hours = session_data.get('validity_hours', 24)
+            
+            # is_session_valid と同じく、Cookieファイルの更新時間からも期限を判定
+            cookie_mtime = datetime.utcfromtimestamp(os.path.getmtime(self.cookie_file))
+            
+            return min(last_valid, cookie_mtime) + timedelta(hours=validity_hours)
+            
+        except Exception as e:
+            app_logger.error(f"Error getting session deadline: {e}")
+            return None
+    
     def invalidate_session(self):
         """セッションを無効化"""
         self.session_valid_until = None
@@ -0,0 +1,182 @@
+import os
+import json
+import mmap
+import time
+import struct
+import hashlib
+import tempfile
+from bisect import bisect_left
+from datetime import datetime
+
+# ファイル形式:
+#   ヘッダー(48バイト) | Bloomフィルター(8バイト境界に揃える) | ソート済みuint64ハッシュ配列 | メタデータ(JSON)
+MAGIC = b'XSIDX001'
+HEADER_FORMAT = '<8sQQIIQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+def hash_username(username):
+    """ユーザー名を64ビットのハッシュ値に変換（大文字小文字・@は区別しない）"""
+    normalized = username.lstrip('@').lower().encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(normalized, digest_size=8).digest(), 'little')
+
+def _bloom_positions(value, bloom_bits, bloom_hashes):
+    """ダブルハッシングでBloomフィルターのビット位置を算出"""
+    h1 = value & 0xFFFFFFFF
+    h2 = (value >> 32) | 1
+    return [(h1 + i * h2) % bloom_bits for i in range(bloom_hashes)]
+
+def write_compact_index(path, hashes, metadata=None, bloom_bits_per_entry=0, bloom_hashes=7):
+    """
+    ハッシュ値の集合をコンパクト形式で書き込み
+    
+    一時ファイルに書き込んでから os.replace で置換するため、
+    読み込み中のワーカーは古いファイルのマッピングを使い続けられる
+    
+    bloom_bits_per_entry を指定するとBloomフィルターを付加する
+    （Python実装ではビット位置の計算が二分探索より遅いため既定では無効）
+    """
+    values = sorted(set(hashes))
+    count = len(values)
+    
+    bloom_bits = 0
+    bloom = b''
+    if bloom_bits_per_entry and count:
+        bloom_bits = count * bloom_bits_per_entry
+        bloom_array = bytearray((bloom_bits + 63) // 64 * 8)
+        for value in values:
+            for position in _bloom_positions(value, bloom_bits, bloom_hashes):
+                bloom_array[position >> 3] |= 1 << (position & 7)
+        bloom = bytes(bloom_array)
+    else:
+        bloom_hashes = 0
+    
+    metadata_bytes = json.dumps(metadata or {}).encode('utf-8')
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, count, bloom_bits, bloom_hashes, 0, len(bloom), len(metadata_bytes)
+    )
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 同じプロセスの別スレッドも同じインデックスを書き込むため、一時ファイル名は書き込みごとに一意にする
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(bloom)
+            f.write(struct.pack(f'<{count}Q', *values))
+            f.write(metadata_bytes)
+        
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class CompactIndex:
+    """mmapで読み込み専用に共有されるユーザーインデックス"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.stat = os.stat(path)
+        
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, self.count, self.bloom_bits, self.bloom_hashes, _, bloom_size, metadata_size = \
+            struct.unpack_from(HEADER_FORMAT, self.mmap, 0)
+        if magic != MAGIC:
+            self.mmap.close()
+            raise ValueError(f"Invalid compact index file: {path}")
+        
+        self.bloom_offset = HEADER_SIZE
+        values_offset = HEADER_SIZE + bloom_size
+        metadata_offset = values_offset + self.count * 8
+        
+        # ページキャッシュ上のデータを直接参照（コピーしない）
+        self.values = memoryview(self.mmap)[values_offset:metadata_offset].cast('Q')
+        self.metadata = json.loads(bytes(self.mmap[metadata_offset:metadata_offset + metadata_size]) or b'{}')
+    
+    def is_current(self):
+        """ファイルが置換されていないか"""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (current.st_ino, current.st_mtime_ns) == (self.stat.st_ino, self.stat.st_mtime_ns)
+    
+    def contains_hash(self, value):
+        """ハッシュ値が含まれるか"""
+        if not self.count:
+            return False
+        
+        # Bloomフィルターで大半の不一致を二分探索前に除外
+        if self.bloom_bits:
+            for position in _bloom_positions(value, self.bloom_bits, self.bloom_hashes):
+                if not self.mmap[self.bloom_offset + (position >> 3)] & (1 << (position & 7)):
+                    return False
+        
+        index = bisect_left(self.values, value)
+        return index < self.count and self.values[index] == value
+    
+    def contains(self, username):
+        return self.contains_hash(hash_username(username))
+    
+    def __contains__(self, username):
+        return self.contains(username)
+    
+    def __len__(self):
+        return self.count
+    
+    def iter_hashes(self):
+        """すべてのハッシュ値を返す（再書き込み用）"""
+        return iter(self.values)
+    
+    def close(self):
+        """マッピングを解放"""
+        try:
+            self.values.release()
+            self.mmap.close()
+        except (BufferError, ValueError):
+            # 参照中のビューがある場合はGCに任せる
+            pass
+
+class CompactUserIndex(CompactIndex):
+    """メタデータ（同期日時、完全性等）付きのユーザー一覧インデックス"""
+    
+    @property
+    def key(self):
+        return self.metadata.get('key')
+    
+    @property
+    def complete(self):
+        return self.metadata.get('complete', False)
+    
+    @property
+    def created_at(self):
+        return self.metadata.get('created_at', 0)
+    
+    @property
+    def synced_at(self):
+        return self.metadata.get('synced_at')
+    
+    @property
+    def sync_count(self):
+        return self.metadata.get('sync_count', 0)
+    
+    @property
+    def users(self):
+        # 差分クロール時の既知ユーザー判定（in演算子）に使用
+        return self
+    
+    def needs_refresh(self, refresh_interval):
+        """最新分の再取得が必要か"""
+        return self.synced_at is None or time.time() - self.synced_at >= refresh_interval
+    
+    def get_stats(self):
+        """インデックスの統計情報"""
+        return {
+            'users': self.count,
+            'complete': self.complete,
+            'sync_count': self.sync_count,
+            'synced_at': datetime.utcfromtimestamp(self.synced_at).isoformat() if self.synced_at else None,
+            'size_bytes': self.stat.st_size
+        }
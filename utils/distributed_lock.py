@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import tempfile
+from config.config import Config
+from utils.logger import app_logger
+
+_redis_client = None
+_redis_checked = False
+
+def get_redis_client():
+    """Redisクライアントを取得（無効または接続失敗時はNone）"""
+    global _redis_client, _redis_checked
+    
+    if _redis_checked:
+        return _redis_client
+    
+    _redis_checked = True
+    if not Config.REDIS_ENABLED:
+        return None
+    
+    try:
+        import redis
+        client = redis.Redis.from_url(Config.REDIS_URL, socket_timeout=2)
+        client.ping()
+        _redis_client = client
+        app_logger.info("Redis connection established for shared state")
+    except Exception as e:
+        app_logger.warning(f"Redis unavailable, falling back to file locks: {e}")
+        _redis_client = None
+    
+    return _redis_client
+
+class DistributedLock:
+    """ワーカー間で共有されるロック（Redis または ファイルロック）"""
+    
+    # 所有者のトークンが一致する場合のみ削除するスクリプト
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    
+    def __init__(self, name, ttl=60):
+        self.name = name
+        self.ttl = ttl
+        self.token = None
+        self.lock_file = None
+    
+    def acquire(self, blocking=True, timeout=None, poll_interval=0.2):
+        """ロックを取得"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        while True:
+            if self._try_acquire():
+                return True
+            
+            if not blocking:
+                return False
+            
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            
+            time.sleep(poll_interval)
+    
+    def _try_acquire(self):
+        """ロック取得を1回試行"""
+        client = get_redis_client()
+        
+        if client:
+            token = uuid.uuid4().hex
+            try:
+                if client.set(f"lock:{self.name}", token, nx=True, ex=self.ttl):
+                    self.token = token
+                    return True
+                return False
+            except Exception as e:
+                app_logger.warning(f"Redis lock error for {self.name}: {e}")
+        
+        return self._try_acquire_file()
+    
+    def _try_acquire_file(self):
+        """ファイルロックの取得を試行"""
+        os.makedirs(Config.LOCK_DIR, exist_ok=True)
+        lock_path = os.path.join(Config.LOCK_DIR, f"{self.name}.lock")
+        
+        lock_file = open(lock_path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        
+        self.lock_file = lock_file
+        return True
+    
+    def release(self):
+        """ロックを解放"""
+        if self.token:
+            try:
+                client = get_redis_client()
+                if client:
+                    client.eval(self.RELEASE_SCRIPT, 1, f"lock:{self.name}", self.token)
+            except Exception as e:
+                app_logger.warning(f"Failed to release Redis lock {self.name}: {e}")
+            finally:
+                self.token = None
+        
+        if self.lock_file:
+            try:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+                self.lock_file.close()
+            except Exception as e:
+                app_logger.warning(f"Failed to release file lock {self.name}: {e}")
+            finally:
+                self.lock_file = None
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+class SharedState:
+    """ワーカー間で共有される小さなJSON状態（Redis または ファイル）"""
+    
+    def get(self, key, default=None):
+        """値を取得"""
+        client = get_redis_client()
+        
+        try:
+            if client:
+                raw = client.get(f"state:{key}")
+                return json.loads(raw) if raw else default
+            
+            path = self._state_path(key)
+            if not os.path.exists(path):
+                return default
+            
+            with open(path, 'r') as f:
+                return json.load(f)
+                
+        except Exception as e:
+            app_logger.warning(f"Failed to read shared state {key}: {e}")
+            return default
+    
+    def set(self, key, value, ttl=None):
+        """値を保存"""
+        client = get_redis_client()
+        
+        try:
+            if client:
+                client.set(f"state:{key}", json.dumps(value), ex=ttl)
+                return True
+            
+            # 一時ファイルに書き込んでからアトミックに置換（一時ファイル名はスレッド間でも重ならないようにする）
+            path = self._state_path(key)
+            fd, tmp_path = tempfile.mkstemp(dir=Config.LOCK_DIR, prefix=f"{key}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(value, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return True
+            
+        except Exception as e:
+            app_logger.warning(f"Failed to write shared state {key}: {e}")
+            return False
+    
+    def _state_path(self, key):
+        """ファイル保存時のパス"""
+        os.makedirs(Config.LOCK_DIR, exist_ok=True)
+        return os.path.join(Config.LOCK_DIR, f"{key}.json")
+
+# グローバルインスタンス
+shared_state = SharedState()
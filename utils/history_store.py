@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from config.config import Config
+from utils.logger import app_logger
+
+class HistoryStore:
+    """
+    確認結果の履歴を保存するSQLiteストア
+    
+    record() はキューに積むだけで、バックグラウンドスレッドがまとめて書き込む
+    （WALモードのため書き込み中も他のワーカーから参照できる）
+    """
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS check_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        request_id TEXT,
+        action TEXT NOT NULL,
+        target TEXT NOT NULL,
+        account TEXT,
+        success INTEGER NOT NULL,
+        result TEXT,
+        cacheable INTEGER NOT NULL DEFAULT 1,
+        error_code TEXT,
+        duration_ms INTEGER,
+        stage_timings TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_check_history_action_target
+        ON check_history (action, target, created_at);
+    CREATE INDEX IF NOT EXISTS idx_check_history_created_at
+        ON check_history (created_at);
+    """
+    
+    COLUMNS = (
+        'request_id', 'action', 'target', 'account', 'success', 'result', 'cacheable',
+        'error_code', 'duration_ms', 'stage_timings', 'created_at'
+    )
+    
+    def __init__(self, db_path):
+        self.enabled = Config.HISTORY_ENABLED
+        self.db_path = db_path
+        self.batch_size = Config.HISTORY_BATCH_SIZE
+        self.flush_interval = Config.HISTORY_FLUSH_INTERVAL
+        self.retention = Config.HISTORY_RETENTION_DAYS * 86400
+        self.queue = queue.Queue(maxsize=Config.HISTORY_QUEUE_SIZE)
+        self.thread = None
+        self.thread_lock = threading.Lock()
+        self.schema_ready = False
+        self.dropped = 0
+        self.written = 0
+        self.last_prune_at = 0
+    
+    def _connect(self):
+        """接続を作成（スレッドごとに作成する）"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        
+        if not self.schema_ready:
+            conn.executescript(self.SCHEMA)
+            self.schema_ready = True
+        
+        return conn
+    
+    def record(self, action, target, success, result=None, error_code=None,
+               duration=None, stage_timings=None, account=None, request_id=None, cacheable=True):
+        """
+        確認結果を書き込みキューに追加（リクエスト処理はブロックしない）
+        
+        cacheable=False の結果（一括確認、全コメントの取得等）はキャッシュの復元・障害時の応答に使わない
+        """
+        if not self.enabled:
+            return
+        
+        self._ensure_writer()
+        
+        row = (
+            request_id,
+            action,
+            target,
+            account,
+            1 if success else 0,
+            json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+            1 if cacheable else 0,
+            error_code,
+            int(duration * 1000) if duration is not None else None,
+            json.dumps(stage_timings) if stage_timings else None,
+            time.time()
+        )
+        
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            # 書き込みが追いつかない場合は履歴を諦めてリクエストを優先
+            self.dropped += 1
+    
+    def _ensure_writer(self):
+        """書き込みスレッドを開始（Gunicornのフォーク後に各ワーカーで開始されるよう遅延起動）"""
+        if self.thread and self.thread.is_alive():
+            return
+        
+        with self.thread_lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._writer_loop, name='history-writer', daemon=True)
+            self.thread.start()
+    
+    def _writer_loop(self):
+        """キューの内容を一定件数または一定時間ごとにまとめて書き込む"""
+        conn = self._connect()
+        
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO check_history ({', '.join(self.COLUMNS)}) "
+                        f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+                        batch
+                    )
+                self.written += len(batch)
+                self._prune(conn)
+            except sqlite3.Error as e:
+                app_logger.error(f"Failed to write {len(batch)} history rows: {e}")
+    
+    def _prune(self, conn):
+        """保存期間を過ぎた履歴を削除（1時間に1回）"""
+        if not self.retention or time.time() - self.last_prune_at < 3600:
+            return
+        
+        self.last_prune_at = time.time()
+        with conn:
+            deleted = conn.execute(
+                'DELETE FROM check_history WHERE created_at < ?',
+                (time.time() - self.retention,)
+            ).rowcount
+        if deleted:
+            app_logger.info(f"Pruned {deleted} old history rows")
+    
+    def query(self, action=None, target=None, since=None, success=None, limit=100):
+        """履歴を新しい順に取得"""
+        if not os.path.exists(self.db_path):
+            return []
+        
+        conditions = []
+        params = []
+        if action:
+            conditions.append('action = ?')
+            params.append(action)
+        if target:
+            conditions.append('target = ?')
+            params.append(target)
+        if since:
+            conditions.append('created_at >= ?')
+            params.append(since)
+        if success is not None:
+            conditions.append('success = ?')
+            params.append(1 if success else 0)
+        
+        sql = 'SELECT * FROM check_history'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY created_at DESC LIMIT ?'
+        params.append(limit)
+        
+        conn = self._connect()
+        try:
+            return [self._row_to_dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+    
+    def count(self, action, target, since):
+        """指定期間の履歴件数（需要の計測用）"""
+        if not os.path.exists(self.db_path):
+            return 0
+        
+        conn = self._connect()
+        try:
+            return conn.execute(
+                'SELECT COUNT(*) FROM check_history WHERE action = ? AND target = ? AND created_at >= ?',
+                (action, target, since)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+    
+    def latest_result(self, action, target, max_age):
+        """
+        対象の最新の成功結果を取得（障害時に古い結果を返すため）
+        
+        Returns:
+            (result, created_at) または None
+        """
+        if not os.path.exists(self.db_path):
+            return None
+        
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """
+                SELECT result, created_at FROM check_history
+                WHERE action = ? AND target = ? AND success = 1 AND cacheable = 1
+                    AND result IS NOT NULL AND created_at >= ?
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (action, target, time.time() - max_age)
+            ).fetchone()
+            return (json.loads(row['result']), row['created_at']) if row else None
+        finally:
+            conn.close()
+    
+    def latest_results(self, max_age):
+        """
+        (action, target) ごとのキャッシュ可能な最新の成功結果を取得（キャッシュのウォームアップ用）
+        
+        Returns:
+            [(action, target, result, created_at), ...]
+        """
+        if not os.path.exists(self.db_path):
+            return []
+        
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """
+                SELECT action, target, result, MAX(created_at) AS created_at
+                FROM check_history
+                WHERE success = 1 AND cacheable = 1 AND result IS NOT NULL AND created_at >= ?
+                GROUP BY action, target
+                """,
+                (time.time() - max_age,)
+            ).fetchall()
+            return [(row['action'], row['target'], json.loads(row['result']), row['created_at']) for row in rows]
+        finally:
+            conn.close()
+    
+    def _row_to_dict(self, row):
+        """DBの行をレスポンス用の辞書に変換"""
+        data = dict(row)
+        data['success'] = bool(data['success'])
+        data['result'] = json.loads(data['result']) if data['result'] else None
+        data['stage_timings'] = json.loads(data['stage_timings']) if data['stage_timings'] else None
+        data['created_at'] = datetime.utcfromtimestamp(data['created_at']).isoformat()
+        return data
+    
+    def get_stats(self):
+        """書き込み状況"""
+        return {
+            'enabled': self.enabled,
+            'pending': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped
+        }
+
+# グローバルインスタンス
+history_store = HistoryStore(Config.HISTORY_DB_PATH)
@@ -0,0 +1,77 @@
+import time
+from config.config import Config
+from utils.logger import app_logger
+from utils.distributed_lock import DistributedLock, shared_state
+
+class LoginCoordinator:
+    """クラスタ全体で自動ログインを1回に集約するクラス"""
+    
+    STATE_KEY = 'login_state'
+    
+    def __init__(self):
+        self.lock_ttl = Config.LOGIN_LOCK_TTL
+        self.wait_timeout = Config.LOGIN_WAIT_TIMEOUT
+        self.poll_interval = 0.5
+    
+    def get_state(self):
+        """最新のログイン状態を取得"""
+        return shared_state.get(self.STATE_KEY, {'generation': 0, 'success': False})
+    
+    def run(self, login_func):
+        """
+        ログインを1ワーカーだけで実行し、他のリクエストは結果を待つ
+        
+        Returns:
+            (success, performed): performed が True の場合は自分がログインを実行した
+        """
+        state = self.get_state()
+        generation = state.get('generation', 0)
+        
+        # ロックは取得したトークン・ファイルを保持するため、スレッド間で共有せず呼び出しごとに作成
+        lock = DistributedLock('x_login', ttl=self.lock_ttl)
+        if lock.acquire(blocking=False):
+            try:
+                # ロック取得までの間に他のワーカーがログインを完了していれば再利用
+                latest = self.get_state()
+                if latest.get('generation', 0) != generation and latest.get('success'):
+                    app_logger.info("Reusing login completed by another worker")
+                    return True, False
+                
+                app_logger.info("Acquired login lock, performing login")
+                success = False
+                try:
+                    success = bool(login_func())
+                finally:
+                    self._publish(generation + 1, success)
+                
+                return success, True
+                
+            finally:
+                lock.release()
+        
+        app_logger.info("Login in progress on another worker, waiting for result")
+        return self._wait_for_login(generation), False
+    
+    def _publish(self, generation, success):
+        """ログイン結果を他のワーカーに通知"""
+        shared_state.set(self.STATE_KEY, {
+            'generation': generation,
+            'success': success,
+            'finished_at': time.time()
+        })
+    
+    def _wait_for_login(self, generation):
+        """他のワーカーのログイン完了を待機"""
+        deadline = time.monotonic() + self.wait_timeout
+        
+        while time.monotonic() < deadline:
+            state = self.get_state()
+            if state.get('generation', 0) != generation:
+                return bool(state.get('success'))
+            time.sleep(self.poll_interval)
+        
+        app_logger.warning(f"Timed out waiting for login after {self.wait_timeout}s")
+        return False
+
+# グローバルインスタンス
+login_coordinator = LoginCoordinator()
@@ -0,0 +1,100 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from config.config import Config
+from utils.logger import app_logger
+
+def normalize_target(action, target):
+    """キャッシュ・履歴のキーとして使う対象の表記を統一"""
+    target = str(target).strip()
+    
+    # ツイートURLはIDに揃える（コメントは "ツイートID:ユーザー名" 形式）
+    def tweet_key(value):
+        match = re.search(r'(\d{15,20})', value)
+        return match.group(1) if match else value
+    
+    if action in ('like', 'repost', 'repost_bulk', 'comment_bulk'):
+        return tweet_key(target)
+    if action == 'comment' and ':' in target:
+        tweet, username = target.rsplit(':', 1)
+        return f"{tweet_key(tweet)}:{username.lstrip('@').lower()}"
+    return target.lstrip('@').lower()
+
+class ResultCache:
+    """確認結果のTTL付きキャッシュ（ワーカー内、起動時に履歴から復元）"""
+    
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self):
+        return self.ttl > 0
+    
+    def get(self, action, target):
+        """有効な結果を取得（無い場合はNone）"""
+        if not self.enabled:
+            return None
+        
+        key = (action, normalize_target(action, target))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry[1] >= self.ttl:
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+            result, stored_at = entry
+            return dict(result, cached_at=datetime.utcfromtimestamp(stored_at).isoformat())
+    
+    def put(self, action, target, result, stored_at=None):
+        """結果を保存"""
+        if not self.enabled:
+            return
+        
+        key = (action, normalize_target(action, target))
+        with self.lock:
+            self.entries[key] = (result, stored_at or time.time())
+            self.entries.move_to_end(key)
+            
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def warm(self, history_store):
+        """履歴から有効期間内の最新結果を読み込む（再起動・デプロイ直後のキャッシュミスを防ぐ）"""
+        if not self.enabled:
+            return 0
+        
+        try:
+            rows = history_store.latest_results(self.ttl)
+        except Exception as e:
+            app_logger.warning(f"Failed to warm result cache from history: {e}")
+            return 0
+        
+        for action, target, result, created_at in sorted(rows, key=lambda row: row[3]):
+            self.put(action, target, result, stored_at=created_at)
+        
+        app_logger.info(f"Result cache warmed with {len(rows)} entries from history")
+        return len(rows)
+    
+    def get_stats(self):
+        """キャッシュの統計情報"""
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'ttl_seconds': self.ttl,
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# グローバルインスタンス
+result_cache = ResultCache(Config.RESULT_CACHE_TTL, Config.RESULT_CACHE_MAX_ENTRIES)